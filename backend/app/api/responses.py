@@ -0,0 +1,238 @@
+"""Markdown responses with an in-process LRU, conditional GETs, ranges and compression."""
+
+from __future__ import annotations
+
+import gzip
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+
+from fastapi import Request, Response
+from fastapi.responses import StreamingResponse
+
+from app.store.artifacts import read_artifact_bytes, resolve_artifact
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None  # type: ignore[assignment]
+
+MARKDOWN_MEDIA_TYPE = "text/markdown; charset=utf-8"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+ETAG_SUFFIXES = {"gzip": "gz", "br": "br"}
+
+
+@dataclass
+class CachedArtifact:
+    body: bytes
+    etag: str
+    mtime: float
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+
+def _encode(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+class MarkdownCache:
+    """LRU of decoded markdown artifacts keyed by path and validated by mtime/size.
+
+    Compressed variants are cached next to the body, so a page that is polled
+    repeatedly is read, decompressed and re-encoded once per change.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[Path, CachedArtifact] = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: Path) -> CachedArtifact | None:
+        """Return the artifact at `path` (or its compressed sibling); None if missing."""
+        resolved = resolve_artifact(path)
+        if resolved is None:
+            return None
+        try:
+            stat = resolved.stat()
+        except FileNotFoundError:
+            return None
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.etag == etag:
+                self._entries.move_to_end(path)
+                return entry
+        entry = CachedArtifact(body=read_artifact_bytes(path), etag=etag, mtime=stat.st_mtime)
+        self._store(path, entry)
+        return entry
+
+    def encoded(self, path: Path, entry: CachedArtifact, encoding: str) -> bytes:
+        data = entry.encoded.get(encoding)
+        if data is None:
+            data = _encode(entry.body, encoding)
+            entry.encoded[encoding] = data
+            self._store(path, entry)
+        return data
+
+    def _store(self, path: Path, entry: CachedArtifact) -> None:
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self._total -= previous.size
+            if entry.size > self.max_bytes:
+                return
+            self._entries[path] = entry
+            self._total += entry.size
+            while self._total > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._total -= evicted.size
+
+
+def negotiate_encoding(request: Request) -> str | None:
+    accepted: set[str] = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().lower().partition(";")
+        if params.replace(" ", "") in {"q=0", "q=0.0", "q=0.00", "q=0.000"}:
+            continue
+        accepted.add(name.strip())
+    if "br" in accepted and brotli is not None:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def representation_etag(etag: str, encoding: str | None) -> str:
+    """Strong ETags identify the exact bytes, so each Content-Encoding gets its own."""
+    if encoding is None:
+        return etag
+    return f'{etag[:-1]}-{ETAG_SUFFIXES[encoding]}"'
+
+
+def is_not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return etag in tags or "*" in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= since.timestamp()
+    return False
+
+
+def _validator_headers(etag: str, mtime: float) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(datetime.fromtimestamp(mtime, UTC), usegmt=True),
+        # Revalidate every time; unchanged content costs a 304.
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+
+
+def markdown_response(
+    request: Request,
+    cache: MarkdownCache,
+    path: Path,
+    entry: CachedArtifact,
+    min_compress_bytes: int,
+    filename: str | None = None,
+) -> Response:
+    range_header = request.headers.get("range")
+    # Ranges are served from the identity body.
+    encoding = (
+        negotiate_encoding(request) if not range_header and len(entry.body) >= min_compress_bytes else None
+    )
+    etag = representation_etag(entry.etag, encoding)
+    headers = _validator_headers(etag, entry.mtime)
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    if is_not_modified(request, etag, entry.mtime):
+        return Response(status_code=304, headers=headers)
+
+    if range_header:
+        headers["Accept-Ranges"] = "bytes"
+        return _range_response(entry.body, range_header, headers)
+
+    if encoding is None:
+        headers["Accept-Ranges"] = "bytes"
+        return Response(content=entry.body, media_type=MARKDOWN_MEDIA_TYPE, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(
+        content=cache.encoded(path, entry, encoding),
+        media_type=MARKDOWN_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+def _range_response(body: bytes, range_header: str, headers: dict[str, str]) -> Response:
+    match = RANGE_RE.match(range_header.strip())
+    size = len(body)
+    if match is None or match.groups() == ("", ""):
+        return Response(content=body, media_type=MARKDOWN_MEDIA_TYPE, headers=headers)
+    first, last = match.groups()
+    if first == "":
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start, end = int(first), min(size - 1, int(last)) if last else size - 1
+    if start >= size or start > end:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(
+        content=body[start : end + 1],
+        status_code=206,
+        media_type=MARKDOWN_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+async def _encode_stream(chunks: Iterable[bytes], encoding: str | None) -> AsyncIterator[bytes]:
+    if encoding is None:
+        for chunk in chunks:
+            yield chunk
+        return
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            if data := compressor.process(chunk):
+                yield data
+        yield compressor.finish()
+        return
+    gz = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        if data := gz.compress(chunk):
+            yield data
+    yield gz.flush()
+
+
+def streaming_markdown_response(
+    request: Request,
+    chunks: Iterable[bytes],
+    etag: str,
+    mtime: float,
+    extra_headers: dict[str, str],
+) -> Response:
+    encoding = negotiate_encoding(request)
+    etag = representation_etag(etag, encoding)
+    headers = {**_validator_headers(etag, mtime), **extra_headers}
+    if is_not_modified(request, etag, mtime):
+        return Response(status_code=304, headers=headers)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(_encode_stream(chunks, encoding), media_type=MARKDOWN_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+from fastapi import APIRouter, HTTPException, Response, status
+
+from app.core.config import get_settings
+from app.models.schemas import ReplayJobResult, ReplayRequest, ReplayResponse
+from app.pipeline.replay import replay_jobs, replayable_job_ids
+from app.store.paths import build_job_paths
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/jobs/{job_id}/profile")
+async def get_job_profile(job_id: str) -> Response:
+    """The job's folded-stack profile (flamegraph.pl / speedscope input)."""
+    paths = build_job_paths(job_id=job_id, settings=get_settings())
+    if not paths.meta_json.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+    if not paths.profile.exists():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No profile for this job. Submit it with profile=true or set PROFILE_JOBS=true.",
+        )
+    body = await asyncio.to_thread(paths.profile.read_bytes)
+    return Response(
+        content=body,
+        media_type="text/plain; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{job_id}.folded"'},
+    )
+
+
+@router.post("/replay", response_model=ReplayResponse)
+async def replay(request: ReplayRequest) -> ReplayResponse:
+    """Rebuild markdown / translated PDF of finished jobs from their stored raw OCR."""
+    settings = get_settings()
+    started = time.monotonic()
+    job_ids = request.job_ids if request.job_ids is not None else await asyncio.to_thread(replayable_job_ids, settings)
+    results = await replay_jobs(
+        job_ids,
+        settings,
+        stages=tuple(request.stages),
+        allow_llm=request.allow_llm,
+        concurrency=settings.replay_concurrency,
+        force=request.force,
+    )
+    return ReplayResponse(
+        results=[
+            ReplayJobResult(
+                job_id=result.job_id,
+                pages=result.pages,
+                blocks=result.blocks,
+                untranslated=result.untranslated,
+                cache_misses=result.cache_misses,
+                applied=result.applied,
+                elapsed_sec=result.elapsed_sec,
+                error=result.error,
+            )
+            for result in results
+        ],
+        elapsed_sec=round(time.monotonic() - started, 3),
+    )
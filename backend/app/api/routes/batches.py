@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import uuid
+import zipfile
+from datetime import UTC, datetime
+from pathlib import PurePosixPath
+from typing import BinaryIO
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+
+from app.api.routes.jobs import request_client_id, submit_job
+from app.core.config import get_settings
+from app.models.schemas import (
+    BatchCreateResponse,
+    BatchJobSummary,
+    BatchMeta,
+    BatchStatusResponse,
+    JobMeta,
+    JobStatus,
+)
+from app.store.paths import build_batch_paths, build_job_paths
+from app.store.state import load_batch, load_meta, save_batch
+
+router = APIRouter(prefix="/batches", tags=["batches"])
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+TERMINAL_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED}
+
+
+def _is_pdf(name: str, content_type: str | None = None) -> bool:
+    return name.lower().endswith(".pdf") or (content_type or "").lower() == "application/pdf"
+
+
+def _is_zip(upload: UploadFile) -> bool:
+    if (upload.filename or "").lower().endswith(".zip"):
+        return True
+    return (upload.content_type or "").lower() in ZIP_CONTENT_TYPES
+
+
+def _load_batch_or_404(batch_id: str) -> BatchMeta:
+    paths = build_batch_paths(batch_id=batch_id, settings=get_settings())
+    if not paths.batch_json.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Batch not found.")
+    return load_batch(paths.batch_json)
+
+
+@router.post("", response_model=BatchCreateResponse, status_code=status.HTTP_201_CREATED)
+async def create_batch(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    files: list[UploadFile] = File(...),
+    priority: int = Form(0, ge=-10, le=10),
+    x_client_id: str | None = Header(default=None),
+) -> BatchCreateResponse:
+    """Create one job per PDF (uploaded directly or inside zip archives)."""
+    settings = get_settings()
+    batch_id = uuid.uuid4().hex
+    client = request_client_id(request, x_client_id)
+    job_ids: list[str] = []
+    skipped: list[str] = []
+
+    async def add(source: BinaryIO, filename: str) -> None:
+        if len(job_ids) >= settings.batch_max_files:
+            skipped.append(filename)
+            return
+        job_ids.append(
+            await submit_job(
+                source,
+                filename=filename,
+                background_tasks=background_tasks,
+                priority=priority,
+                client=client,
+                extra={"batch_id": batch_id, "batch_index": len(job_ids)},
+            )
+        )
+
+    for upload in files:
+        name = upload.filename or "upload"
+        if _is_zip(upload):
+            try:
+                archive = zipfile.ZipFile(upload.file)
+            except zipfile.BadZipFile:
+                skipped.append(name)
+                continue
+            with archive:
+                for member in sorted(archive.infolist(), key=lambda info: info.filename):
+                    member_path = PurePosixPath(member.filename)
+                    if member.is_dir() or "__MACOSX" in member_path.parts or member_path.name.startswith("."):
+                        continue
+                    if not _is_pdf(member_path.name):
+                        skipped.append(f"{name}:{member.filename}")
+                        continue
+                    with archive.open(member) as source:
+                        await add(source, member_path.name)
+        elif _is_pdf(name, upload.content_type):
+            await add(upload.file, name)
+        else:
+            skipped.append(name)
+        await upload.close()
+
+    if not job_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No PDF files found in the upload.")
+
+    batch = BatchMeta(batch_id=batch_id, created_at=datetime.now(UTC), job_ids=job_ids, skipped=skipped)
+    await asyncio.to_thread(save_batch, build_batch_paths(batch_id, settings).batch_json, batch)
+    return BatchCreateResponse(batch_id=batch_id, job_ids=job_ids, skipped=skipped)
+
+
+def _load_job_metas(batch: BatchMeta) -> list[JobMeta | None]:
+    """One entry per `batch.job_ids`; None where the job's meta.json is gone."""
+    settings = get_settings()
+    metas: list[JobMeta | None] = []
+    for job_id in batch.job_ids:
+        meta_path = build_job_paths(job_id=job_id, settings=settings).meta_json
+        metas.append(load_meta(meta_path) if meta_path.exists() else None)
+    return metas
+
+
+def _job_summary(job_id: str, meta: JobMeta | None) -> BatchJobSummary:
+    if meta is None:
+        # Deleted or garbage-collected: it will never finish, so it counts as failed.
+        return BatchJobSummary(
+            job_id=job_id,
+            filename="",
+            status=JobStatus.FAILED,
+            progress=0.0,
+            pages=0,
+            error="Job not found (deleted?).",
+            missing=True,
+        )
+    return BatchJobSummary(
+        job_id=meta.job_id,
+        filename=meta.filename,
+        status=meta.status,
+        progress=meta.progress,
+        pages=int(meta.extra.get("pages", 1)),
+        error=meta.error,
+    )
+
+
+def _aggregate(batch: BatchMeta, metas: list[JobMeta | None]) -> BatchStatusResponse:
+    jobs = [_job_summary(job_id, meta) for job_id, meta in zip(batch.job_ids, metas, strict=True)]
+    pages_total = sum(job.pages for job in jobs)
+    pages_done = sum(job.pages * (1.0 if job.status in TERMINAL_STATUSES else job.progress) for job in jobs)
+    succeeded = sum(job.status == JobStatus.SUCCEEDED for job in jobs)
+    failed = sum(job.status == JobStatus.FAILED for job in jobs)
+    missing = sum(job.missing for job in jobs)
+
+    if not jobs:
+        # Nothing ran, so nothing succeeded.
+        batch_status = "failed"
+        end = batch.created_at
+    elif succeeded + failed == len(jobs):
+        batch_status = "succeeded" if failed == 0 else ("failed" if succeeded == 0 else "completed_with_errors")
+        end = max((meta.updated_at for meta in metas if meta is not None), default=batch.created_at)
+    else:
+        batch_status = "queued" if all(job.status == JobStatus.QUEUED for job in jobs) else "running"
+        end = datetime.now(UTC)
+    elapsed = max(0.0, (end - batch.created_at).total_seconds())
+
+    return BatchStatusResponse(
+        batch_id=batch.batch_id,
+        status=batch_status,
+        progress=pages_done / pages_total if pages_total else 0.0,
+        jobs_total=len(jobs),
+        jobs_succeeded=succeeded,
+        jobs_failed=failed,
+        jobs_missing=missing,
+        pages_total=pages_total,
+        pages_done=round(pages_done, 2),
+        elapsed_sec=round(elapsed, 1),
+        pages_per_min=round(pages_done / elapsed * 60.0, 2) if elapsed > 0 and pages_done > 0 else None,
+        created_at=batch.created_at,
+        jobs=jobs,
+    )
+
+
+@router.get("/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch(batch_id: str) -> BatchStatusResponse:
+    batch = _load_batch_or_404(batch_id)
+    metas = await asyncio.to_thread(_load_job_metas, batch)
+    return _aggregate(batch, metas)
+
+
+def _combined_result(metas: list[JobMeta | None], fmt: str) -> bytes | None:
+    settings = get_settings()
+    finished = [
+        (index, meta, build_job_paths(job_id=meta.job_id, settings=settings).result_md)
+        for index, meta in enumerate(metas, start=1)
+        if meta is not None and meta.status == JobStatus.SUCCEEDED
+    ]
+    finished = [item for item in finished if item[2].exists()]
+    if not finished:
+        return None
+    if fmt == "md":
+        sections = [
+            f"# {meta.filename}\n\n{path.read_text(encoding='utf-8').strip()}\n" for _, meta, path in finished
+        ]
+        return "\n".join(sections).encode("utf-8")
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for index, meta, path in finished:
+            archive.write(path, arcname=f"{index:03d}-{PurePosixPath(meta.filename).stem}.md")
+    return buffer.getvalue()
+
+
+@router.get("/{batch_id}/result")
+async def get_batch_result(
+    batch_id: str,
+    fmt: str = Query("zip", alias="format", pattern="^(zip|md)$"),
+) -> Response:
+    """Results of the finished jobs: a zip of per-document markdown, or one concatenated file."""
+    batch = _load_batch_or_404(batch_id)
+    metas = await asyncio.to_thread(_load_job_metas, batch)
+    content = await asyncio.to_thread(_combined_result, metas, fmt)
+    if content is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No finished documents in this batch yet.",
+        )
+    media_type = "application/zip" if fmt == "zip" else "text/markdown; charset=utf-8"
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="batch-{batch_id}.{fmt}"'},
+    )
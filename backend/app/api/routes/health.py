@@ -1,13 +1,26 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Tuple
 
 import httpx
 from fastapi import APIRouter, status
 from fastapi.responses import JSONResponse
 
+from app.clients.translation_client import TranslationClientError, build_translation_client
 from app.core.config import get_settings
-from app.models.schemas import HealthResponse, ServiceHealth
+from app.core.loop_monitor import loop_lag_stats
+from app.core.metrics import counters
+from app.models.schemas import (
+    EventLoopLag,
+    GenerationCounters,
+    HealthResponse,
+    QueueStats,
+    ServiceHealth,
+    StorageUsage,
+)
+from app.store.artifacts import storage_usage
+from app.store.queue import get_job_queue
 
 router = APIRouter(tags=["health"])
 
@@ -28,15 +41,35 @@ async def health() -> JSONResponse:
     settings = get_settings()
 
     ocr_ok, ocr_detail = await _probe(f"{settings.ocr_base_url}/docs", settings.http_timeout_sec)
-    ollama_ok, ollama_detail = await _probe(
-        f"{settings.ollama_base_url}/api/tags",
-        settings.http_timeout_sec,
-    )
+    try:
+        translation_url = build_translation_client(settings).health_url
+    except TranslationClientError as exc:
+        ollama_ok, ollama_detail = False, str(exc)
+    else:
+        ollama_ok, ollama_detail = await _probe(translation_url, settings.http_timeout_sec)
 
+    queue = (
+        QueueStats(**await asyncio.to_thread(get_job_queue(settings).stats))
+        if settings.job_runner != "inline"
+        else None
+    )
     payload = HealthResponse(
         status="ok" if ocr_ok and ollama_ok else "degraded",
         ocr=ServiceHealth(ok=ocr_ok, detail=ocr_detail),
         ollama=ServiceHealth(ok=ollama_ok, detail=ollama_detail),
+        storage=StorageUsage(**await asyncio.to_thread(storage_usage, settings)),
+        queue=queue,
+        event_loop=EventLoopLag(**loop_lag_stats.snapshot()) if settings.loop_monitor_enabled else None,
+        # Jobs only run in this process with the inline runner; workers log their own.
+        generation=(
+            GenerationCounters(
+                llm_calls=counters["llm_calls"],
+                degenerate_generations=counters["degenerate_generations"],
+                degenerate_wasted_sec=counters["degenerate_wasted_ms"] / 1000,
+            )
+            if settings.job_runner == "inline"
+            else None
+        ),
     )
 
     status_code = status.HTTP_200_OK if payload.status == "ok" else status.HTTP_503_SERVICE_UNAVAILABLE
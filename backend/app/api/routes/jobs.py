@@ -1,17 +1,39 @@
 from __future__ import annotations
 
+import asyncio
 import shutil
 import uuid
+import zlib
+from functools import lru_cache
 from pathlib import Path
+from typing import BinaryIO
 
-from fastapi import APIRouter, BackgroundTasks, File, HTTPException, Path as FPath, UploadFile, status
-from fastapi.responses import FileResponse, PlainTextResponse
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    File,
+    Form,
+    Header,
+    HTTPException,
+    Path as FPath,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
 
+from app.api.responses import CachedArtifact, MarkdownCache, markdown_response, streaming_markdown_response
 from app.core.config import get_settings
-from app.models.schemas import JobCreateResponse, JobMeta
+from app.models.schemas import JobBudget, JobCreateResponse, JobLogResponse, JobMeta, JobStatus
+from app.pipeline.render_pdf import count_pdf_pages
 from app.pipeline.run_job import run_job
+from app.pipeline.translated_pdf import assemble_translated_pdf, completed_page_pdfs
+from app.store.joblog import read_log_range, read_log_tail
 from app.store.paths import JobPaths, build_job_paths, ensure_job_dirs
+from app.store.queue import get_job_queue
 from app.store.state import init_meta, load_meta, save_meta
+from app.utils.executors import run_cpu_bound
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
@@ -33,31 +55,116 @@ def _assert_pdf(upload: UploadFile) -> None:
     )
 
 
+@lru_cache(maxsize=1)
+def _markdown_cache() -> MarkdownCache:
+    return MarkdownCache(max_bytes=get_settings().api_markdown_cache_bytes)
+
+
+def _assert_job_exists(paths: JobPaths) -> None:
+    # Markdown endpoints only need the job to exist; meta.json is not parsed.
+    if not paths.meta_json.exists():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+
+
+def _completed_pages(paths: JobPaths, cache: MarkdownCache) -> list[CachedArtifact]:
+    """Page markdown written so far, in page order up to the first missing page."""
+    pages: list[CachedArtifact] = []
+    while (entry := cache.get(paths.md_dir / f"{len(pages) + 1:03d}.md")) is not None:
+        pages.append(entry)
+    return pages
+
+
 def _load_meta_or_404(meta_path: Path) -> JobMeta:
     if not meta_path.exists():
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
     return load_meta(meta_path)
 
 
-@router.post("", response_model=JobCreateResponse, status_code=status.HTTP_201_CREATED)
-async def create_job(background_tasks: BackgroundTasks, file: UploadFile = File(...)) -> JobCreateResponse:
-    _assert_pdf(file)
-
+async def submit_job(
+    source: BinaryIO,
+    filename: str,
+    background_tasks: BackgroundTasks,
+    priority: int = 0,
+    client: str = "",
+    extra: dict[str, object] | None = None,
+    budget: JobBudget | None = None,
+) -> str:
+    """Store one PDF as a new job and hand it to the configured runner."""
     job_id = uuid.uuid4().hex
     paths = _resolve_paths(job_id)
     ensure_job_dirs(paths)
 
-    with paths.input_pdf.open("wb") as dst:
-        shutil.copyfileobj(file.file, dst)
+    def _copy() -> None:
+        with paths.input_pdf.open("wb") as dst:
+            shutil.copyfileobj(source, dst)
 
-    filename = file.filename or "input.pdf"
+    await asyncio.to_thread(_copy)
+    try:
+        page_count = await asyncio.to_thread(count_pdf_pages, paths.input_pdf)
+    except RuntimeError:
+        # Unreadable PDFs still go through the pipeline, which records the error.
+        page_count = 1
     meta = init_meta(
         job_id=job_id,
         filename=filename,
-        extra={"input_bytes": paths.input_pdf.stat().st_size},
+        extra={
+            "input_bytes": paths.input_pdf.stat().st_size,
+            "pages": page_count,
+            "priority": priority,
+            "client": client,
+            **(extra or {}),
+        },
     )
+    if budget is not None and not budget.is_empty():
+        meta.budget = budget
     save_meta(paths.meta_json, meta)
-    background_tasks.add_task(run_job, job_id)
+    settings = get_settings()
+    if settings.job_runner == "inline":
+        background_tasks.add_task(run_job, job_id)
+    else:
+        # Picked up by `python -m app.worker` processes.
+        await asyncio.to_thread(
+            get_job_queue(settings).enqueue,
+            job_id,
+            pages=page_count,
+            priority=priority,
+            client=client,
+        )
+    return job_id
+
+
+def request_client_id(request: Request, x_client_id: str | None) -> str:
+    return x_client_id or (request.client.host if request.client else "")
+
+
+@router.post("", response_model=JobCreateResponse, status_code=status.HTTP_201_CREATED)
+async def create_job(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    priority: int = Form(0, ge=-10, le=10),
+    deadline_sec: float | None = Form(None, gt=0),
+    max_llm_calls: int | None = Form(None, ge=0),
+    max_llm_tokens: int | None = Form(None, ge=0),
+    max_ocr_pages: int | None = Form(None, ge=0),
+    profile: bool = Form(False),
+    x_client_id: str | None = Header(default=None),
+) -> JobCreateResponse:
+    _assert_pdf(file)
+    job_id = await submit_job(
+        file.file,
+        filename=file.filename or "input.pdf",
+        background_tasks=background_tasks,
+        priority=priority,
+        client=request_client_id(request, x_client_id),
+        budget=JobBudget(
+            deadline_sec=deadline_sec,
+            max_llm_calls=max_llm_calls,
+            max_llm_tokens=max_llm_tokens,
+            max_ocr_pages=max_ocr_pages,
+        ),
+        extra={"profile": True} if profile else None,
+    )
     await file.close()
     return JobCreateResponse(job_id=job_id)
 
@@ -65,33 +172,125 @@ async def create_job(background_tasks: BackgroundTasks, file: UploadFile = File(
 @router.get("/{job_id}", response_model=JobMeta)
 async def get_job(job_id: str) -> JobMeta:
     paths = _resolve_paths(job_id)
-    return _load_meta_or_404(paths.meta_json)
+    meta = _load_meta_or_404(paths.meta_json)
+    settings = get_settings()
+    if meta.status == JobStatus.QUEUED and settings.job_runner != "inline":
+        estimate = await asyncio.to_thread(get_job_queue(settings).estimate_wait, job_id)
+        if estimate is not None:
+            meta = meta.model_copy(
+                update={"queue_position": estimate.position, "expected_wait_sec": estimate.expected_wait_sec}
+            )
+    return meta
 
 
 @router.get("/{job_id}/result")
-async def get_result(job_id: str) -> FileResponse:
+async def get_result(job_id: str, request: Request) -> Response:
     paths = _resolve_paths(job_id)
-    _load_meta_or_404(paths.meta_json)
-    if not paths.result_md.exists():
+    _assert_job_exists(paths)
+    cache = _markdown_cache()
+    entry = await asyncio.to_thread(cache.get, paths.result_md)
+    if entry is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Result not available yet.",
+            detail="Result not available yet. Completed pages are served by /result/partial.",
         )
-    return FileResponse(
-        path=paths.result_md,
-        media_type="text/markdown; charset=utf-8",
+    return markdown_response(
+        request,
+        cache,
+        paths.result_md,
+        entry,
+        min_compress_bytes=get_settings().api_compress_min_bytes,
         filename=f"{job_id}.md",
     )
 
 
+@router.get("/{job_id}/result/partial")
+async def get_partial_result(job_id: str, request: Request) -> Response:
+    """Markdown of the pages finished so far, in order; the full result once the job is done."""
+    paths = _resolve_paths(job_id)
+    _assert_job_exists(paths)
+    cache = _markdown_cache()
+    result = await asyncio.to_thread(cache.get, paths.result_md)
+    if result is not None:
+        return markdown_response(
+            request,
+            cache,
+            paths.result_md,
+            result,
+            min_compress_bytes=get_settings().api_compress_min_bytes,
+        )
+
+    pages = await asyncio.to_thread(_completed_pages, paths, cache)
+    digest = zlib.crc32("".join(page.etag for page in pages).encode("ascii"))
+    etag = f'"p{len(pages)}-{digest:x}"'
+    mtime = max((page.mtime for page in pages), default=0.0)
+    # Same joining as write_result_markdown, so the final result extends this text.
+    chunks = [chunk for page in pages if (chunk := page.body.strip())]
+    body = [part for idx, chunk in enumerate(chunks) for part in ((b"\n\n" if idx else b""), chunk)]
+    if chunks:
+        body.append(b"\n")
+    return streaming_markdown_response(
+        request,
+        body,
+        etag=etag,
+        mtime=mtime,
+        extra_headers={"X-Pages-Completed": str(len(pages))},
+    )
+
+
+@router.get("/{job_id}/result.pdf")
+async def get_result_pdf(job_id: str) -> Response:
+    """Translated PDF; while the job runs, assembled from the pages rendered so far."""
+    paths = _resolve_paths(job_id)
+    _assert_job_exists(paths)
+    headers = {"Content-Disposition": f'inline; filename="{job_id}.pdf"'}
+    if paths.result_pdf.exists():
+        body = await asyncio.to_thread(paths.result_pdf.read_bytes)
+    else:
+        pages = await asyncio.to_thread(completed_page_pdfs, paths.pdf_dir)
+        if not pages:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Translated PDF not available yet.")
+        settings = get_settings()
+        body = await run_cpu_bound(settings.render_executor, settings.render_processes, assemble_translated_pdf, pages)
+        headers["X-Pages-Completed"] = str(len(pages))
+    return Response(content=body, media_type="application/pdf", headers=headers)
+
+
 @router.get("/{job_id}/pages/{page_no}")
 async def get_page_markdown(
     job_id: str,
+    request: Request,
     page_no: int = FPath(..., ge=1),
-) -> PlainTextResponse:
+) -> Response:
     paths = _resolve_paths(job_id)
-    _load_meta_or_404(paths.meta_json)
+    _assert_job_exists(paths)
     page_file = paths.md_dir / f"{page_no:03d}.md"
-    if not page_file.exists():
+    cache = _markdown_cache()
+    entry = await asyncio.to_thread(cache.get, page_file)
+    if entry is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Page markdown not found.")
-    return PlainTextResponse(page_file.read_text(encoding="utf-8"))
+    return markdown_response(
+        request,
+        cache,
+        page_file,
+        entry,
+        min_compress_bytes=get_settings().api_compress_min_bytes,
+    )
+
+
+@router.get("/{job_id}/log", response_model=JobLogResponse)
+async def get_job_log(
+    job_id: str,
+    since: int | None = Query(None, ge=0, description="Byte offset from a previous response's next_offset."),
+    tail: int = Query(200, ge=1, le=5000, description="Entries to return when `since` is omitted."),
+    max_bytes: int = Query(256 * 1024, ge=1024, le=4 * 1024 * 1024),
+) -> JobLogResponse:
+    paths = _resolve_paths(job_id)
+    _load_meta_or_404(paths.meta_json)
+    if not paths.job_log.exists():
+        return JobLogResponse()
+    if since is None:
+        entries, next_offset = await asyncio.to_thread(read_log_tail, paths.job_log, tail)
+    else:
+        entries, next_offset = await asyncio.to_thread(read_log_range, paths.job_log, since, max_bytes)
+    return JobLogResponse(entries=entries, next_offset=next_offset)
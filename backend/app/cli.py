@@ -0,0 +1,316 @@
+"""Headless batch translation: `python -m app.cli translate <pdfs...|dir>`.
+
+Runs the pipeline in this process (no API, no queue) and writes one
+`<name>.md` (and `<name>.pdf` unless PDF_OUTPUT_ENABLED=false) per document
+under `--output-dir`. The OCR and translation result
+caches are the same ones the API workers use, so re-running over the same
+documents only pays for pages that changed.
+
+`python -m app.cli replay [job_ids...]` rebuilds the output of finished jobs
+from their stored raw OCR (see app/pipeline/replay.py).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import shutil
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.core.config import Settings, get_settings
+from app.core.logging import setup_logging
+from app.core.metrics import counters
+from app.models.schemas import JobStatus
+from app.pipeline.render_pdf import count_pdf_pages
+from app.pipeline.replay import REPLAY_STAGES, ReplayResult, replay_jobs, replayable_job_ids
+from app.pipeline.run_job import run_job
+from app.store.cache import cache_dir, get_result_caches
+from app.store.paths import build_job_paths, ensure_job_dirs
+from app.store.state import init_meta, load_meta, save_meta
+from app.utils.executors import shutdown_process_pool
+
+
+@dataclass
+class Document:
+    source: Path
+    job_id: str
+    pages: int = 1
+    status: str = "pending"
+    error: str | None = None
+
+
+def _collect_pdfs(inputs: list[str], recursive: bool) -> list[Path]:
+    pdfs: list[Path] = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            pattern = "**/*" if recursive else "*"
+            pdfs.extend(sorted(p for p in path.glob(pattern) if p.is_file() and p.suffix.lower() == ".pdf"))
+        elif path.is_file():
+            pdfs.append(path)
+        else:
+            raise SystemExit(f"error: no such file or directory: {item}")
+    # Keep the first occurrence when a file is named twice (e.g. a file and its directory).
+    return list(dict.fromkeys(p.resolve() for p in pdfs))
+
+
+def _job_id_for(pdf: Path) -> str:
+    digest = hashlib.sha256()
+    with pdf.open("rb") as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b""):
+            digest.update(chunk)
+    stem = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in pdf.stem)[:60]
+    return f"{stem}-{digest.hexdigest()[:8]}"
+
+
+def _prepare(doc: Document, settings: Settings, force: bool) -> bool:
+    """Create the job directory; False if a finished result can be reused."""
+    paths = build_job_paths(job_id=doc.job_id, settings=settings)
+    if not force and paths.meta_json.exists():
+        meta = load_meta(paths.meta_json)
+        if meta.status == JobStatus.SUCCEEDED and paths.result_md.exists():
+            doc.pages = int(meta.extra.get("pages", 1))
+            return False
+    ensure_job_dirs(paths)
+    shutil.copyfile(doc.source, paths.input_pdf)
+    try:
+        doc.pages = count_pdf_pages(paths.input_pdf)
+    except RuntimeError:
+        doc.pages = 1
+    meta = init_meta(
+        job_id=doc.job_id,
+        filename=doc.source.name,
+        extra={"input_bytes": paths.input_pdf.stat().st_size, "pages": doc.pages, "source": "cli"},
+    )
+    save_meta(paths.meta_json, meta, pretty=settings.artifact_pretty_json)
+    return True
+
+
+def _export(doc: Document, settings: Settings, output_dir: Path) -> None:
+    paths = build_job_paths(job_id=doc.job_id, settings=settings)
+    meta = load_meta(paths.meta_json)
+    if meta.status != JobStatus.SUCCEEDED:
+        doc.status = "failed"
+        doc.error = meta.error
+        return
+    shutil.copyfile(paths.result_md, output_dir / f"{doc.source.stem}.md")
+    if paths.result_pdf.exists():
+        shutil.copyfile(paths.result_pdf, output_dir / f"{doc.source.stem}.pdf")
+
+
+async def _translate_all(docs: list[Document], settings: Settings, output_dir: Path, jobs: int, force: bool) -> None:
+    semaphore = asyncio.Semaphore(max(1, jobs))
+
+    async def one(doc: Document) -> None:
+        async with semaphore:
+            if not await asyncio.to_thread(_prepare, doc, settings, force):
+                doc.status = "skipped"
+            else:
+                print(f"[start] {doc.source.name} ({doc.pages} pages) -> job {doc.job_id}", flush=True)
+                await run_job(doc.job_id, settings)
+                doc.status = "ok"
+            await asyncio.to_thread(_export, doc, settings, output_dir)
+            print(f"[{doc.status}] {doc.source.name}" + (f": {doc.error}" if doc.error else ""), flush=True)
+
+    try:
+        await asyncio.gather(*(one(doc) for doc in docs))
+    finally:
+        shutdown_process_pool()
+
+
+def _rate(hits: int, misses: int) -> str:
+    total = hits + misses
+    return f"{hits / total:.1%} ({hits}/{total})" if total else "n/a"
+
+
+def _print_summary(docs: list[Document], settings: Settings, elapsed: float) -> None:
+    translated = [doc for doc in docs if doc.status == "ok"]
+    pages = sum(doc.pages for doc in translated)
+    caches = get_result_caches(settings)
+    throughput = f"{pages / elapsed * 60.0:.2f} pages/min" if elapsed > 0 and pages else "n/a"
+    lines = [
+        "",
+        "Summary",
+        f"  documents        {len(translated)} translated, {sum(d.status == 'skipped' for d in docs)} reused, "
+        f"{sum(d.status == 'failed' for d in docs)} failed",
+        f"  pages            {pages}",
+        f"  wall time        {elapsed:.1f}s",
+        f"  throughput       {throughput}",
+        f"  LLM calls        {counters['llm_calls']}",
+        f"  OCR requests     {counters['ocr_requests']}",
+        f"  degenerate       {counters['degenerate_generations']} "
+        f"({counters['degenerate_wasted_ms'] / 1000:.1f}s wasted)",
+    ]
+    if caches is not None:
+        lines.append(f"  OCR cache        {_rate(caches.ocr.stats.hits, caches.ocr.stats.misses)}")
+        lines.append(
+            f"  translate cache  {_rate(caches.translation.stats.hits, caches.translation.stats.misses)}"
+        )
+    else:
+        lines.append("  cache            disabled")
+    print("\n".join(lines))
+
+
+def _translate_command(args: argparse.Namespace, settings: Settings) -> int:
+    output_dir = Path(args.output_dir).resolve()
+    output_dir.mkdir(parents=True, exist_ok=True)
+    overrides: dict[str, object] = {
+        # Job directories go under the chosen output dir; the caches stay where
+        # the API and workers keep theirs unless --cache-dir says otherwise.
+        "output_dir": str(output_dir / "work"),
+        "pipeline_cache_dir": str(Path(args.cache_dir).resolve() if args.cache_dir else cache_dir(settings)),
+        "pipeline_cache_enabled": settings.pipeline_cache_enabled and not args.no_cache,
+    }
+    if args.ocr_concurrency is not None:
+        overrides["ocr_concurrency"] = args.ocr_concurrency
+    if args.ocr_batch_size is not None:
+        overrides["ocr_batch_size"] = args.ocr_batch_size
+    if args.translate_concurrency is not None:
+        overrides["translate_concurrency"] = args.translate_concurrency
+    if args.profile:
+        overrides["profile_jobs"] = True
+    settings = settings.model_copy(update=overrides)
+
+    pdfs = _collect_pdfs(args.inputs, recursive=args.recursive)
+    if not pdfs:
+        print("error: no PDF files found", file=sys.stderr)
+        return 2
+    docs = [Document(source=pdf, job_id=_job_id_for(pdf)) for pdf in pdfs]
+
+    started = time.monotonic()
+    asyncio.run(_translate_all(docs, settings, output_dir, jobs=args.jobs, force=args.force))
+    _print_summary(docs, settings, time.monotonic() - started)
+    return 1 if any(doc.status == "failed" for doc in docs) else 0
+
+
+def _replay_all(
+    job_ids: list[str], settings: Settings, stages: tuple[str, ...], allow_llm: bool, jobs: int, force: bool
+) -> list[ReplayResult]:
+    async def run() -> list[ReplayResult]:
+        try:
+            return await replay_jobs(
+                job_ids, settings, stages=stages, allow_llm=allow_llm, concurrency=jobs, force=force
+            )
+        finally:
+            shutdown_process_pool()
+
+    return asyncio.run(run())
+
+
+def _replay_command(args: argparse.Namespace, settings: Settings) -> int:
+    stages = tuple(stage.strip() for stage in args.stages.split(",") if stage.strip())
+    unknown = [stage for stage in stages if stage not in REPLAY_STAGES]
+    if not stages or unknown:
+        print(f"error: --stages takes {','.join(REPLAY_STAGES)}", file=sys.stderr)
+        return 2
+    output_dir = Path(args.output_dir).resolve() if args.output_dir else None
+    overrides: dict[str, object] = {}
+    if output_dir is not None:
+        overrides["output_dir"] = str(output_dir / "work")
+        overrides["pipeline_cache_dir"] = str(cache_dir(settings))
+    if args.cache_dir:
+        overrides["pipeline_cache_dir"] = str(Path(args.cache_dir).resolve())
+    settings = settings.model_copy(update=overrides)
+
+    job_ids = args.job_ids or replayable_job_ids(settings)
+    if not job_ids:
+        print("error: no finished jobs to replay", file=sys.stderr)
+        return 2
+    started = time.monotonic()
+    jobs = args.jobs or settings.replay_concurrency
+    results = _replay_all(job_ids, settings, stages, allow_llm=args.allow_llm, jobs=jobs, force=args.force)
+    elapsed = time.monotonic() - started
+
+    for result in results:
+        if result.error:
+            print(f"[failed] {result.job_id}: {result.error}")
+            continue
+        if not result.applied:
+            print(
+                f"[kept] {result.job_id}: {result.cache_misses} translations missing from the cache; "
+                "existing output kept (--allow-llm to translate them, --force to replace anyway)"
+            )
+            continue
+        print(
+            f"[ok] {result.job_id}: {result.pages} pages, {result.untranslated}/{result.blocks} blocks untranslated "
+            f"({result.elapsed_sec:.2f}s)"
+        )
+        if output_dir is not None:
+            # Refresh the exported <name>.md / <name>.pdf written by `translate`.
+            paths = build_job_paths(job_id=result.job_id, settings=settings)
+            stem = Path(load_meta(paths.meta_json).filename).stem
+            if "markdown" in stages:
+                shutil.copyfile(paths.result_md, output_dir / f"{stem}.md")
+            if "pdf" in stages and paths.result_pdf.exists():
+                shutil.copyfile(paths.result_pdf, output_dir / f"{stem}.pdf")
+
+    replayed = [result for result in results if not result.error]
+    kept = sum(1 for result in replayed if not result.applied)
+    caches = get_result_caches(settings)
+    lines = [
+        "",
+        "Summary",
+        f"  jobs             {len(replayed) - kept} replayed, {kept} kept (cache misses), "
+        f"{len(results) - len(replayed)} failed",
+        f"  pages            {sum(result.pages for result in replayed)}",
+        f"  untranslated     {sum(result.untranslated for result in replayed)} of "
+        f"{sum(result.blocks for result in replayed)} blocks",
+        f"  wall time        {elapsed:.1f}s",
+        f"  LLM calls        {counters['llm_calls']}",
+    ]
+    if caches is not None:
+        lines.append(
+            f"  translate cache  {_rate(caches.translation.stats.hits, caches.translation.stats.misses)}"
+        )
+    print("\n".join(lines))
+    return 1 if len(replayed) < len(results) else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    translate = commands.add_parser("translate", help="translate PDF files or directories of PDFs")
+    translate.add_argument("inputs", nargs="+", help="PDF files and/or directories containing PDFs")
+    translate.add_argument("-o", "--output-dir", default="translated", help="where <name>.md files are written")
+    translate.add_argument("-r", "--recursive", action="store_true", help="search directories recursively")
+    translate.add_argument("-j", "--jobs", type=int, default=2, help="documents processed at the same time")
+    translate.add_argument("--ocr-concurrency", type=int, help="OCR requests in flight per document")
+    translate.add_argument("--ocr-batch-size", type=int, help="pages per OCR request")
+    translate.add_argument("--translate-concurrency", type=int, help="translation requests in flight per document")
+    translate.add_argument("--cache-dir", help="OCR/translation cache directory (default: shared with the API)")
+    translate.add_argument("--no-cache", action="store_true", help="do not read or write the result caches")
+    translate.add_argument("--force", action="store_true", help="re-run documents that already have a result")
+    translate.add_argument("--profile", action="store_true", help="write work/jobs/<id>/profile.folded per document")
+
+    replay = commands.add_parser("replay", help="rebuild output of finished jobs from their stored raw OCR")
+    replay.add_argument("job_ids", nargs="*", help="jobs to replay (default: every succeeded job)")
+    replay.add_argument("--stages", default="markdown", help=f"comma-separated, of: {','.join(REPLAY_STAGES)}")
+    replay.add_argument(
+        "--allow-llm", action="store_true", help="translate blocks missing from the cache with the LLM"
+    )
+    replay.add_argument(
+        "--force",
+        action="store_true",
+        help="replace a job's output even if translations are missing from the cache (they become source text)",
+    )
+    replay.add_argument("-o", "--output-dir", help="replay the jobs of `translate -o DIR` and refresh DIR/<name>.md")
+    replay.add_argument("-j", "--jobs", type=int, help="jobs replayed at the same time (default: REPLAY_CONCURRENCY)")
+    replay.add_argument("--cache-dir", help="translation cache directory (default: shared with the API)")
+
+    args = parser.parse_args(argv)
+    setup_logging()
+    if args.command == "translate":
+        return _translate_command(args, settings)
+    if args.command == "replay":
+        return _replay_command(args, settings)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
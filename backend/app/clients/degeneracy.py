@@ -0,0 +1,124 @@
+"""Online detection of degenerate LLM generations (loops, runaway length, prompt echo)."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+LETTER_RE = re.compile(r"[^\W\d_]")
+CODE_CHAR_RE = re.compile(r"[{}()\[\];=<>_\\/|]")
+# Bibliography entries: "[12] A. Author", "12. Author", or anything citing a DOI/arXiv id.
+REFERENCE_RE = re.compile(r"^\s*(?:\[\d+\]|\(\d+\)|\d+\.\s)|\b(?:doi|arxiv|isbn)\b", re.IGNORECASE)
+WHITESPACE_RE = re.compile(r"\s+")
+# Checks run once this many new characters have arrived, not on every token.
+CHECK_EVERY_CHARS = 48
+MAX_LOOP_PERIOD = 200
+MIN_LOOP_SPAN = 48
+ECHO_MIN_CHARS = 40
+
+
+@dataclass(frozen=True)
+class GuardOptions:
+    max_length_ratio: float = 4.0
+    min_length_allowance: int = 200
+    loop_repeats: int = 4
+
+
+class DegradedText(str):
+    """Output returned after every guard retry degenerated (a usable prefix, or
+    the source text). Callers must not cache it as a translation."""
+
+    reason: str = ""
+
+
+class DegenerateOutput(Exception):
+    def __init__(self, reason: str, usable: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        # Output before the degenerate part started; may be empty.
+        self.usable = usable
+
+
+def _normalize(text: str) -> str:
+    return WHITESPACE_RE.sub(" ", text).strip()
+
+
+def _may_come_back_unchanged(text: str) -> bool:
+    """Sources a correct translation can reproduce verbatim: mostly CJK already,
+    mostly non-letters (formulas, numbers), code-like, or a reference entry."""
+    chars = text.replace(" ", "")
+    if not chars:
+        return True
+    if len(CJK_RE.findall(chars)) >= len(chars) * 0.3:
+        return True
+    if len(LETTER_RE.findall(chars)) < len(chars) * 0.6:
+        return True
+    if len(CODE_CHAR_RE.findall(chars)) >= len(chars) * 0.05:
+        return True
+    return REFERENCE_RE.search(text) is not None
+
+
+class DegeneracyDetector:
+    """Fed the output as it streams; `check` raises DegenerateOutput when the
+    generation is looping, far longer than the input allows, or repeating the
+    prompt instead of translating it."""
+
+    def __init__(self, source_text: str, prompt: str, options: GuardOptions | None = None) -> None:
+        self.options = options or GuardOptions()
+        self.source = source_text
+        self.max_chars = max(
+            self.options.min_length_allowance,
+            int(len(source_text) * self.options.max_length_ratio),
+        )
+        # Instruction lines (everything before the source text) must never be reproduced.
+        header = prompt.split(source_text, 1)[0] if source_text and source_text in prompt else prompt
+        self._header_lines = [line.strip() for line in header.splitlines() if len(line.strip()) >= 20]
+        source_norm = _normalize(source_text)
+        # Repeating the source is only treated as echo for prose that must change when translated.
+        self._echo_probe = (
+            source_norm[:ECHO_MIN_CHARS]
+            if len(source_norm) >= ECHO_MIN_CHARS and not _may_come_back_unchanged(source_norm)
+            else ""
+        )
+        self.output = ""
+        self._checked_at = 0
+
+    def feed(self, chunk: str) -> None:
+        self.output += chunk
+        if len(self.output) - self._checked_at >= CHECK_EVERY_CHARS:
+            self.check()
+
+    def check(self) -> None:
+        self._checked_at = len(self.output)
+        text = self.output
+        if len(text) > self.max_chars:
+            raise DegenerateOutput("length", text[: self.max_chars])
+        loop = self._loop_start(text)
+        if loop is not None:
+            raise DegenerateOutput("repetition", text[:loop])
+        for line in self._header_lines:
+            if line in text:
+                raise DegenerateOutput("echo", "")
+        if self._echo_probe and self._echo_probe in _normalize(text):
+            raise DegenerateOutput("echo", "")
+
+    def _loop_start(self, text: str) -> int | None:
+        """Index where a unit repeated `loop_repeats` times at the tail begins
+        (keeping one copy), unless the source itself repeats that unit."""
+        repeats = self.options.loop_repeats
+        for period in range(1, min(MAX_LOOP_PERIOD, len(text) // repeats) + 1):
+            span = period * repeats
+            if span < MIN_LOOP_SPAN:
+                continue
+            unit = text[-period:]
+            if text[-span:] != unit * repeats:
+                continue
+            if not unit.strip() or unit * 2 in self.source:
+                continue
+            start = len(text) - span
+            # Walk back over further copies so only the first one is kept.
+            while start >= period and text[start - period : start] == unit:
+                start -= period
+            return start + period
+        return None
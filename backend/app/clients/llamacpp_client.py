@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from typing import Any
+
+from app.clients.translation_client import HTTPTranslationClient, TranslationClientError
+
+
+class LlamaCppClientError(TranslationClientError):
+    """Raised when a llama.cpp server `/completion` request fails."""
+
+
+class LlamaCppClient(HTTPTranslationClient):
+    error_cls = LlamaCppClientError
+    backend_name = "llama.cpp server"
+
+    @property
+    def generate_url(self) -> str:
+        return f"{self.base_url}/completion"
+
+    @property
+    def health_url(self) -> str:
+        return f"{self.base_url}/health"
+
+    def _build_payload(self, prompt: str, num_predict: int | None, stream: bool) -> dict[str, Any]:
+        return {
+            "prompt": prompt,
+            "temperature": 0.2,
+            "n_predict": num_predict or -1,
+            # Reuse the KV cache of the shared prompt prefix between requests.
+            "cache_prompt": True,
+            "stream": stream,
+        }
+
+    def _adjust_for_retry(self, payload: dict[str, Any], attempt: int) -> dict[str, Any]:
+        payload["temperature"] = min(1.0, round(0.2 + 0.3 * attempt, 2))
+        payload["repeat_penalty"] = round(1.1 + 0.1 * attempt, 2)
+        return payload
+
+    def _extract_text(self, body: dict[str, Any]) -> str:
+        value = body.get("content")
+        return value.strip() if isinstance(value, str) else ""
+
+    def _extract_stream_chunk(self, event: dict[str, Any]) -> str:
+        if "error" in event:
+            raise LlamaCppClientError(f"llama.cpp stream error: {event['error']}")
+        value = event.get("content")
+        return value if isinstance(value, str) else ""
+
+    def _is_stream_done(self, event: dict[str, Any]) -> bool:
+        return bool(event.get("stop"))
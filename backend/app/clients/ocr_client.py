@@ -1,14 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 import base64
+import copy
+import hashlib
 import importlib
+import json
 import mimetypes
+from collections.abc import Callable
 from inspect import iscoroutine
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any
 
 import httpx
 
+from app.clients.streaming import iter_stream_events
+from app.core.metrics import counters
+from app.store.cache import ResultCache, cache_key
+
+PAGE_SEPARATOR = "<<<PAGE_BREAK>>>"
+# Garbled multi-image responses in a row before batching is turned off for good.
+BATCH_MISMATCH_LIMIT = 3
+
 
 class OCRClientError(RuntimeError):
     """Raised when OCR parsing fails."""
@@ -24,6 +37,10 @@ class OCRClient:
         prompt: str | None = None,
         sdk_entrypoint: str | None = None,
         max_tokens: int = 2048,
+        batch_size: int = 1,
+        concurrency: int = 1,
+        cache: ResultCache | None = None,
+        stream: bool = False,
     ) -> None:
         self.base_url = base_url.rstrip("/")
         self.timeout_sec = timeout_sec
@@ -34,15 +51,209 @@ class OCRClient:
         )
         self.sdk_runner = self._load_sdk_runner(sdk_entrypoint)
         self.max_tokens = max(256, max_tokens)
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.cache = cache
+        self.stream = stream
+        self.sdk_entrypoint = sdk_entrypoint
+        # Flipped off when the server rejects a multi-image request (4xx) or
+        # garbles BATCH_MISMATCH_LIMIT of them in a row.
+        self._multi_image_supported = self.batch_size > 1
+        self._batch_mismatches = 0
+
+    def derive(self, max_tokens: int | None = None, concurrency: int | None = None) -> OCRClient:
+        """Return a copy with a different token budget and/or concurrency limit."""
+        derived = copy.copy(self)
+        if max_tokens is not None:
+            derived.max_tokens = max(256, max_tokens)
+        if concurrency is not None:
+            derived.concurrency = max(1, concurrency)
+            derived._semaphore = asyncio.Semaphore(derived.concurrency)
+        return derived
 
     async def parse_image(self, image_path: Path) -> dict[str, Any]:
         if not image_path.exists():
             raise OCRClientError(f"Image not found: {image_path}")
+        if self.cache is None:
+            return await self._parse_uncached(image_path)
+        key = await asyncio.to_thread(self._cache_key, image_path)
+        cached = await self._cache_get(key)
+        if cached is not None:
+            return cached
+        raw = await self._parse_uncached(image_path)
+        await self._cache_put(key, raw)
+        return raw
+
+    def _cache_key(self, image_path: Path) -> str:
+        image_digest = hashlib.sha256(image_path.read_bytes()).hexdigest()
+        return cache_key(
+            "ocr", self.base_url, self.sdk_entrypoint, self.model, self.prompt, self.max_tokens, image_digest
+        )
+
+    async def _cache_get(self, key: str) -> dict[str, Any] | None:
+        assert self.cache is not None
+        data = await asyncio.to_thread(self.cache.get, key)
+        return json.loads(data) if data is not None else None
 
+    async def _cache_put(self, key: str, raw: dict[str, Any]) -> None:
+        assert self.cache is not None
+        await asyncio.to_thread(self.cache.put, key, json.dumps(raw, ensure_ascii=False).encode("utf-8"))
+
+    async def _parse_uncached(self, image_path: Path) -> dict[str, Any]:
+        counters["ocr_requests"] += 1
         if self.sdk_runner is not None:
             return await self._parse_with_sdk(image_path)
         return await self._parse_with_http(image_path)
 
+    async def parse_images(
+        self,
+        image_paths: list[Path],
+        on_text: Callable[[int, str], None] | None = None,
+    ) -> list[dict[str, Any]]:
+        """OCR several pages, returning one raw result per image in input order.
+
+        With `batch_size > 1` pages are grouped into multi-image chat requests;
+        groups (or single images) run concurrently up to `concurrency`. If the
+        server cannot handle a multi-image request the group is transparently
+        re-sent one image at a time. Pages found in the result cache are not
+        sent at all.
+
+        With `stream` enabled and an `on_text` callback, pages are requested one
+        per streamed request and `on_text(index, delta)` receives the generated
+        text as it arrives. Cached pages are not reported through `on_text`.
+        """
+        for image_path in image_paths:
+            if not image_path.exists():
+                raise OCRClientError(f"Image not found: {image_path}")
+
+        keys: list[str] = []
+        results: list[dict[str, Any] | None] = [None] * len(image_paths)
+        if self.cache is not None:
+            keys = await asyncio.to_thread(lambda: [self._cache_key(path) for path in image_paths])
+            results = list(await asyncio.gather(*(self._cache_get(key) for key in keys)))
+        missing = [index for index, raw in enumerate(results) if raw is None]
+        if missing:
+            for index, raw in zip(missing, await self._parse_missing(image_paths, missing, on_text), strict=True):
+                results[index] = raw
+                if self.cache is not None:
+                    await self._cache_put(keys[index], raw)
+        return [raw for raw in results if raw is not None]
+
+    async def _parse_missing(
+        self,
+        image_paths: list[Path],
+        missing: list[int],
+        on_text: Callable[[int, str], None] | None,
+    ) -> list[dict[str, Any]]:
+        if on_text is not None and self._can_stream():
+
+            async def streamed(index: int) -> dict[str, Any]:
+                async with self._semaphore:
+                    return await self._stream_with_http(image_paths[index], lambda delta: on_text(index, delta))
+
+            return list(await asyncio.gather(*(streamed(index) for index in missing)))
+
+        size = self.batch_size if self._can_batch() else 1
+        todo = [image_paths[index] for index in missing]
+        groups = [todo[i : i + size] for i in range(0, len(todo), size)]
+        parsed = await asyncio.gather(*(self._parse_group(group) for group in groups))
+        return [raw for group_result in parsed for raw in group_result]
+
+    def _can_stream(self) -> bool:
+        return (
+            self.stream
+            and self.sdk_runner is None
+            and any("chat/completions" in path.lower() for path in self.parse_paths)
+        )
+
+    def _can_batch(self) -> bool:
+        return (
+            self._multi_image_supported
+            and self.sdk_runner is None
+            and any("chat/completions" in path.lower() for path in self.parse_paths)
+        )
+
+    async def _parse_group(self, image_paths: list[Path]) -> list[dict[str, Any]]:
+        if len(image_paths) > 1 and self._can_batch():
+            async with self._semaphore:
+                raws, rejected = await self._parse_batch_with_http(image_paths)
+            if raws is not None:
+                self._batch_mismatches = 0
+                return raws
+            if not rejected:
+                self._batch_mismatches += 1
+            if rejected or self._batch_mismatches >= BATCH_MISMATCH_LIMIT:
+                self._multi_image_supported = False
+            # This group is retried page by page either way.
+        return list(await asyncio.gather(*(self._parse_one(image_path) for image_path in image_paths)))
+
+    async def _parse_one(self, image_path: Path) -> dict[str, Any]:
+        async with self._semaphore:
+            return await self._parse_uncached(image_path)
+
+    async def _parse_batch_with_http(
+        self, image_paths: list[Path]
+    ) -> tuple[list[dict[str, Any]] | None, bool]:
+        """Per-page results, or None and whether the server rejected the request (4xx)."""
+        counters["ocr_requests"] += 1
+        paths = [path for path in self.parse_paths if "chat/completions" in path.lower()]
+        rejected = False
+        if not paths:
+            return None, rejected
+        payload = await asyncio.to_thread(self._build_chat_completions_payload, image_paths)
+        async with httpx.AsyncClient(timeout=self.timeout_sec * len(image_paths)) as client:
+            for path in paths:
+                url = f"{self.base_url}{path}"
+                try:
+                    response = await client.post(url, json=payload)
+                except httpx.HTTPError:
+                    continue
+                if response.status_code >= 400:
+                    rejected = rejected or response.status_code < 500
+                    continue
+                try:
+                    data = response.json()
+                except ValueError:
+                    return None, False
+                if isinstance(data, dict):
+                    return self._split_batch_response(data, expected=len(image_paths)), False
+                return None, False
+        return None, rejected
+
+    @staticmethod
+    def _split_batch_response(data: dict[str, Any], expected: int) -> list[dict[str, Any]] | None:
+        choices = data.get("choices")
+        if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+            return None
+        message = choices[0].get("message")
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, str):
+            return None
+        parts = [part.strip() for part in content.split(PAGE_SEPARATOR)]
+        if parts and not parts[-1]:
+            parts.pop()
+        if len(parts) != expected:
+            return None
+        # Each page gets a response shaped like a single-image completion so
+        # normalize_ocr_result handles it the same way. Only the last page can have
+        # been cut off, so the batch's finish_reason ("length") stays on it alone.
+        last = len(parts) - 1
+        return [
+            {
+                **data,
+                "choices": [
+                    {
+                        **choices[0],
+                        "message": {**message, "content": part},
+                        "finish_reason": choices[0].get("finish_reason") if index == last else "stop",
+                    }
+                ],
+                "batch_size": expected,
+            }
+            for index, part in enumerate(parts)
+        ]
+
     async def _parse_with_sdk(self, image_path: Path) -> dict[str, Any]:
         assert self.sdk_runner is not None
         result = self.sdk_runner(image_path=image_path, base_url=self.base_url)
@@ -52,6 +263,69 @@ class OCRClient:
             raise OCRClientError("SDK OCR result must be a JSON object.")
         return result
 
+    async def _stream_with_http(self, image_path: Path, on_delta: Callable[[str], None]) -> dict[str, Any]:
+        """One image via a streamed (SSE) chat completion, reassembled into the
+        shape of a non-streamed response so normalization is unchanged."""
+        counters["ocr_requests"] += 1
+        payload = await asyncio.to_thread(self._build_chat_completions_payload, image_path)
+        payload["stream"] = True
+        errors: list[str] = []
+        async with httpx.AsyncClient(timeout=self.timeout_sec) as client:
+            for path in self.parse_paths:
+                if "chat/completions" not in path.lower():
+                    continue
+                url = f"{self.base_url}{path}"
+                parts: list[str] = []
+                finish_reason: str | None = None
+                try:
+                    async with client.stream("POST", url, json=payload) as response:
+                        if response.status_code >= 400:
+                            errors.append(f"{url}: status={response.status_code}")
+                            continue
+                        if response.headers.get("content-type", "").startswith("application/json"):
+                            # Server ignored `stream`; treat the body as a complete response.
+                            data = json.loads(await response.aread())
+                            if not isinstance(data, dict):
+                                raise OCRClientError("OCR response JSON must be an object.")
+                            choices = data.get("choices")
+                            first = choices[0] if isinstance(choices, list) and choices else None
+                            message = first.get("message") if isinstance(first, dict) else None
+                            content = message.get("content") if isinstance(message, dict) else None
+                            if isinstance(content, str):
+                                on_delta(content)
+                            return data
+                        async for event in iter_stream_events(response, OCRClientError):
+                            choices = event.get("choices")
+                            if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+                                continue
+                            delta = choices[0].get("delta")
+                            text = delta.get("content") if isinstance(delta, dict) else None
+                            if isinstance(text, str) and text:
+                                parts.append(text)
+                                on_delta(text)
+                            finish_reason = choices[0].get("finish_reason") or finish_reason
+                except httpx.HTTPError as exc:
+                    if parts:
+                        raise OCRClientError(f"OCR stream from {url} broke off: {exc.__class__.__name__}") from exc
+                    errors.append(f"{url}: {exc.__class__.__name__}")
+                    continue
+                except ValueError as exc:
+                    raise OCRClientError(f"OCR response is not valid JSON: {exc}") from exc
+                return {
+                    "model": self.model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(parts)},
+                            "finish_reason": finish_reason,
+                        }
+                    ],
+                    "stream": True,
+                }
+
+        joined = "; ".join(errors) if errors else "unknown error"
+        raise OCRClientError(f"Failed to stream image via OCR server: {joined}")
+
     async def _parse_with_http(self, image_path: Path) -> dict[str, Any]:
         errors: list[str] = []
         async with httpx.AsyncClient(timeout=self.timeout_sec) as client:
@@ -88,29 +362,35 @@ class OCRClient:
     ) -> httpx.Response:
         normalized = path.lower()
         if "chat/completions" in normalized:
-            payload = self._build_chat_completions_payload(image_path)
+            # Reading and base64-encoding page images is blocking; build the payload in a thread.
+            payload = await asyncio.to_thread(self._build_chat_completions_payload, image_path)
             return await client.post(url, json=payload)
 
         mime = self._guess_mime_type(image_path)
-        with image_path.open("rb") as f:
-            return await client.post(
-                url,
-                files={"file": (image_path.name, f, mime)},
-            )
+        image_bytes = await asyncio.to_thread(image_path.read_bytes)
+        return await client.post(
+            url,
+            files={"file": (image_path.name, image_bytes, mime)},
+        )
 
-    def _build_chat_completions_payload(self, image_path: Path) -> dict[str, Any]:
-        data_url = self._to_data_url(image_path)
+    def _build_chat_completions_payload(self, image_paths: Path | list[Path]) -> dict[str, Any]:
+        if isinstance(image_paths, Path):
+            image_paths = [image_paths]
+        prompt = self.prompt
+        if len(image_paths) > 1:
+            prompt = (
+                f"{self.prompt}\n\n{len(image_paths)} images are given, one per page. "
+                "Output the result for each image in order, separated by a line containing only "
+                f"{PAGE_SEPARATOR}"
+            )
+        content: list[dict[str, Any]] = [{"type": "text", "text": prompt}]
+        content.extend(
+            {"type": "image_url", "image_url": {"url": self._to_data_url(image_path)}}
+            for image_path in image_paths
+        )
         payload: dict[str, Any] = {
-            "messages": [
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": self.prompt},
-                        {"type": "image_url", "image_url": {"url": data_url}},
-                    ],
-                }
-            ],
-            "max_tokens": self.max_tokens,
+            "messages": [{"role": "user", "content": content}],
+            "max_tokens": self.max_tokens * len(image_paths),
             "temperature": 0.1,
         }
         if self.model:
@@ -2,54 +2,84 @@ from __future__ import annotations
 
 from typing import Any
 
-import httpx
+from app.clients.translation_client import HTTPTranslationClient, TranslationClientError
 
 
-class OllamaClientError(RuntimeError):
+class OllamaClientError(TranslationClientError):
     """Raised when the Ollama API request fails."""
 
 
-class OllamaClient:
-    def __init__(self, base_url: str, model: str, timeout_sec: float = 120.0) -> None:
-        self.base_url = base_url.rstrip("/")
-        self.model = model
-        self.timeout_sec = timeout_sec
+class OllamaClient(HTTPTranslationClient):
+    error_cls = OllamaClientError
+    backend_name = "Ollama"
 
-    async def generate(self, prompt: str) -> str:
-        url = f"{self.base_url}/api/generate"
-        payload = {
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        timeout_sec: float = 120.0,
+        keep_alive: str | None = None,
+        num_ctx: int | None = None,
+        num_thread: int | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(base_url=base_url, model=model, timeout_sec=timeout_sec, **kwargs)
+        self.keep_alive = keep_alive
+        self.num_ctx = num_ctx
+        self.num_thread = num_thread
+
+    @property
+    def generate_url(self) -> str:
+        return f"{self.base_url}/api/generate"
+
+    @property
+    def health_url(self) -> str:
+        return f"{self.base_url}/api/tags"
+
+    def _build_options(self, num_predict: int | None) -> dict[str, Any]:
+        options: dict[str, Any] = {"temperature": 0.2}
+        if self.num_ctx:
+            options["num_ctx"] = self.num_ctx
+        if self.num_thread:
+            options["num_thread"] = self.num_thread
+        if num_predict:
+            options["num_predict"] = num_predict
+        return options
+
+    def _build_payload(self, prompt: str, num_predict: int | None, stream: bool) -> dict[str, Any]:
+        payload: dict[str, Any] = {
             "model": self.model,
             "prompt": prompt,
-            "stream": False,
-            "options": {
-                "temperature": 0.2,
-            },
+            "stream": stream,
+            "options": self._build_options(num_predict),
         }
+        if self.keep_alive:
+            payload["keep_alive"] = self.keep_alive
+        return payload
 
-        try:
-            async with httpx.AsyncClient(timeout=self.timeout_sec) as client:
-                response = await client.post(url, json=payload)
-        except httpx.HTTPError as exc:
-            raise OllamaClientError(f"Ollama request failed: {exc.__class__.__name__}") from exc
+    def _adjust_for_retry(self, payload: dict[str, Any], attempt: int) -> dict[str, Any]:
+        payload["options"]["temperature"] = min(1.0, round(0.2 + 0.3 * attempt, 2))
+        payload["options"]["repeat_penalty"] = round(1.1 + 0.1 * attempt, 2)
+        return payload
 
-        if response.status_code >= 400:
-            raise OllamaClientError(f"Ollama returned status {response.status_code}: {response.text[:400]}")
+    async def warm_up(self) -> None:
+        # An empty prompt makes Ollama load the model with the same num_ctx /
+        # num_thread as real requests (so it is not reloaded) and apply keep_alive.
+        async with self._semaphore:
+            await self._post(self._build_payload("", num_predict=None, stream=False))
 
-        try:
-            body = response.json()
-        except ValueError as exc:
-            raise OllamaClientError(f"Ollama response is not JSON: {exc}") from exc
-
-        text = self._extract_text(body)
-        if not text:
-            raise OllamaClientError("Ollama response did not contain translation text.")
-        return text
-
-    @staticmethod
-    def _extract_text(body: dict[str, Any]) -> str:
+    def _extract_text(self, body: dict[str, Any]) -> str:
         for key in ("response", "text", "output"):
             value = body.get(key)
             if isinstance(value, str):
                 return value.strip()
         return ""
 
+    def _extract_stream_chunk(self, event: dict[str, Any]) -> str:
+        if "error" in event:
+            raise OllamaClientError(f"Ollama stream error: {event['error']}")
+        value = event.get("response")
+        return value if isinstance(value, str) else ""
+
+    def _is_stream_done(self, event: dict[str, Any]) -> bool:
+        return bool(event.get("done"))
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from typing import Any
+
+from app.clients.translation_client import HTTPTranslationClient, TranslationClientError
+
+
+class OpenAICompatibleClientError(TranslationClientError):
+    """Raised when an OpenAI-compatible chat completions request fails."""
+
+
+class OpenAICompatibleClient(HTTPTranslationClient):
+    """`/v1/chat/completions` backend (vLLM, llama.cpp server, LM Studio, ...)."""
+
+    error_cls = OpenAICompatibleClientError
+    backend_name = "OpenAI-compatible server"
+
+    def __init__(self, base_url: str, model: str, api_key: str | None = None, **kwargs: Any) -> None:
+        super().__init__(base_url=base_url, model=model, **kwargs)
+        self.api_key = api_key
+
+    @property
+    def generate_url(self) -> str:
+        return f"{self.base_url}/v1/chat/completions"
+
+    @property
+    def health_url(self) -> str:
+        return f"{self.base_url}/v1/models"
+
+    def _headers(self) -> dict[str, str]:
+        if not self.api_key:
+            return {}
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def _build_payload(self, prompt: str, num_predict: int | None, stream: bool) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.2,
+            "stream": stream,
+        }
+        if num_predict:
+            payload["max_tokens"] = num_predict
+        return payload
+
+    def _adjust_for_retry(self, payload: dict[str, Any], attempt: int) -> dict[str, Any]:
+        payload["temperature"] = min(1.0, round(0.2 + 0.3 * attempt, 2))
+        payload["frequency_penalty"] = min(1.0, round(0.4 * attempt, 2))
+        return payload
+
+    def _extract_text(self, body: dict[str, Any]) -> str:
+        choices = body.get("choices")
+        if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+            return ""
+        message = choices[0].get("message")
+        if isinstance(message, dict) and isinstance(message.get("content"), str):
+            return message["content"].strip()
+        text = choices[0].get("text")
+        return text.strip() if isinstance(text, str) else ""
+
+    def _extract_stream_chunk(self, event: dict[str, Any]) -> str:
+        if "error" in event:
+            raise OpenAICompatibleClientError(f"OpenAI-compatible stream error: {event['error']}")
+        choices = event.get("choices")
+        if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+            return ""
+        delta = choices[0].get("delta")
+        if isinstance(delta, dict) and isinstance(delta.get("content"), str):
+            return delta["content"]
+        return ""
+
+    def _is_stream_done(self, event: dict[str, Any]) -> bool:
+        choices = event.get("choices")
+        if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+            return False
+        return choices[0].get("finish_reason") is not None
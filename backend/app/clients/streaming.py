@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncIterator, Callable
+from typing import Any
+
+import httpx
+
+
+async def iter_stream_events(
+    response: httpx.Response,
+    error_cls: Callable[[str], Exception],
+) -> AsyncIterator[dict[str, Any]]:
+    """Yield JSON events from an NDJSON or SSE (`data: ...`) response body."""
+    async for line in response.aiter_lines():
+        data = line.strip()
+        if not data or data.startswith(":"):
+            continue
+        if data.startswith("data:"):
+            data = data[len("data:") :].strip()
+        elif data.startswith(("event:", "id:", "retry:")):
+            continue
+        if data == "[DONE]":
+            return
+        try:
+            event = json.loads(data)
+        except ValueError as exc:
+            raise error_cls(f"Streamed event is not JSON: {exc}") from exc
+        if isinstance(event, dict):
+            yield event
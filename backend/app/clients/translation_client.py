@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from typing import Any, Protocol
+
+import httpx
+
+from app.clients.degeneracy import DegeneracyDetector, DegenerateOutput, DegradedText, GuardOptions
+from app.clients.streaming import iter_stream_events
+from app.core.config import Settings
+from app.core.metrics import counters, record_degenerate
+from app.store.cache import ResultCache, cache_key, get_result_caches
+
+logger = logging.getLogger(__name__)
+
+# Added to token-sized output caps so short inputs (titles, captions) are not cut off.
+NUM_PREDICT_HEADROOM_TOKENS = 32
+
+
+class TranslationClientError(RuntimeError):
+    """Raised when a translation backend request fails."""
+
+
+class TranslationClient(Protocol):
+    model: str
+
+    @property
+    def health_url(self) -> str: ...
+
+    def num_predict_for(self, source_text: str, source_tokens: int | None = None) -> int | None: ...
+
+    async def generate(self, prompt: str, num_predict: int | None = None, source_text: str | None = None) -> str: ...
+
+    async def warm_up(self) -> None: ...
+
+
+class HTTPTranslationClient:
+    """Shared request plumbing for HTTP translation backends.
+
+    Subclasses build the backend-specific payload and pull text out of the
+    (streamed or complete) response body.
+    """
+
+    error_cls: type[TranslationClientError] = TranslationClientError
+    backend_name = "Translation backend"
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        timeout_sec: float = 120.0,
+        num_predict_ratio: float = 0.0,
+        num_predict_min: int = 128,
+        num_predict_max: int = 4096,
+        num_predict_token_ratio: float = 0.0,
+        stream: bool = False,
+        max_concurrency: int = 1,
+        guard: GuardOptions | None = None,
+        guard_retries: int = 1,
+    ) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.timeout_sec = timeout_sec
+        self.num_predict_ratio = num_predict_ratio
+        self.num_predict_min = max(1, num_predict_min)
+        self.num_predict_max = max(self.num_predict_min, num_predict_max)
+        self.num_predict_token_ratio = num_predict_token_ratio
+        self.stream = stream
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.guard = guard
+        self.guard_retries = max(0, guard_retries)
+
+    @property
+    def generate_url(self) -> str:
+        raise NotImplementedError
+
+    @property
+    def health_url(self) -> str:
+        raise NotImplementedError
+
+    def num_predict_for(self, source_text: str, source_tokens: int | None = None) -> int | None:
+        """Output cap: input tokens times the token ratio when the caller counted
+        them, otherwise characters times the character ratio."""
+        if source_tokens is not None and self.num_predict_token_ratio > 0:
+            estimate = math.ceil(source_tokens * self.num_predict_token_ratio) + NUM_PREDICT_HEADROOM_TOKENS
+        elif self.num_predict_ratio > 0:
+            estimate = int(len(source_text) * self.num_predict_ratio)
+        else:
+            return None
+        return max(self.num_predict_min, min(self.num_predict_max, estimate))
+
+    def _build_payload(self, prompt: str, num_predict: int | None, stream: bool) -> dict[str, Any]:
+        raise NotImplementedError
+
+    def _extract_text(self, body: dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    def _extract_stream_chunk(self, event: dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    def _is_stream_done(self, event: dict[str, Any]) -> bool:
+        return False
+
+    def _headers(self) -> dict[str, str]:
+        return {}
+
+    def _adjust_for_retry(self, payload: dict[str, Any], attempt: int) -> dict[str, Any]:
+        """Sampling changes for re-running a degenerate generation (attempt >= 1)."""
+        return payload
+
+    async def generate(self, prompt: str, num_predict: int | None = None, source_text: str | None = None) -> str:
+        """Generate a completion for `prompt`.
+
+        When `source_text` is given and the guard is enabled, the output is
+        checked while it arrives (see `app.clients.degeneracy`). A degenerate
+        generation is aborted and retried with adjusted sampling up to
+        `guard_retries` times; after that the usable prefix, or the source text
+        when there is none, is returned as a `DegradedText`.
+        """
+        attempt = 0
+        async with self._semaphore:
+            while True:
+                counters["llm_calls"] += 1
+                detector = (
+                    DegeneracyDetector(source_text, prompt, self.guard) if self.guard and source_text else None
+                )
+                started = time.monotonic()
+                try:
+                    text = await self._generate_once(prompt, num_predict, detector, attempt)
+                    break
+                except DegenerateOutput as exc:
+                    wasted = time.monotonic() - started
+                    record_degenerate(exc.reason, wasted)
+                    logger.warning(
+                        "%s generation degenerated (%s) after %.1fs, attempt %d",
+                        self.backend_name,
+                        exc.reason,
+                        wasted,
+                        attempt + 1,
+                    )
+                    if attempt >= self.guard_retries:
+                        text = DegradedText(exc.usable.strip() or source_text or "")
+                        text.reason = exc.reason
+                        break
+                    attempt += 1
+        if not text:
+            raise self.error_cls(f"{self.backend_name} response did not contain translation text.")
+        return text
+
+    async def _generate_once(
+        self,
+        prompt: str,
+        num_predict: int | None,
+        detector: DegeneracyDetector | None,
+        attempt: int,
+    ) -> str:
+        payload = self._build_payload(prompt, num_predict, stream=self.stream)
+        if attempt:
+            payload = self._adjust_for_retry(payload, attempt)
+        if self.stream:
+            parts: list[str] = []
+            # aclosing: leaving the loop early (degenerate output) closes the
+            # connection, which makes the server stop generating.
+            async with aclosing(self._stream(payload)) as chunks:
+                async for chunk in chunks:
+                    parts.append(chunk)
+                    if detector is not None:
+                        detector.feed(chunk)
+            text = "".join(parts).strip()
+        else:
+            text = self._extract_text(await self._post(payload))
+            if detector is not None:
+                detector.feed(text)
+        if detector is not None:
+            detector.check()
+        return text
+
+    async def warm_up(self) -> None:
+        async with self._semaphore:
+            await self._post(self._build_payload("", num_predict=1, stream=False))
+
+    async def _post(self, payload: dict[str, Any]) -> dict[str, Any]:
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout_sec) as client:
+                response = await client.post(self.generate_url, json=payload, headers=self._headers())
+        except httpx.HTTPError as exc:
+            raise self.error_cls(f"{self.backend_name} request failed: {exc.__class__.__name__}") from exc
+
+        if response.status_code >= 400:
+            raise self.error_cls(
+                f"{self.backend_name} returned status {response.status_code}: {response.text[:400]}"
+            )
+
+        try:
+            body = response.json()
+        except ValueError as exc:
+            raise self.error_cls(f"{self.backend_name} response is not JSON: {exc}") from exc
+        if not isinstance(body, dict):
+            raise self.error_cls(f"{self.backend_name} response JSON must be an object.")
+        return body
+
+    async def _stream(self, payload: dict[str, Any]) -> AsyncIterator[str]:
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout_sec) as client:
+                async with client.stream(
+                    "POST", self.generate_url, json=payload, headers=self._headers()
+                ) as response:
+                    if response.status_code >= 400:
+                        detail = (await response.aread()).decode("utf-8", errors="replace")
+                        raise self.error_cls(
+                            f"{self.backend_name} returned status {response.status_code}: {detail[:400]}"
+                        )
+                    async for event in iter_stream_events(response, self.error_cls):
+                        chunk = self._extract_stream_chunk(event)
+                        if chunk:
+                            yield chunk
+                        if self._is_stream_done(event):
+                            break
+        except httpx.HTTPError as exc:
+            raise self.error_cls(f"{self.backend_name} request failed: {exc.__class__.__name__}") from exc
+
+
+class CachingTranslationClient:
+    """Wraps a TranslationClient and memoizes `generate` by (model, prompt, num_predict)."""
+
+    def __init__(self, inner: TranslationClient, cache: ResultCache, namespace: str) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.namespace = namespace
+        self.model = inner.model
+
+    @property
+    def health_url(self) -> str:
+        return self.inner.health_url
+
+    def num_predict_for(self, source_text: str, source_tokens: int | None = None) -> int | None:
+        return self.inner.num_predict_for(source_text, source_tokens)
+
+    async def generate(self, prompt: str, num_predict: int | None = None, source_text: str | None = None) -> str:
+        key = cache_key("translate", self.namespace, self.model, num_predict, prompt)
+        cached = await asyncio.to_thread(self.cache.get, key)
+        if cached is not None:
+            return cached.decode("utf-8")
+        text = await self.inner.generate(prompt, num_predict=num_predict, source_text=source_text)
+        # A degraded result is a stand-in; the next run should try the generation again.
+        if not isinstance(text, DegradedText):
+            await asyncio.to_thread(self.cache.put, key, text.encode("utf-8"))
+        return text
+
+    async def warm_up(self) -> None:
+        await self.inner.warm_up()
+
+
+def build_translation_client(
+    settings: Settings,
+    wrap_backend: Callable[[TranslationClient], TranslationClient] | None = None,
+) -> TranslationClient:
+    """Backend client for TRANSLATE_BACKEND behind the result cache.
+
+    `wrap_backend` is applied inside the cache, so cached prompts bypass it
+    (e.g. a per-job budget only pays for real generations)."""
+    client = _build_backend_client(settings)
+    if wrap_backend is not None:
+        client = wrap_backend(client)
+    caches = get_result_caches(settings)
+    if caches is None:
+        return client
+    return CachingTranslationClient(client, caches.translation, namespace=settings.translate_backend.strip().lower())
+
+
+def _build_backend_client(settings: Settings) -> TranslationClient:
+    from app.clients.llamacpp_client import LlamaCppClient
+    from app.clients.ollama_client import OllamaClient
+    from app.clients.openai_client import OpenAICompatibleClient
+
+    backend = settings.translate_backend.strip().lower()
+    common: dict[str, Any] = {
+        "timeout_sec": settings.ollama_timeout_sec,
+        "num_predict_ratio": settings.ollama_num_predict_ratio,
+        "num_predict_min": settings.ollama_num_predict_min,
+        "num_predict_max": settings.ollama_num_predict_max,
+        "num_predict_token_ratio": settings.translate_output_token_ratio,
+        "stream": settings.translate_stream,
+        "max_concurrency": settings.translate_concurrency,
+        "guard": (
+            GuardOptions(
+                max_length_ratio=settings.translate_guard_max_length_ratio,
+                loop_repeats=settings.translate_guard_loop_repeats,
+            )
+            if settings.translate_guard_enabled
+            else None
+        ),
+        "guard_retries": settings.translate_guard_retries,
+    }
+    if backend == "ollama":
+        return OllamaClient(
+            base_url=settings.ollama_base_url,
+            model=settings.ollama_model,
+            keep_alive=settings.ollama_keep_alive,
+            num_ctx=settings.ollama_num_ctx,
+            num_thread=settings.ollama_num_thread,
+            **common,
+        )
+    if backend in {"openai", "vllm"}:
+        return OpenAICompatibleClient(
+            base_url=settings.translate_base_url,
+            model=settings.translate_model or settings.ollama_model,
+            api_key=settings.translate_api_key,
+            **common,
+        )
+    if backend in {"llamacpp", "llama.cpp"}:
+        return LlamaCppClient(
+            base_url=settings.translate_base_url,
+            model=settings.translate_model or settings.ollama_model,
+            **common,
+        )
+    raise TranslationClientError(
+        f"Unknown TRANSLATE_BACKEND: {settings.translate_backend!r} (expected ollama, openai or llamacpp)."
+    )
@@ -18,12 +18,84 @@ class Settings(BaseSettings):
     ocr_max_tokens: int = 2048
     ocr_timeout_sec: float = 180.0
     ocr_sdk_entrypoint: str | None = None
+    ocr_batch_size: int = 1
+    ocr_concurrency: int = 1
+    ocr_stream: bool = False
+    ocr_tile_mode: str = "off"
+    ocr_tile_layout: str = "detect"
+    ocr_tile_count: int = 2
+    ocr_tile_max_tokens: int = 1024
+    ocr_tile_concurrency: int = 2
     ollama_base_url: str = "http://127.0.0.1:11434"
     ollama_model: str = "translategemma:12b-it-q4_K_M"
     ollama_timeout_sec: float = 120.0
+    ollama_keep_alive: str = "30m"
+    ollama_num_ctx: int | None = None
+    ollama_num_thread: int | None = None
+    ollama_num_predict_ratio: float = 1.5
+    ollama_num_predict_min: int = 128
+    ollama_num_predict_max: int = 4096
+    ollama_warmup_enabled: bool = True
+    reading_order_engine: str = "columns"
+    translate_backend: str = "ollama"
+    translate_base_url: str = "http://127.0.0.1:8001"
+    translate_model: str | None = None
+    translate_api_key: str | None = None
+    translate_stream: bool = False
+    translate_concurrency: int = 1
     translate_max_chars: int = 1400
+    translate_chunk_tokens: int = 600
+    translate_tokenizer: str = "heuristic"
+    translate_output_token_ratio: float = 1.6
+    translate_glossary_enabled: bool = True
+    translate_stitch_enabled: bool = True
+    translate_speculative: bool = False
+    translate_guard_enabled: bool = True
+    translate_guard_max_length_ratio: float = 4.0
+    translate_guard_loop_repeats: int = 4
+    translate_guard_retries: int = 1
+    translate_glossary_max_terms: int = 40
     render_dpi: int = 350
+    render_dpi_mode: str = "fixed"
+    render_target_pixels: int = 2_500_000
+    render_min_dpi: int = 100
+    render_max_dpi: int = 600
+    render_min_font_px: float = 20.0
+    render_executor: str = "process"
+    render_processes: int = 2
+    pdf_output_enabled: bool = False
+    pdf_output_font: str = "japan"
     output_dir: str = "outputs"
+    artifact_pretty_json: bool = False
+    artifact_compression: str = "none"
+    artifact_page_images: str = "keep"
+    artifact_retention_max_bytes: int | None = None
+    artifact_retention_max_age_hours: float | None = None
+    artifact_gc_interval_sec: float = 3600.0
+    job_runner: str = "queue"
+    job_queue_path: str | None = None
+    worker_concurrency: int = 2
+    worker_lease_sec: float = 60.0
+    worker_heartbeat_sec: float = 15.0
+    worker_poll_interval_sec: float = 1.0
+    worker_max_attempts: int = 3
+    job_budget_ocr_share: float = 0.5
+    queue_policy: str = "sjf"
+    queue_aging_sec_per_page: float = 30.0
+    queue_sec_per_page_estimate: float = 20.0
+    pipeline_ocr_slots: int = 1
+    pipeline_translate_slots: int = 1
+    batch_max_files: int = 200
+    replay_concurrency: int = 8
+    pipeline_cache_enabled: bool = True
+    pipeline_cache_dir: str | None = None
+    api_markdown_cache_bytes: int = 32 * 1024 * 1024
+    api_compress_min_bytes: int = 1024
+    profile_jobs: bool = False
+    profile_interval_sec: float = 0.005
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval_sec: float = 0.25
+    loop_lag_threshold_ms: float = 100.0
     http_timeout_sec: float = 5.0
 
     model_config = SettingsConfigDict(
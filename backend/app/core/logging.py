@@ -1,4 +1,10 @@
 import logging
+from datetime import UTC, datetime
+
+from app.utils.jsonio import dumps
+
+# LogRecord attributes that are not user-supplied `extra` fields.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
 
 
 def setup_logging() -> None:
@@ -7,3 +13,19 @@ def setup_logging() -> None:
         format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
     )
 
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record; `extra={...}` fields become top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, object] = {
+            "ts": datetime.fromtimestamp(record.created, UTC).isoformat(),
+            "level": record.levelname.lower(),
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return dumps(entry).decode("utf-8")
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+logger = logging.getLogger(__name__)
+
+RECENT_STALLS = 20
+
+
+@dataclass
+class LoopLagStats:
+    checks: int = 0
+    stalls: int = 0
+    max_lag_ms: float = 0.0
+    recent: deque[tuple[str, float]] = field(default_factory=lambda: deque(maxlen=RECENT_STALLS))
+
+    def snapshot(self) -> dict[str, object]:
+        return {
+            "checks": self.checks,
+            "stalls": self.stalls,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "recent": [{"at": at, "lag_ms": round(lag, 1)} for at, lag in self.recent],
+        }
+
+
+loop_lag_stats = LoopLagStats()
+
+
+async def monitor_event_loop(interval_sec: float, threshold_ms: float, stats: LoopLagStats | None = None) -> None:
+    """Sleep `interval_sec` repeatedly; any extra delay is time the loop spent blocked."""
+    stats = stats or loop_lag_stats
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval_sec)
+        lag_ms = (time.perf_counter() - started - interval_sec) * 1000.0
+        stats.checks += 1
+        stats.max_lag_ms = max(stats.max_lag_ms, lag_ms)
+        if lag_ms >= threshold_ms:
+            stats.stalls += 1
+            stats.recent.append((datetime.now(UTC).isoformat(), lag_ms))
+            logger.warning("Event loop stalled for %.0f ms", lag_ms)
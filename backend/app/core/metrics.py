@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+# Process-wide call counters ("llm_calls", "ocr_requests", ...), read by the CLI
+# summary and /health.
+counters: Counter[str] = Counter()
+
+
+@dataclass
+class GenerationStats:
+    """Degenerate generations seen while one job runs."""
+
+    degenerate: int = 0
+    wasted_sec: float = 0.0
+    reasons: Counter[str] = field(default_factory=Counter)
+
+
+# Set by run_job; tasks it spawns (speculative translations, gathers) inherit it.
+job_generation_stats: ContextVar[GenerationStats | None] = ContextVar("job_generation_stats", default=None)
+
+
+def record_degenerate(reason: str, wasted_sec: float) -> None:
+    counters["degenerate_generations"] += 1
+    counters[f"degenerate_{reason}"] += 1
+    counters["degenerate_wasted_ms"] += int(wasted_sec * 1000)
+    stats = job_generation_stats.get()
+    if stats is not None:
+        stats.degenerate += 1
+        stats.wasted_sec += wasted_sec
+        stats.reasons[reason] += 1
@@ -0,0 +1,157 @@
+"""Opt-in sampling profiles of `run_job` (PROFILE_JOBS, or `profile` on POST /jobs).
+
+Profiles are written as folded stacks, one `frame;frame;...;leaf <microseconds>`
+line per distinct stack, which flamegraph.pl, inferno and speedscope read as is.
+
+With pyinstrument installed (`uv sync --extra profile`) only the job's task and
+the tasks it starts are sampled, and time spent awaiting (OCR/LLM requests,
+executors, stage slots) is recorded as `[await]` leaves under the awaiting
+coroutine. Without it a stdlib sampler thread records the event loop thread,
+so other jobs running in the same process are included. Either way, time the
+loop sits idle in the selector is folded into one `[event loop wait]` leaf.
+pyinstrument allows one async-mode session per thread, so when jobs overlap in
+one process only the first uses it and the others fall back to the sampler.
+Work done in the render process pool or in `to_thread` calls is not sampled by
+either; it appears as awaiting.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # pragma: no cover - optional dependency
+    Profiler = None  # type: ignore[assignment,misc]
+
+LOOP_WAIT_FRAME = "[event loop wait]"
+# Leaf functions where an idle event loop thread sits between callbacks.
+SELECTOR_WAIT_FUNCTIONS = frozenset({"select", "poll", "control"})
+# Held by the job currently profiled with pyinstrument.
+_pyinstrument_slot = threading.Lock()
+
+
+def _label(function: str, file_path: str | None, line_no: int | None) -> str:
+    # `;` separates frames in the folded format (the count follows the last space).
+    name = function.replace(";", ":")
+    if not file_path:
+        return name
+    return f"{name} ({'/'.join(Path(file_path).parts[-2:])}:{line_no})"
+
+
+def _is_selector_wait(function: str, file_path: str | None) -> bool:
+    return function in SELECTOR_WAIT_FUNCTIONS and (file_path or "").endswith("selectors.py")
+
+
+def _fold_pyinstrument(frame: Any, prefix: str, stacks: Counter[str]) -> None:
+    if _is_selector_wait(frame.function, frame.file_path):
+        stacks[f"{prefix};{LOOP_WAIT_FRAME}" if prefix else LOOP_WAIT_FRAME] += round(frame.time * 1_000_000)
+        return
+    label = frame.function if frame.is_synthetic else _label(frame.function, frame.file_path_short, frame.line_no)
+    stack = f"{prefix};{label}" if prefix else label
+    self_time = frame.time - sum(child.time for child in frame.children)
+    if self_time > 0:
+        stacks[stack] += round(self_time * 1_000_000)
+    for child in frame.children:
+        _fold_pyinstrument(child, stack, stacks)
+
+
+class _LoopSampler:
+    """Samples one thread's Python stack from a background thread."""
+
+    def __init__(self, interval_sec: float, thread_id: int) -> None:
+        self.interval_sec = interval_sec
+        self.thread_id = thread_id
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval_sec):
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._fold(frame)] += round((now - last) * 1_000_000)
+            last = now
+
+    @staticmethod
+    def _fold(frame: FrameType | None) -> str:
+        labels: list[str] = []
+        leaf = frame
+        while frame is not None:
+            code = frame.f_code
+            labels.append(_label(code.co_qualname, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        labels.reverse()
+        if leaf is not None and _is_selector_wait(leaf.f_code.co_name, leaf.f_code.co_filename):
+            labels[-1] = LOOP_WAIT_FRAME
+        return ";".join(labels)
+
+
+class JobProfiler:
+    """Started and stopped from the job's coroutine."""
+
+    def __init__(self, interval_sec: float) -> None:
+        self.interval_sec = max(0.0005, interval_sec)
+        self.engine = "sampler"
+        self._profiler: Any = None
+        self._sampler: _LoopSampler | None = None
+
+    def start(self) -> None:
+        if Profiler is not None and _pyinstrument_slot.acquire(blocking=False):
+            try:
+                profiler = Profiler(interval=self.interval_sec, async_mode="enabled")
+                profiler.start()
+            except RuntimeError:
+                # Another pyinstrument session on this thread (not one of ours).
+                _pyinstrument_slot.release()
+            else:
+                self._profiler = profiler
+                self.engine = "pyinstrument"
+                return
+        self._sampler = _LoopSampler(self.interval_sec, threading.get_ident())
+        self._sampler.start()
+
+    def stop(self) -> Counter[str]:
+        stacks: Counter[str] = Counter()
+        if self._profiler is not None:
+            try:
+                session = self._profiler.stop()
+            finally:
+                self._profiler = None
+                _pyinstrument_slot.release()
+            root = session.root_frame()
+            if root is not None:
+                _fold_pyinstrument(root, "", stacks)
+        elif self._sampler is not None:
+            self._sampler.stop()
+            stacks = self._sampler.stacks
+        return +stacks
+
+
+def write_folded(path: Path, stacks: Counter[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lines = [f"{stack} {micros}" for stack, micros in sorted(stacks.items())]
+    path.write_text("\n".join(lines) + ("\n" if lines else ""), encoding="utf-8")
+
+
+def top_frames(stacks: Counter[str], limit: int = 5) -> list[tuple[str, float]]:
+    """Leaf frames with the most self time, in seconds."""
+    leaves: Counter[str] = Counter()
+    for stack, micros in stacks.items():
+        leaves[stack.rsplit(";", 1)[-1]] += micros
+    return [(leaf, micros / 1_000_000) for leaf, micros in leaves.most_common(limit)]
@@ -1,13 +1,59 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.routes.admin import router as admin_router
+from app.api.routes.batches import router as batches_router
 from app.api.routes.health import router as health_router
 from app.api.routes.jobs import router as jobs_router
+from app.clients.translation_client import TranslationClientError, build_translation_client
+from app.core.config import get_settings
 from app.core.logging import setup_logging
+from app.core.loop_monitor import monitor_event_loop
+from app.store.artifacts import run_gc_periodically
+from app.utils.executors import shutdown_process_pool
 
 
 setup_logging()
-app = FastAPI(title="pdf-translate-local backend", version="0.1.0")
+logger = logging.getLogger(__name__)
+
+
+async def _warm_up_translation_model() -> None:
+    try:
+        await build_translation_client(get_settings()).warm_up()
+    except TranslationClientError as exc:
+        logger.warning("Translation model warm-up failed: %s", exc)
+    else:
+        logger.info("Translation model warmed up")
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    settings = get_settings()
+    tasks: list[asyncio.Task[None]] = []
+    if settings.ollama_warmup_enabled and settings.job_runner == "inline":
+        # With JOB_RUNNER=queue the model is used (and warmed up) by the workers.
+        tasks.append(asyncio.create_task(_warm_up_translation_model()))
+    if settings.artifact_retention_max_bytes is not None or settings.artifact_retention_max_age_hours is not None:
+        tasks.append(asyncio.create_task(run_gc_periodically(settings)))
+    if settings.loop_monitor_enabled:
+        tasks.append(
+            asyncio.create_task(
+                monitor_event_loop(settings.loop_monitor_interval_sec, settings.loop_lag_threshold_ms)
+            )
+        )
+    yield
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    shutdown_process_pool()
+
+
+app = FastAPI(title="pdf-translate-local backend", version="0.1.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://127.0.0.1:5173", "http://localhost:5173"],
@@ -17,6 +63,8 @@ app.add_middleware(
 )
 app.include_router(health_router)
 app.include_router(jobs_router)
+app.include_router(batches_router)
+app.include_router(admin_router)
 
 
 @app.get("/")
@@ -0,0 +1,78 @@
+"""Lightweight in-memory page/block records for pipeline hot paths.
+
+Pipeline stages pass these `__slots__` dataclasses around instead of the
+pydantic schemas so tens of thousands of blocks are not re-validated and
+deep-copied at every stage. Convert with `from_schema` / `to_schema` at
+API and JSON boundaries.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from app.models.schemas import Block, PageResult
+
+BBox = tuple[float, float, float, float]
+EMPTY_BBOX: BBox = (0.0, 0.0, 0.0, 0.0)
+
+
+@dataclass(slots=True)
+class BlockRecord:
+    id: str
+    type: str
+    bbox: BBox
+    text: str
+    page: int
+    translated_text: str | None = None
+
+    @classmethod
+    def from_schema(cls, block: Block) -> BlockRecord:
+        x1, y1, x2, y2 = block.bbox
+        return cls(
+            id=block.id,
+            type=block.type,
+            bbox=(x1, y1, x2, y2),
+            text=block.text,
+            page=block.page,
+            translated_text=block.translated_text,
+        )
+
+    def to_schema(self) -> Block:
+        # Fields were typed on the way in; skip re-validation.
+        return Block.model_construct(
+            id=self.id,
+            type=self.type,
+            bbox=list(self.bbox),
+            text=self.text,
+            translated_text=self.translated_text,
+            page=self.page,
+        )
+
+
+@dataclass(slots=True)
+class PageRecord:
+    page: int
+    img_w: int
+    img_h: int
+    dpi: int | None = None
+    blocks: list[BlockRecord] = field(default_factory=list)
+
+    @classmethod
+    def from_schema(cls, page: PageResult) -> PageRecord:
+        return cls(
+            page=page.page,
+            img_w=page.img_w,
+            img_h=page.img_h,
+            dpi=page.dpi,
+            blocks=[BlockRecord.from_schema(block) for block in page.blocks],
+        )
+
+    def to_schema(self) -> PageResult:
+        return PageResult.model_construct(
+            page=self.page,
+            img_w=self.img_w,
+            img_h=self.img_h,
+            dpi=self.dpi,
+            blocks=[block.to_schema() for block in self.blocks],
+            markdown="",
+        )
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import StrEnum
-from typing import Any
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
@@ -12,10 +12,45 @@ class ServiceHealth(BaseModel):
     detail: str
 
 
+class StorageUsage(BaseModel):
+    jobs: int
+    jobs_bytes: int
+    cache_bytes: int
+    disk_free_bytes: int
+    disk_total_bytes: int
+
+
+class QueueStats(BaseModel):
+    queued: int
+    leased: int
+
+
+class LoopStall(BaseModel):
+    at: str
+    lag_ms: float
+
+
+class EventLoopLag(BaseModel):
+    checks: int
+    stalls: int
+    max_lag_ms: float
+    recent: list[LoopStall] = Field(default_factory=list)
+
+
+class GenerationCounters(BaseModel):
+    llm_calls: int
+    degenerate_generations: int
+    degenerate_wasted_sec: float
+
+
 class HealthResponse(BaseModel):
     status: str
     ocr: ServiceHealth
     ollama: ServiceHealth
+    storage: StorageUsage | None = None
+    queue: QueueStats | None = None
+    event_loop: EventLoopLag | None = None
+    generation: GenerationCounters | None = None
 
 
 class JobStatus(StrEnum):
@@ -29,6 +64,19 @@ class JobCreateResponse(BaseModel):
     job_id: str
 
 
+class JobBudget(BaseModel):
+    # Seconds from submission; OCR switches to the PDF text layer after
+    # JOB_BUDGET_OCR_SHARE of it, translation stops at the deadline.
+    deadline_sec: float | None = Field(default=None, gt=0)
+    max_llm_calls: int | None = Field(default=None, ge=0)
+    # Prompt + output tokens, as counted by TRANSLATE_TOKENIZER.
+    max_llm_tokens: int | None = Field(default=None, ge=0)
+    max_ocr_pages: int | None = Field(default=None, ge=0)
+
+    def is_empty(self) -> bool:
+        return all(value is None for value in self.model_dump().values())
+
+
 class JobMeta(BaseModel):
     job_id: str
     filename: str
@@ -39,9 +87,90 @@ class JobMeta(BaseModel):
     created_at: datetime
     updated_at: datetime
     result_path: str | None = None
+    queue_position: int | None = None
+    expected_wait_sec: float | None = None
+    budget: JobBudget | None = None
+    # True when a budget ran out and the result was finished in a cheaper mode.
+    partial: bool = False
+    budget_exhausted: list[str] = Field(default_factory=list)
     extra: dict[str, Any] = Field(default_factory=dict)
 
 
+class BatchMeta(BaseModel):
+    batch_id: str
+    created_at: datetime
+    job_ids: list[str] = Field(default_factory=list)
+    skipped: list[str] = Field(default_factory=list)
+
+
+class BatchCreateResponse(BaseModel):
+    batch_id: str
+    job_ids: list[str]
+    # Uploaded names that were not PDFs (or were unreadable archive members).
+    skipped: list[str] = Field(default_factory=list)
+
+
+class BatchJobSummary(BaseModel):
+    job_id: str
+    filename: str
+    status: JobStatus
+    progress: float
+    pages: int
+    error: str | None = None
+    # The job's meta.json no longer exists; reported as failed.
+    missing: bool = False
+
+
+class BatchStatusResponse(BaseModel):
+    batch_id: str
+    status: str
+    progress: float = Field(ge=0.0, le=1.0)
+    jobs_total: int
+    jobs_succeeded: int
+    jobs_failed: int
+    # Included in jobs_failed.
+    jobs_missing: int = 0
+    pages_total: int
+    pages_done: float
+    elapsed_sec: float
+    pages_per_min: float | None = None
+    created_at: datetime
+    jobs: list[BatchJobSummary] = Field(default_factory=list)
+
+
+class JobLogResponse(BaseModel):
+    entries: list[dict[str, Any]] = Field(default_factory=list)
+    # Byte offset to pass as `since` to fetch only newer entries.
+    next_offset: int = 0
+
+
+class ReplayRequest(BaseModel):
+    # None replays every succeeded job.
+    job_ids: list[str] | None = None
+    stages: list[Literal["markdown", "pdf"]] = Field(default_factory=lambda: ["markdown"], min_length=1)
+    # Translate blocks missing from the translation cache instead of keeping their source text.
+    allow_llm: bool = False
+    # Replace a job's output even when some translations were missing from the cache.
+    force: bool = False
+
+
+class ReplayJobResult(BaseModel):
+    job_id: str
+    pages: int = 0
+    blocks: int = 0
+    untranslated: int = 0
+    cache_misses: int = 0
+    # False: cache misses, the job's existing output was kept.
+    applied: bool = False
+    elapsed_sec: float = 0.0
+    error: str | None = None
+
+
+class ReplayResponse(BaseModel):
+    results: list[ReplayJobResult] = Field(default_factory=list)
+    elapsed_sec: float
+
+
 class Block(BaseModel):
     id: str
     type: str
@@ -55,5 +184,6 @@ class PageResult(BaseModel):
     page: int
     img_w: int
     img_h: int
+    dpi: int | None = None
     blocks: list[Block] = Field(default_factory=list)
     markdown: str = ""
@@ -0,0 +1,176 @@
+"""Per-job resource budgets (`POST /jobs` deadline / LLM / OCR limits).
+
+A job that runs out of budget is not failed: OCR falls back to the PDF text
+layer, low-priority blocks are left untranslated when the remaining LLM calls
+cannot cover every block, and anything still untranslated at the deadline is
+kept in the source language. The job then finishes with `partial: true`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+from app.clients.translation_client import TranslationClient, TranslationClientError
+from app.models.records import BlockRecord, PageRecord
+from app.models.schemas import JobBudget
+from app.utils.tokens import TokenEstimator
+
+# Layout labels whose translation matters least (running heads, page furniture, citations).
+LOW_PRIORITY_TYPES = frozenset(
+    {
+        "footer",
+        "page_footer",
+        "page_header",
+        "number",
+        "page_number",
+        "footnote",
+        "aside_text",
+        "reference",
+        "references",
+        "formula",
+        "equation",
+    }
+)
+LETTER_RE = re.compile(r"[^\W\d_]")
+MIN_PRIORITY_CHARS = 4
+
+
+class BudgetExceeded(TranslationClientError):
+    """A translation call was refused because the job's budget is spent."""
+
+
+def is_low_priority(block: BlockRecord) -> bool:
+    text = block.text.strip()
+    if block.type.lower() in LOW_PRIORITY_TYPES or len(text) < MIN_PRIORITY_CHARS:
+        return True
+    # Numbers, symbols and formulas read the same in either language.
+    return len(LETTER_RE.findall(text)) < len(text) * 0.3
+
+
+class JobBudgetTracker:
+    def __init__(self, budget: JobBudget, created_at: datetime, ocr_share: float = 0.5) -> None:
+        self.budget = budget
+        self.started = time.time()
+        self.deadline = created_at.timestamp() + budget.deadline_sec if budget.deadline_sec is not None else None
+        # OCR may use this share of whatever time is left when the job starts.
+        self.ocr_deadline = (
+            self.started + max(0.0, self.deadline - self.started) * min(1.0, max(0.0, ocr_share))
+            if self.deadline is not None
+            else None
+        )
+        self.llm_calls = 0
+        self.llm_tokens = 0
+        self.ocr_pages = 0
+        # Calls turned away by reserve_call.
+        self.refused_calls = 0
+        self.exhausted: list[str] = []
+
+    def mark(self, reason: str) -> None:
+        if reason not in self.exhausted:
+            self.exhausted.append(reason)
+
+    def remaining_sec(self) -> float | None:
+        return None if self.deadline is None else self.deadline - time.time()
+
+    def take_ocr_pages(self, count: int) -> int:
+        """How many of the next `count` pages may still go through OCR."""
+        allowed = count
+        if self.budget.max_ocr_pages is not None:
+            allowed = min(allowed, max(0, self.budget.max_ocr_pages - self.ocr_pages))
+            if allowed < count:
+                self.mark("ocr_pages")
+        if self.ocr_deadline is not None and time.time() >= self.ocr_deadline:
+            allowed = 0
+            self.mark("deadline")
+        self.ocr_pages += allowed
+        return allowed
+
+    def llm_calls_left(self) -> int | None:
+        if self.budget.max_llm_calls is None:
+            return None
+        return max(0, self.budget.max_llm_calls - self.llm_calls)
+
+    def llm_tokens_left(self) -> int | None:
+        if self.budget.max_llm_tokens is None:
+            return None
+        return max(0, self.budget.max_llm_tokens - self.llm_tokens)
+
+    def reserve_call(self, prompt_tokens: int) -> None:
+        """Count one call up front (concurrent calls must not overshoot), or raise BudgetExceeded."""
+        calls_left = self.llm_calls_left()
+        tokens_left = self.llm_tokens_left()
+        remaining = self.remaining_sec()
+        refusal = None
+        if calls_left is not None and calls_left <= 0:
+            refusal = ("llm_calls", "LLM call budget exhausted")
+        elif tokens_left is not None and tokens_left <= prompt_tokens:
+            refusal = ("llm_tokens", "LLM token budget exhausted")
+        elif remaining is not None and remaining <= 0:
+            refusal = ("deadline", "deadline reached")
+        if refusal is not None:
+            self.refused_calls += 1
+            self.mark(refusal[0])
+            raise BudgetExceeded(refusal[1])
+        self.llm_calls += 1
+        self.llm_tokens += prompt_tokens
+
+    def short_of(self, pages: list[PageRecord], estimator: TokenEstimator, output_ratio: float) -> bool:
+        """True when the LLM budget left cannot translate every block of `pages`."""
+        blocks = [block for page in pages for block in page.blocks if block.text.strip()]
+        calls_left = self.llm_calls_left()
+        if calls_left is not None and calls_left < len(blocks):
+            return True
+        tokens_left = self.llm_tokens_left()
+        if tokens_left is None:
+            return False
+        needed = sum(estimator.count(block.text) for block in blocks) * (1.0 + max(0.0, output_ratio))
+        return tokens_left < needed
+
+    def usage(self) -> dict[str, float | int]:
+        return {
+            "llm_calls": self.llm_calls,
+            "llm_tokens": self.llm_tokens,
+            "ocr_pages": self.ocr_pages,
+            "elapsed_sec": round(time.time() - self.started, 2),
+        }
+
+
+class BudgetedTranslationClient:
+    """Charges every `generate` against a JobBudgetTracker and cuts it off at the deadline."""
+
+    def __init__(self, inner: TranslationClient, tracker: JobBudgetTracker, estimator: TokenEstimator) -> None:
+        self.inner = inner
+        self.tracker = tracker
+        self.estimator = estimator
+        self.model = inner.model
+
+    @property
+    def health_url(self) -> str:
+        return self.inner.health_url
+
+    def num_predict_for(self, source_text: str, source_tokens: int | None = None) -> int | None:
+        return self.inner.num_predict_for(source_text, source_tokens)
+
+    async def generate(self, prompt: str, num_predict: int | None = None, source_text: str | None = None) -> str:
+        prompt_tokens = self.estimator.count(prompt)
+        self.tracker.reserve_call(prompt_tokens)
+        tokens_left = self.tracker.llm_tokens_left()
+        if tokens_left is not None:
+            # The prompt is already charged; the output may use what is left.
+            num_predict = max(1, min(num_predict or tokens_left, tokens_left))
+        remaining = self.tracker.remaining_sec()
+        try:
+            async with asyncio.timeout(remaining) if remaining is not None else nullcontext():
+                text = await self.inner.generate(prompt, num_predict=num_predict, source_text=source_text)
+        except TimeoutError as exc:
+            self.tracker.mark("deadline")
+            raise BudgetExceeded("deadline reached during generation") from exc
+        self.tracker.llm_tokens += self.estimator.count(text)
+        return text
+
+    async def warm_up(self) -> None:
+        await self.inner.warm_up()
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+
+from app.clients.translation_client import TranslationClient
+from app.models.records import PageRecord
+from app.utils.jsonio import read_json, write_json
+
+ACRONYM_RE = re.compile(r"\b[A-Z][A-Z0-9]{1,}(?:-[A-Z0-9]+)*s?\b")
+CAPITALIZED_PHRASE_RE = re.compile(r"\b[A-Z][a-z0-9]+(?:[ -][A-Z][a-z0-9]+)+\b")
+HYPHENATED_RE = re.compile(r"\b[a-z][a-z0-9]+(?:-[a-z0-9]+)+\b")
+GLOSSARY_LINE_RE = re.compile(r"^\s*(?:[-*]\s*)?(?P<term>.+?)\s*(?:\t|=>|->|:|：)\s*(?P<translation>.+?)\s*$")
+
+LEADING_STOPWORDS = frozenset(
+    {"a", "an", "as", "at", "by", "for", "in", "it", "of", "on", "our", "the", "this", "to", "we"}
+)
+IGNORED_ACRONYMS = frozenset({"II", "III", "IV", "VI", "VII", "VIII", "IX", "XI", "XII"})
+
+
+def _normalize_term(term: str) -> str | None:
+    words = term.split()
+    while words and words[0].lower() in LEADING_STOPWORDS:
+        words = words[1:]
+    if not words:
+        return None
+    normalized = " ".join(words)
+    if len(normalized) < 2 or normalized in IGNORED_ACRONYMS:
+        return None
+    return normalized
+
+
+def _iter_candidates(text: str) -> Iterable[str]:
+    for pattern in (ACRONYM_RE, CAPITALIZED_PHRASE_RE, HYPHENATED_RE):
+        for match in pattern.finditer(text):
+            term = _normalize_term(match.group(0))
+            if term:
+                yield term
+
+
+def extract_glossary_terms(
+    pages: Iterable[PageRecord],
+    max_terms: int,
+    min_count: int = 2,
+) -> list[str]:
+    counts: Counter[str] = Counter()
+    for page in pages:
+        for block in page.blocks:
+            counts.update(_iter_candidates(block.text))
+
+    recurring = [(term, count) for term, count in counts.items() if count >= min_count]
+    recurring.sort(key=lambda item: (-item[1], item[0]))
+    # Sorted alphabetically so the glossary section of every prompt is byte-identical.
+    return sorted(term for term, _ in recurring[: max(0, max_terms)])
+
+
+def build_glossary_prompt(terms: list[str]) -> str:
+    listed = "\n".join(terms)
+    return (
+        "Task: Translate each technical term below into Japanese as it should appear in a research paper.\n"
+        "Rules:\n"
+        "- Output one line per term in the form: term<TAB>translation\n"
+        "- Keep acronyms and proper nouns unchanged when they are normally left untranslated.\n"
+        "- Output the list only. Do not add explanations.\n\n"
+        f"Terms:\n{listed}"
+    )
+
+
+def parse_glossary_response(text: str, terms: list[str]) -> dict[str, str]:
+    wanted = {term.lower(): term for term in terms}
+    glossary: dict[str, str] = {}
+    for line in text.splitlines():
+        match = GLOSSARY_LINE_RE.match(line.strip("`"))
+        if match is None:
+            continue
+        term = wanted.get(match.group("term").strip().lower())
+        translation = match.group("translation").strip()
+        if term and translation:
+            glossary[term] = translation
+    return {term: glossary[term] for term in sorted(glossary)}
+
+
+async def resolve_glossary(terms: list[str], client: TranslationClient) -> dict[str, str]:
+    if not terms:
+        return {}
+    out = await client.generate(build_glossary_prompt(terms))
+    return parse_glossary_response(out, terms)
+
+
+def format_glossary(glossary: dict[str, str]) -> str:
+    if not glossary:
+        return ""
+    lines = "\n".join(f"- {term}: {translation}" for term, translation in glossary.items())
+    return f"Glossary (use these translations consistently):\n{lines}\n\n"
+
+
+def save_glossary(path: Path, glossary: dict[str, str], pretty: bool = False) -> None:
+    write_json(path, glossary, pretty=pretty)
+
+
+def load_glossary(path: Path) -> dict[str, str]:
+    if not path.exists():
+        return {}
+    data = read_json(path)
+    return {str(term): str(translation) for term, translation in data.items()} if isinstance(data, dict) else {}
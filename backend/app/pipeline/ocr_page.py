@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import re
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
 from app.clients.ocr_client import OCRClient
-from app.models.schemas import Block, PageResult
+from app.models.records import EMPTY_BBOX, BBox, BlockRecord, PageRecord
+from app.models.schemas import PageResult
+from app.pipeline.ocr_tiles import TileOptions, ocr_pages_tiles
+from app.pipeline.render_pdf import extract_text_layer
+from app.store.artifacts import read_artifact_bytes, resolve_artifact
+from app.utils.jsonio import loads, write_json
 
 PARAGRAPH_SPLIT_RE = re.compile(r"\n\s*\n+")
 INLINE_SPACE_RE = re.compile(r"\s+")
@@ -14,19 +20,22 @@ FALLBACK_TOTAL_CHAR_LIMIT = 12000
 FALLBACK_BLOCK_CHAR_LIMIT = 1800
 
 
-def _as_bbox(value: Any) -> list[float]:
+def _as_bbox(value: Any) -> BBox:
     if isinstance(value, dict):
         keys = ("x1", "y1", "x2", "y2")
         if all(k in value for k in keys):
-            return [float(value[k]) for k in keys]
-        return [0.0, 0.0, 0.0, 0.0]
+            try:
+                return (float(value["x1"]), float(value["y1"]), float(value["x2"]), float(value["y2"]))
+            except (TypeError, ValueError):
+                return EMPTY_BBOX
+        return EMPTY_BBOX
 
     if isinstance(value, (list, tuple)) and len(value) == 4:
         try:
-            return [float(v) for v in value]
+            return (float(value[0]), float(value[1]), float(value[2]), float(value[3]))
         except (TypeError, ValueError):
-            return [0.0, 0.0, 0.0, 0.0]
-    return [0.0, 0.0, 0.0, 0.0]
+            return EMPTY_BBOX
+    return EMPTY_BBOX
 
 
 def _extract_text(item: dict[str, Any]) -> str:
@@ -66,14 +75,14 @@ def _extract_content_from_choices(raw: dict[str, Any]) -> str | None:
     return None
 
 
-def _parse_array_blocks(raw_array: list[Any], page: int) -> list[Block]:
+def _parse_array_blocks(raw_array: list[Any], page: int) -> list[BlockRecord]:
     if not raw_array:
         return []
     first = raw_array[0] if isinstance(raw_array[0], list) else raw_array
     if not isinstance(first, list):
         return []
 
-    blocks: list[Block] = []
+    blocks: list[BlockRecord] = []
     for idx, item in enumerate(first, start=1):
         if not isinstance(item, dict):
             continue
@@ -82,7 +91,7 @@ def _parse_array_blocks(raw_array: list[Any], page: int) -> list[Block]:
             continue
         bbox = item.get("bbox_2d") or item.get("bbox") or item.get("box") or [0, 0, 0, 0]
         blocks.append(
-            Block(
+            BlockRecord(
                 id=str(item.get("id") or item.get("index") or f"p{page:03d}-b{idx:04d}"),
                 type=str(item.get("type") or item.get("label") or "paragraph"),
                 bbox=_as_bbox(bbox),
@@ -93,13 +102,17 @@ def _parse_array_blocks(raw_array: list[Any], page: int) -> list[Block]:
     return blocks
 
 
-def _parse_text_to_blocks(text: str, page: int) -> list[Block]:
+def _parse_text_to_blocks(text: str, page: int) -> list[BlockRecord]:
     stripped = text.strip()
     if not stripped:
         return []
-    try:
-        parsed = json.loads(stripped)
-    except ValueError:
+    if stripped[0] in "[{":
+        try:
+            parsed = loads(stripped)
+        except ValueError:
+            parsed = None
+    else:
+        # Plain markdown (the common case) skips a doomed JSON parse.
         parsed = None
 
     if isinstance(parsed, list):
@@ -109,13 +122,13 @@ def _parse_text_to_blocks(text: str, page: int) -> list[Block]:
     if isinstance(parsed, dict):
         blocks = _extract_blocks(parsed)
         if blocks:
-            normalized: list[Block] = []
+            normalized: list[BlockRecord] = []
             for idx, item in enumerate(blocks, start=1):
                 txt = _extract_text(item)
                 if not txt:
                     continue
                 normalized.append(
-                    Block(
+                    BlockRecord(
                         id=str(item.get("id") or f"p{page:03d}-b{idx:04d}"),
                         type=str(item.get("type") or item.get("label") or "paragraph"),
                         bbox=_as_bbox(item.get("bbox") or item.get("box") or item.get("coordinates")),
@@ -129,7 +142,7 @@ def _parse_text_to_blocks(text: str, page: int) -> list[Block]:
     return _fallback_text_blocks(stripped, page=page)
 
 
-def _fallback_text_blocks(text: str, page: int) -> list[Block]:
+def _fallback_text_blocks(text: str, page: int) -> list[BlockRecord]:
     trimmed = text.strip()
     if not trimmed:
         return []
@@ -138,13 +151,13 @@ def _fallback_text_blocks(text: str, page: int) -> list[Block]:
         trimmed = trimmed[:FALLBACK_TOTAL_CHAR_LIMIT].rstrip()
 
     segments = _split_segments(trimmed)
-    blocks: list[Block] = []
+    blocks: list[BlockRecord] = []
     for idx, segment in enumerate(segments, start=1):
         blocks.append(
-            Block(
+            BlockRecord(
                 id=f"p{page:03d}-b{idx:04d}",
                 type="paragraph",
-                bbox=[0.0, 0.0, 0.0, 0.0],
+                bbox=EMPTY_BBOX,
                 text=segment,
                 page=page,
             )
@@ -157,16 +170,22 @@ def _split_segments(text: str) -> list[str]:
     if not raw_segments:
         raw_segments = [text.strip()]
 
+    deduped, _ = _dedupe_segments(raw_segments)
+    return deduped or [text.strip()]
+
+
+def _dedupe_segments(segments: list[str], prev_key: str = "") -> tuple[list[str], str]:
+    """Drop segments repeating the previous one and cut long ones into blocks.
+
+    Returns the blocks and the key of the last segment, to carry on from."""
     deduped: list[str] = []
-    prev_key = ""
-    for segment in raw_segments:
+    for segment in segments:
         key = _segment_key(segment)
         if key and key == prev_key:
             continue
         prev_key = key
         deduped.extend(_split_long_segment(segment, max_chars=FALLBACK_BLOCK_CHAR_LIMIT))
-
-    return deduped or [text.strip()]
+    return deduped, prev_key
 
 
 def _segment_key(text: str) -> str:
@@ -197,6 +216,60 @@ def _split_long_segment(text: str, max_chars: int) -> list[str]:
     return parts
 
 
+class ParagraphStream:
+    """Incremental splitter for streamed markdown OCR output.
+
+    `feed` returns the paragraphs completed by a delta, split, deduplicated
+    and truncated at FALLBACK_TOTAL_CHAR_LIMIT as the fallback normalizer does
+    with the final text, so their text matches the blocks the page ends up
+    with. JSON-shaped output is not split.
+    """
+
+    def __init__(self) -> None:
+        self._text = ""
+        self._emitted = 0
+        self._prev_key = ""
+        self._started = False
+        self._disabled = False
+        self._done = False
+
+    def feed(self, delta: str) -> list[str]:
+        if self._disabled or self._done:
+            return []
+        self._text += delta
+        if not self._started:
+            self._text = self._text.lstrip()
+            if not self._text:
+                return []
+            self._started = True
+            if self._text[0] in "[{":
+                self._disabled = True
+                return []
+        if len(self._text) >= FALLBACK_TOTAL_CHAR_LIMIT:
+            # The fallback drops everything past the limit.
+            self._done = True
+            return self._segments(self._text[self._emitted : FALLBACK_TOTAL_CHAR_LIMIT].rstrip())
+        last = None
+        for match in PARAGRAPH_SPLIT_RE.finditer(self._text, self._emitted):
+            last = match
+        if last is None:
+            return []
+        complete = self._text[self._emitted : last.start()]
+        self._emitted = last.end()
+        return self._segments(complete)
+
+    def finish(self) -> list[str]:
+        if self._disabled or self._done:
+            return []
+        self._done = True
+        return self._segments(self._text[self._emitted :])
+
+    def _segments(self, text: str) -> list[str]:
+        parts = [part.strip() for part in PARAGRAPH_SPLIT_RE.split(text) if part.strip()]
+        blocks, self._prev_key = _dedupe_segments(parts, self._prev_key)
+        return blocks
+
+
 def _extract_image_size(raw: dict[str, Any]) -> tuple[int, int]:
     width_keys = ("img_w", "width", "image_width", "w")
     height_keys = ("img_h", "height", "image_height", "h")
@@ -220,11 +293,43 @@ def _extract_image_size(raw: dict[str, Any]) -> tuple[int, int]:
     return width, height
 
 
-def normalize_ocr_result(raw: Any, page: int) -> PageResult:
-    blocks: list[Block] = []
+def is_truncated(raw: Any) -> bool:
+    if not isinstance(raw, dict):
+        return False
+    choices = raw.get("choices")
+    if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+        return False
+    return choices[0].get("finish_reason") == "length"
+
+
+def _normalize_tiles(tiles: list[Any], page: int) -> list[BlockRecord]:
+    blocks: list[BlockRecord] = []
+    for tile in tiles:
+        if not isinstance(tile, dict):
+            continue
+        x1, y1, x2, y2 = _as_bbox(tile.get("bbox"))
+        for block in normalize_ocr_record(tile.get("raw"), page=page).blocks:
+            bx1, by1, bx2, by2 = block.bbox
+            if bx2 <= bx1 or by2 <= by1:
+                # Text-only tile output has no boxes; the tile itself is the best estimate.
+                block.bbox = (x1, y1, x2, y2)
+            else:
+                block.bbox = (bx1 + x1, by1 + y1, bx2 + x1, by2 + y1)
+            blocks.append(block)
+    for idx, block in enumerate(blocks, start=1):
+        block.id = f"p{page:03d}-b{idx:04d}"
+    return blocks
+
+
+def normalize_ocr_record(raw: Any, page: int) -> PageRecord:
+    blocks: list[BlockRecord] = []
     img_w = 0
     img_h = 0
 
+    if isinstance(raw, dict) and isinstance(raw.get("tiles"), list):
+        img_w, img_h = _extract_image_size(raw)
+        return PageRecord(page=page, img_w=img_w, img_h=img_h, blocks=_normalize_tiles(raw["tiles"], page))
+
     if isinstance(raw, dict):
         raw_blocks = _extract_blocks(raw)
         for idx, item in enumerate(raw_blocks, start=1):
@@ -232,7 +337,7 @@ def normalize_ocr_result(raw: Any, page: int) -> PageResult:
             if not text:
                 continue
             blocks.append(
-                Block(
+                BlockRecord(
                     id=str(item.get("id") or f"p{page:03d}-b{idx:04d}"),
                     type=str(item.get("type") or item.get("label") or "paragraph"),
                     bbox=_as_bbox(item.get("bbox") or item.get("box") or item.get("coordinates")),
@@ -250,31 +355,132 @@ def normalize_ocr_result(raw: Any, page: int) -> PageResult:
     if not blocks:
         blocks = _parse_array_blocks(raw if isinstance(raw, list) else [], page=page)
 
-    return PageResult(page=page, img_w=img_w, img_h=img_h, blocks=blocks)
+    return PageRecord(page=page, img_w=img_w, img_h=img_h, blocks=blocks)
 
 
-async def run_ocr_for_page(
+def normalize_ocr_result(raw: Any, page: int) -> PageResult:
+    return normalize_ocr_record(raw, page=page).to_schema()
+
+
+def _finalize_page_result(
+    raw: dict[str, Any],
     image_path: Path,
     page: int,
-    ocr_client: OCRClient,
-    ocr_output_path: Path | None = None,
-) -> PageResult:
-    raw = await ocr_client.parse_image(image_path)
+    ocr_output_path: Path | None,
+    pretty_json: bool = False,
+) -> PageRecord:
     if ocr_output_path is not None:
-        ocr_output_path.parent.mkdir(parents=True, exist_ok=True)
-        ocr_output_path.write_text(
-            json.dumps(raw, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
-    page_result = normalize_ocr_result(raw, page=page)
+        write_json(ocr_output_path, raw, pretty=pretty_json)
+    page_result = normalize_ocr_record(raw, page=page)
     if page_result.img_w <= 0 or page_result.img_h <= 0:
         try:
             from PIL import Image
 
             with Image.open(image_path) as image:
-                page_result = page_result.model_copy(
-                    update={"img_w": image.width, "img_h": image.height}
-                )
+                page_result.img_w, page_result.img_h = image.width, image.height
         except Exception:  # noqa: BLE001
             pass
     return page_result
+
+
+def load_stored_ocr_pages(ocr_dir: Path) -> list[PageRecord]:
+    """Normalize the raw responses saved as `ocr/NNN.json` (or compressed) again, without OCR."""
+    pages: list[PageRecord] = []
+    while resolve_artifact(path := ocr_dir / f"{len(pages) + 1:03d}.json") is not None:
+        pages.append(normalize_ocr_record(loads(read_artifact_bytes(path)), page=len(pages) + 1))
+    return pages
+
+
+async def run_ocr_for_page(
+    image_path: Path,
+    page: int,
+    ocr_client: OCRClient,
+    ocr_output_path: Path | None = None,
+    pretty_json: bool = False,
+) -> PageRecord:
+    raw = await ocr_client.parse_image(image_path)
+    return await asyncio.to_thread(_finalize_page_result, raw, image_path, page, ocr_output_path, pretty_json)
+
+
+async def run_ocr_for_pages(
+    image_paths: list[Path],
+    pages: list[int],
+    ocr_client: OCRClient,
+    ocr_output_paths: list[Path] | None = None,
+    tiling: TileOptions | None = None,
+    tiles_dir: Path | None = None,
+    pretty_json: bool = False,
+    on_paragraph: Callable[[int, str], None] | None = None,
+) -> list[PageRecord]:
+    """OCR a group of pages.
+
+    `on_paragraph(page, text)` is called for each paragraph as soon as it is
+    known: while the OCR output streams in (OCR_STREAM) or when the page's
+    response arrives. The returned records are still the authoritative,
+    normalized result; callers use the early paragraphs only speculatively.
+    """
+    tiling = tiling or TileOptions()
+    if tiling.enabled and tiles_dir is None and image_paths:
+        tiles_dir = image_paths[0].parent / "tiles"
+    if tiling.mode == "always" and tiles_dir is not None:
+        raws = await ocr_pages_tiles(image_paths, ocr_client, options=tiling, tiles_dir=tiles_dir)
+    else:
+        streams = [ParagraphStream() for _ in image_paths]
+        streamed: set[int] = set()
+
+        def on_text(index: int, delta: str) -> None:
+            streamed.add(index)
+            for paragraph in streams[index].feed(delta):
+                on_paragraph(pages[index], paragraph)  # type: ignore[misc]
+
+        raws = await ocr_client.parse_images(image_paths, on_text=on_text if on_paragraph else None)
+        if on_paragraph is not None:
+            for index, raw in enumerate(raws):
+                if is_truncated(raw):
+                    # The tail is cut off (and may be re-OCR'd as tiles below).
+                    continue
+                stream = streams[index]
+                # Pages that did not stream (cache hits, non-streaming server) arrive whole.
+                paragraphs = [] if index in streamed else stream.feed(_extract_content_from_choices(raw) or "")
+                for paragraph in paragraphs + stream.finish():
+                    on_paragraph(pages[index], paragraph)
+        if tiling.mode == "auto" and tiles_dir is not None:
+            # Re-OCR pages whose output hit the token limit as smaller tiles.
+            truncated = [idx for idx, raw in enumerate(raws) if is_truncated(raw)]
+            if truncated:
+                tiled = await ocr_pages_tiles(
+                    [image_paths[idx] for idx in truncated],
+                    ocr_client,
+                    options=tiling,
+                    tiles_dir=tiles_dir,
+                )
+                for idx, raw in zip(truncated, tiled, strict=True):
+                    raws[idx] = raw
+
+    output_paths: list[Path | None] = list(ocr_output_paths or [None] * len(image_paths))
+    # JSON writes and the PIL size fallback are blocking; keep them off the event loop.
+    return list(
+        await asyncio.gather(
+            *(
+                asyncio.to_thread(_finalize_page_result, raw, image_path, page, output_path, pretty_json)
+                for raw, image_path, page, output_path in zip(raws, image_paths, pages, output_paths, strict=True)
+            )
+        )
+    )
+
+
+async def run_text_layer_for_pages(
+    pdf_path: Path,
+    image_paths: list[Path],
+    pages: list[int],
+    dpis: list[int],
+    ocr_output_paths: list[Path] | None = None,
+    pretty_json: bool = False,
+) -> list[PageRecord]:
+    """The cheap stand-in for OCR: the PDF's own text layer, stored like an OCR result."""
+    raws = await asyncio.to_thread(extract_text_layer, pdf_path, pages, dpis)
+    output_paths: list[Path | None] = list(ocr_output_paths or [None] * len(image_paths))
+    return [
+        await asyncio.to_thread(_finalize_page_result, raw, image_path, page, output_path, pretty_json)
+        for raw, image_path, page, output_path in zip(raws, image_paths, pages, output_paths, strict=True)
+    ]
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from PIL import Image
+
+from app.clients.ocr_client import OCRClient
+
+PROFILE_SIZE = 256
+INK_THRESHOLD = 160
+GUTTER_INK_RATIO = 0.02
+GUTTER_MIN_WIDTH_RATIO = 0.015
+BAND_SNAP_RATIO = 0.05
+
+
+@dataclass(frozen=True)
+class TileOptions:
+    mode: str = "off"
+    layout: str = "detect"
+    count: int = 2
+    max_tokens: int = 1024
+    concurrency: int = 2
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode in {"auto", "always"}
+
+
+@dataclass(frozen=True)
+class Tile:
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+
+    @property
+    def bbox(self) -> list[float]:
+        return [float(self.x1), float(self.y1), float(self.x2), float(self.y2)]
+
+
+def _ink_profiles(image: Image.Image) -> tuple[list[float], list[float]]:
+    small = image.convert("L").resize((PROFILE_SIZE, PROFILE_SIZE))
+    pixels = list(small.getdata())
+    col_ink = [0] * PROFILE_SIZE
+    row_ink = [0] * PROFILE_SIZE
+    for idx, value in enumerate(pixels):
+        if value < INK_THRESHOLD:
+            row, col = divmod(idx, PROFILE_SIZE)
+            col_ink[col] += 1
+            row_ink[row] += 1
+    return [c / PROFILE_SIZE for c in col_ink], [r / PROFILE_SIZE for r in row_ink]
+
+
+def _blank_runs(profile: list[float], lo: int, hi: int) -> list[tuple[int, int]]:
+    runs: list[tuple[int, int]] = []
+    start: int | None = None
+    for pos in range(lo, hi):
+        if profile[pos] <= GUTTER_INK_RATIO:
+            if start is None:
+                start = pos
+        elif start is not None:
+            runs.append((start, pos))
+            start = None
+    if start is not None:
+        runs.append((start, hi))
+    return runs
+
+
+def _detect_column_splits(col_profile: list[float], count: int) -> list[float]:
+    lo, hi = int(PROFILE_SIZE * 0.15), int(PROFILE_SIZE * 0.85)
+    min_width = max(1, int(PROFILE_SIZE * GUTTER_MIN_WIDTH_RATIO))
+    runs = [run for run in _blank_runs(col_profile, lo, hi) if run[1] - run[0] >= min_width]
+    runs.sort(key=lambda run: run[1] - run[0], reverse=True)
+    centers = sorted((start + end) / 2.0 / PROFILE_SIZE for start, end in runs[: max(1, count - 1)])
+    return centers
+
+
+def _band_splits(row_profile: list[float], count: int) -> list[float]:
+    snap = max(1, int(PROFILE_SIZE * BAND_SNAP_RATIO))
+    splits: list[float] = []
+    for i in range(1, count):
+        target = int(PROFILE_SIZE * i / count)
+        window = range(max(0, target - snap), min(PROFILE_SIZE, target + snap + 1))
+        # Cut on the emptiest row near the target so text lines are not sliced.
+        best = min(window, key=lambda pos: (row_profile[pos], abs(pos - target)))
+        splits.append(best / PROFILE_SIZE)
+    return splits
+
+
+def plan_tiles(image: Image.Image, layout: str, count: int) -> list[Tile]:
+    width, height = image.size
+    count = max(2, count)
+    col_profile, row_profile = _ink_profiles(image)
+
+    if layout in {"detect", "columns"}:
+        splits = _detect_column_splits(col_profile, count)
+        if splits:
+            edges = [0, *(int(width * s) for s in splits), width]
+            return [Tile(x1=a, y1=0, x2=b, y2=height) for a, b in zip(edges, edges[1:], strict=False)]
+        if layout == "columns":
+            edges = [int(width * i / count) for i in range(count + 1)]
+            return [Tile(x1=a, y1=0, x2=b, y2=height) for a, b in zip(edges, edges[1:], strict=False)]
+
+    edges = [0, *(int(height * s) for s in _band_splits(row_profile, count)), height]
+    return [Tile(x1=0, y1=a, x2=width, y2=b) for a, b in zip(edges, edges[1:], strict=False) if b > a]
+
+
+def crop_tiles(image_path: Path, tiles: list[Tile], output_dir: Path) -> list[Path]:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    tile_paths: list[Path] = []
+    with Image.open(image_path) as image:
+        for idx, tile in enumerate(tiles, start=1):
+            out_path = output_dir / f"{image_path.stem}-t{idx:02d}.png"
+            image.crop((tile.x1, tile.y1, tile.x2, tile.y2)).save(out_path)
+            tile_paths.append(out_path)
+    return tile_paths
+
+
+def _prepare_tiles(
+    image_path: Path,
+    options: TileOptions,
+    tiles_dir: Path,
+) -> tuple[int, int, list[Tile], list[Path]]:
+    with Image.open(image_path) as image:
+        img_w, img_h = image.size
+        tiles = plan_tiles(image, layout=options.layout, count=options.count)
+    return img_w, img_h, tiles, crop_tiles(image_path, tiles, tiles_dir)
+
+
+async def ocr_page_tiles(
+    image_path: Path,
+    tile_client: OCRClient,
+    options: TileOptions,
+    tiles_dir: Path,
+) -> dict[str, Any]:
+    """OCR a page as independent tiles and return a composite raw result.
+
+    The composite keeps every tile's raw response together with the tile's
+    pixel box; `normalize_ocr_result` offsets the tile blocks into page
+    coordinates.
+    """
+    img_w, img_h, tiles, tile_paths = await asyncio.to_thread(_prepare_tiles, image_path, options, tiles_dir)
+    raws = await tile_client.parse_images(tile_paths)
+    return {
+        "img_w": img_w,
+        "img_h": img_h,
+        "tiles": [{"bbox": tile.bbox, "raw": raw} for tile, raw in zip(tiles, raws, strict=True)],
+    }
+
+
+async def ocr_pages_tiles(
+    image_paths: list[Path],
+    ocr_client: OCRClient,
+    options: TileOptions,
+    tiles_dir: Path,
+) -> list[dict[str, Any]]:
+    # One derived client for all pages so tile requests share a single
+    # concurrency limit and the smaller token budget.
+    tile_client = ocr_client.derive(max_tokens=options.max_tokens, concurrency=options.concurrency)
+    return list(
+        await asyncio.gather(
+            *(ocr_page_tiles(path, tile_client, options=options, tiles_dir=tiles_dir) for path in image_paths)
+        )
+    )
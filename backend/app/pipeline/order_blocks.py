@@ -1,25 +1,43 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import math
+from bisect import bisect_right
+from dataclasses import dataclass, replace
+from itertools import accumulate
 
-from app.models.schemas import Block, PageResult
+from app.models.records import BlockRecord, PageRecord
 
 
-@dataclass(frozen=True)
+# A block wider than this share of the content width cannot sit in one column.
+SPANNING_WIDTH_RATIO = 0.6
+# Minimum empty vertical strip (share of content width) that counts as a gutter.
+GUTTER_MIN_WIDTH_RATIO = 0.015
+GUTTER_HISTOGRAM_BINS = 256
+# Histogram bins covered by less than this share of the densest bin count as empty.
+GUTTER_COVERAGE_RATIO = 0.05
+READING_ORDER_ENGINES = ("columns", "two_column")
+
+
+@dataclass(frozen=True, slots=True)
 class _SortableBlock:
-    block: Block
+    block: BlockRecord
     x1: float
     y1: float
     x2: float
+    y2: float
 
     @property
     def center_x(self) -> float:
         return (self.x1 + self.x2) / 2.0
 
+    @property
+    def center_y(self) -> float:
+        return (self.y1 + self.y2) / 2.0
 
-def _to_sortable(block: Block) -> _SortableBlock:
-    x1, y1, x2, _ = block.bbox
-    return _SortableBlock(block=block, x1=x1, y1=y1, x2=x2)
+
+def _to_sortable(block: BlockRecord) -> _SortableBlock:
+    x1, y1, x2, y2 = block.bbox
+    return _SortableBlock(block=block, x1=x1, y1=y1, x2=x2, y2=y2)
 
 
 def _estimate_page_width(items: list[_SortableBlock], page_width: int) -> float:
@@ -58,25 +76,154 @@ def _choose_two_column_split(items: list[_SortableBlock], estimated_width: float
     return split_x
 
 
-def _sort_in_reading_order(blocks: list[Block], page_width: int) -> list[Block]:
-    items = [_to_sortable(block) for block in blocks]
-    if not items:
-        return []
-
+def _sort_two_column(items: list[_SortableBlock], page_width: int) -> list[_SortableBlock]:
     estimated_width = _estimate_page_width(items, page_width)
     split_x = _choose_two_column_split(items, estimated_width)
     if split_x is None:
-        ordered = sorted(items, key=lambda item: (item.y1, item.x1))
-        return [item.block for item in ordered]
+        return sorted(items, key=lambda item: (item.y1, item.x1))
 
     left_items = [item for item in items if item.center_x <= split_x]
     right_items = [item for item in items if item.center_x > split_x]
     left_sorted = sorted(left_items, key=lambda item: (item.y1, item.x1))
     right_sorted = sorted(right_items, key=lambda item: (item.y1, item.x1))
-    return [item.block for item in [*left_sorted, *right_sorted]]
+    return [*left_sorted, *right_sorted]
+
+
+def _find_gutters(items: list[_SortableBlock], min_gap_ratio: float) -> list[tuple[float, float]]:
+    """Return x-intervals that are (almost) empty in the height-weighted coverage histogram.
+
+    Weighting by block height keeps short strays from closing a gutter that
+    the column bodies clearly leave open. Strays that still register (a centred
+    page number stacked with a centred author line) split the gutter in two;
+    those halves are merged again by `_merge_split_gutters`.
+    """
+    x_min = min(item.x1 for item in items)
+    x_max = max(item.x2 for item in items)
+    span = x_max - x_min
+    if span <= 0:
+        return []
+
+    scale = GUTTER_HISTOGRAM_BINS / span
+    diff = [0.0] * (GUTTER_HISTOGRAM_BINS + 1)
+    for item in items:
+        start = min(GUTTER_HISTOGRAM_BINS - 1, max(0, int((item.x1 - x_min) * scale)))
+        end = min(GUTTER_HISTOGRAM_BINS, max(start + 1, math.ceil((item.x2 - x_min) * scale)))
+        height = max(0.0, item.y2 - item.y1)
+        diff[start] += height
+        diff[end] -= height
+
+    coverage = list(accumulate(diff[:GUTTER_HISTOGRAM_BINS]))
+    threshold = max(coverage) * GUTTER_COVERAGE_RATIO
+    if threshold <= 0:
+        return []
+
+    min_bins = max(1, int(GUTTER_HISTOGRAM_BINS * min_gap_ratio))
+    gutters: list[tuple[float, float]] = []
+    run_start: int | None = None
+    for pos, value in enumerate(coverage):
+        if value <= threshold:
+            if run_start is None:
+                run_start = pos
+            continue
+        # Runs touching the left edge are margins, not gutters.
+        if run_start is not None and run_start > 0 and pos - run_start >= min_bins:
+            gutters.append((x_min + run_start / scale, x_min + pos / scale))
+        run_start = None
+    return _merge_split_gutters(items, gutters)
+
+
+def _merge_split_gutters(
+    items: list[_SortableBlock], gutters: list[tuple[float, float]]
+) -> list[tuple[float, float]]:
+    """Join neighbouring gutters whose separating strip is covered only by blocks
+    centred between them, i.e. narrower than the gap and belonging to no column."""
+    if len(gutters) < 2:
+        return gutters
+    merged = [gutters[0]]
+    for left, right in gutters[1:]:
+        prev_left, prev_right = merged[-1]
+        bridge = [item for item in items if item.x1 < left and item.x2 > prev_right]
+        if (
+            bridge
+            and left - prev_right < (prev_right - prev_left) + (right - left)
+            and all(prev_left <= item.center_x <= right for item in bridge)
+        ):
+            merged[-1] = (prev_left, right)
+        else:
+            merged.append((left, right))
+    return merged
+
+
+def _breaks_columns(item: _SortableBlock, gutters: list[tuple[float, float]]) -> bool:
+    # Blocks bridging a gutter, or centred inside one (page numbers), belong to no column.
+    return any(
+        (item.x1 < left and item.x2 > right) or left <= item.center_x <= right
+        for left, right in gutters
+    )
+
+
+def _sort_columns(items: list[_SortableBlock], page_width: int) -> list[_SortableBlock]:
+    """Order blocks for layouts with any number of columns.
+
+    Gutters are found from the x-coverage histogram of the narrow blocks;
+    blocks that cross a gutter (titles, wide figures, full-width tables) act
+    as section breaks. Within each section the columns are read left to right,
+    each one recursively so nested column layouts are handled as well.
+    """
+    if len(items) < 2:
+        return list(items)
+
+    width = _estimate_page_width(items, page_width)
+    narrow = [item for item in items if (item.x2 - item.x1) < width * SPANNING_WIDTH_RATIO]
+    gutters = _find_gutters(narrow, min_gap_ratio=GUTTER_MIN_WIDTH_RATIO) if len(narrow) >= 2 else []
+    if not gutters:
+        return sorted(items, key=lambda item: (item.y1, item.x1))
+
+    spanning = sorted(
+        (item for item in items if _breaks_columns(item, gutters)),
+        key=lambda item: (item.y1, item.x1),
+    )
+    span_centers = [item.center_y for item in spanning]
+    gutter_centers = [(left + right) / 2.0 for left, right in gutters]
+
+    # sections[s][c]: blocks above spanning block s (or below the last one) in column c.
+    sections: list[list[list[_SortableBlock]]] = [
+        [[] for _ in range(len(gutters) + 1)] for _ in range(len(spanning) + 1)
+    ]
+    for item in items:
+        if _breaks_columns(item, gutters):
+            continue
+        section = bisect_right(span_centers, item.center_y)
+        column = bisect_right(gutter_centers, item.center_x)
+        sections[section][column].append(item)
+
+    ordered: list[_SortableBlock] = []
+    for section_index, columns in enumerate(sections):
+        for column_items in columns:
+            if len(column_items) == len(items):
+                # Every block landed in one group; recursing would not make progress.
+                ordered.extend(sorted(column_items, key=lambda item: (item.y1, item.x1)))
+            else:
+                ordered.extend(_sort_columns(column_items, page_width=0))
+        if section_index < len(spanning):
+            ordered.append(spanning[section_index])
+    return ordered
+
+
+def _sort_in_reading_order(
+    blocks: list[BlockRecord],
+    page_width: int,
+    engine: str = "columns",
+) -> list[BlockRecord]:
+    items = [_to_sortable(block) for block in blocks]
+    if not items:
+        return []
+    if engine == "two_column":
+        return [item.block for item in _sort_two_column(items, page_width)]
+    return [item.block for item in _sort_columns(items, page_width)]
 
 
-def order_page_blocks(page: PageResult) -> PageResult:
-    ordered = _sort_in_reading_order(page.blocks, page.img_w)
-    return page.model_copy(update={"blocks": ordered})
+def order_page_blocks(page: PageRecord, engine: str = "columns") -> PageRecord:
+    ordered = _sort_in_reading_order(page.blocks, page.img_w, engine=engine)
+    return replace(page, blocks=ordered)
 
@@ -1,25 +1,142 @@
 from __future__ import annotations
 
+import math
+import re
+from dataclasses import dataclass
 from pathlib import Path
 
 import fitz
 
+POINTS_PER_INCH = 72.0
+FONT_SIZE_PERCENTILE = 0.2
+SCAN_IMAGE_MIN_COVERAGE = 0.5
+HYPHEN_BREAK_RE = re.compile(r"(?<=[^\W\d_])-\n(?=[^\W\d_])")
+LINE_BREAK_RE = re.compile(r"\s*\n\s*")
 
-def render_pdf_to_images(pdf_path: Path, output_dir: Path, dpi: int) -> list[Path]:
+
+@dataclass(frozen=True)
+class AdaptiveDpi:
+    target_pixels: int = 2_500_000
+    min_dpi: int = 100
+    max_dpi: int = 600
+    min_font_px: float = 20.0
+
+
+@dataclass(frozen=True)
+class RenderedPage:
+    path: Path
+    dpi: int
+
+
+def _estimate_font_size(page: fitz.Page) -> float | None:
+    sizes: list[float] = []
+    for block in page.get_text("dict").get("blocks", []):
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                if span.get("text", "").strip() and span.get("size", 0) > 0:
+                    sizes.append(float(span["size"]))
+    if not sizes:
+        return None
+    sizes.sort()
+    # A low percentile rather than the median: footnotes and captions must stay legible.
+    return sizes[int((len(sizes) - 1) * FONT_SIZE_PERCENTILE)]
+
+
+def _scan_image_dpi(page: fitz.Page) -> float | None:
+    page_area = page.rect.width * page.rect.height
+    best: float | None = None
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info.get("bbox", (0, 0, 0, 0))
+        width_pt, height_pt = x1 - x0, y1 - y0
+        if width_pt <= 0 or height_pt <= 0 or page_area <= 0:
+            continue
+        if (width_pt * height_pt) / page_area < SCAN_IMAGE_MIN_COVERAGE:
+            continue
+        dpi = info.get("width", 0) / (width_pt / POINTS_PER_INCH)
+        best = max(best or 0.0, dpi)
+    return best
+
+
+def choose_page_dpi(page: fitz.Page, options: AdaptiveDpi) -> int:
+    area_sq_in = (page.rect.width / POINTS_PER_INCH) * (page.rect.height / POINTS_PER_INCH)
+    if area_sq_in <= 0:
+        return options.max_dpi
+    dpi = math.sqrt(options.target_pixels / area_sq_in)
+
+    font_size = _estimate_font_size(page)
+    if font_size is not None:
+        dpi = max(dpi, options.min_font_px * POINTS_PER_INCH / font_size)
+
+    scan_dpi = _scan_image_dpi(page)
+    if scan_dpi is not None:
+        # Rendering a scanned page above its native resolution adds pixels, not detail.
+        dpi = min(dpi, scan_dpi)
+
+    return int(max(options.min_dpi, min(options.max_dpi, round(dpi))))
+
+
+def count_pdf_pages(pdf_path: Path) -> int:
+    with fitz.open(pdf_path) as doc:
+        return doc.page_count
+
+
+def render_pdf_pages(
+    pdf_path: Path,
+    output_dir: Path,
+    dpi: int,
+    adaptive: AdaptiveDpi | None = None,
+) -> list[RenderedPage]:
     if dpi <= 0:
         raise ValueError("dpi must be a positive integer.")
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
     output_dir.mkdir(parents=True, exist_ok=True)
-    rendered: list[Path] = []
+    rendered: list[RenderedPage] = []
 
     with fitz.open(pdf_path) as doc:
         for index, page in enumerate(doc, start=1):
-            pix = page.get_pixmap(dpi=dpi, alpha=False)
+            page_dpi = choose_page_dpi(page, adaptive) if adaptive is not None else dpi
+            pix = page.get_pixmap(dpi=page_dpi, alpha=False)
             out_path = output_dir / f"{index:03d}.png"
             pix.save(out_path)
-            rendered.append(out_path)
+            rendered.append(RenderedPage(path=out_path, dpi=page_dpi))
 
     return rendered
 
+
+def extract_text_layer(pdf_path: Path, pages: list[int], dpis: list[int]) -> list[dict[str, object]]:
+    """Text blocks embedded in the PDF, shaped like an OCR response.
+
+    Boxes are scaled to the rendered image (`dpis`, per page) so the result can
+    stand in for OCR output; scanned pages simply come back without blocks.
+    """
+    raws: list[dict[str, object]] = []
+    with fitz.open(pdf_path) as doc:
+        for page_number, dpi in zip(pages, dpis, strict=True):
+            page = doc[page_number - 1]
+            scale = dpi / POINTS_PER_INCH
+            blocks: list[dict[str, object]] = []
+            for x0, y0, x1, y1, text, _number, kind in page.get_text("blocks", sort=True):
+                if kind != 0 or not text.strip():
+                    continue
+                blocks.append(
+                    {
+                        "type": "paragraph",
+                        "bbox": [x0 * scale, y0 * scale, x1 * scale, y1 * scale],
+                        "text": LINE_BREAK_RE.sub(" ", HYPHEN_BREAK_RE.sub("", text.strip())),
+                    }
+                )
+            raws.append(
+                {
+                    "source": "text_layer",
+                    "img_w": round(page.rect.width * scale),
+                    "img_h": round(page.rect.height * scale),
+                    "blocks": blocks,
+                }
+            )
+    return raws
+
+
+def render_pdf_to_images(pdf_path: Path, output_dir: Path, dpi: int) -> list[Path]:
+    return [page.path for page in render_pdf_pages(pdf_path, output_dir, dpi)]
@@ -0,0 +1,267 @@
+"""Re-run the stages after OCR from the raw responses stored in `ocr/NNN.json`.
+
+Pages are rebuilt with the current `normalize_ocr_record` and
+`order_page_blocks`, translated through the translation result cache and
+written out again (markdown, optionally the translated PDF). By default no
+LLM calls are made, so a replay is deterministic and takes seconds: blocks
+whose prompt is not in the cache (text or context changed, cache evicted or
+disabled) would keep their source text. The new output is therefore built in
+a staging directory and only swapped in when every prompt hit the cache;
+otherwise the job's current output is kept and the misses are reported.
+`allow_llm` translates missing blocks instead, `force` swaps in regardless.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import time
+from dataclasses import dataclass, field, replace
+from functools import partial
+from pathlib import Path
+
+from app.clients.translation_client import build_translation_client
+from app.core.config import Settings
+from app.models.records import PageRecord
+from app.models.schemas import JobBudget, JobStatus
+from app.pipeline.budget import BudgetedTranslationClient, JobBudgetTracker
+from app.pipeline.glossary import load_glossary
+from app.pipeline.ocr_page import load_stored_ocr_pages
+from app.pipeline.order_blocks import order_page_blocks
+from app.pipeline.run_job import chunk_token_budget, finish_translated_pdf
+from app.pipeline.stitch import StitchIndex, plan_stitches
+from app.pipeline.to_markdown import write_page_markdown, write_result_markdown
+from app.pipeline.translate import translate_page_blocks
+from app.pipeline.translated_pdf import overlay_blocks, render_translated_page
+from app.store.artifacts import compress_job_artifacts
+from app.store.joblog import JobLog
+from app.store.paths import JobPaths, build_job_paths
+from app.store.state import load_meta, save_meta, update_meta
+from app.utils.executors import run_cpu_bound
+from app.utils.tokens import get_token_estimator
+
+REPLAY_STAGES = ("markdown", "pdf")
+STAGING_DIR = "replay.tmp"
+
+
+class ReplayError(RuntimeError):
+    pass
+
+
+@dataclass
+class ReplayResult:
+    job_id: str
+    pages: int = 0
+    blocks: int = 0
+    # Blocks without a translation in the rebuilt output.
+    untranslated: int = 0
+    # Translation prompts missing from the cache (always 0 with allow_llm).
+    cache_misses: int = 0
+    # False when the job's existing output was kept because of cache misses.
+    applied: bool = False
+    stages: list[str] = field(default_factory=list)
+    elapsed_sec: float = 0.0
+    error: str | None = None
+
+
+def rebuild_pages(ocr_dir: Path, engine: str) -> list[PageRecord]:
+    """Stored raw OCR -> ordered page records. Pure CPU work, run in the render pool."""
+    return [order_page_blocks(page, engine=engine) for page in load_stored_ocr_pages(ocr_dir)]
+
+
+def _staging_paths(paths: JobPaths) -> JobPaths:
+    staging = paths.job_dir / STAGING_DIR
+    return replace(
+        paths,
+        md_dir=staging / "md",
+        result_md=staging / "md" / paths.result_md.name,
+        pdf_dir=staging / "pdf",
+        result_pdf=staging / "pdf" / paths.result_pdf.name,
+    )
+
+
+def _swap_in(staged: Path, live: Path) -> None:
+    """Replace directory `live` with `staged`; readers see one or the other except for a rename."""
+    old = live.with_name(f"{live.name}.old")
+    shutil.rmtree(old, ignore_errors=True)
+    if live.exists():
+        os.replace(live, old)
+    os.replace(staged, live)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def replayable_job_ids(settings: Settings) -> list[str]:
+    jobs_root = build_job_paths(job_id="_", settings=settings).jobs_root
+    if not jobs_root.exists():
+        return []
+    job_ids: list[str] = []
+    for job_dir in sorted(jobs_root.iterdir()):
+        paths = build_job_paths(job_id=job_dir.name, settings=settings)
+        try:
+            if load_meta(paths.meta_json).status == JobStatus.SUCCEEDED:
+                job_ids.append(job_dir.name)
+        except (OSError, ValueError):
+            continue
+    return job_ids
+
+
+async def replay_job(
+    job_id: str,
+    settings: Settings,
+    stages: tuple[str, ...] = ("markdown",),
+    allow_llm: bool = False,
+    force: bool = False,
+) -> ReplayResult:
+    started = time.monotonic()
+    result = ReplayResult(job_id=job_id, stages=[stage for stage in REPLAY_STAGES if stage in stages])
+    paths = build_job_paths(job_id=job_id, settings=settings)
+    if not paths.meta_json.exists():
+        raise ReplayError(f"job not found: {job_id}")
+    meta = await asyncio.to_thread(load_meta, paths.meta_json)
+    # Queued/running jobs are still writing these files; failed ones may lack OCR for some pages.
+    if meta.status != JobStatus.SUCCEEDED:
+        raise ReplayError(f"job {job_id} is {meta.status.value}; only succeeded jobs can be replayed")
+
+    pages = await run_cpu_bound(
+        settings.render_executor, settings.render_processes, rebuild_pages, paths.ocr_dir, settings.reading_order_engine
+    )
+    if not pages:
+        raise ReplayError(f"job {job_id} has no stored OCR output")
+
+    job_log = JobLog(paths.job_log, job_id=job_id)
+    staged = _staging_paths(paths)
+    shutil.rmtree(staged.md_dir.parent, ignore_errors=True)
+    pdf_tasks: list[asyncio.Task[Path]] = []
+    try:
+        # The stored glossary, not a new one: the prompts must match the original run to hit the cache.
+        glossary = await asyncio.to_thread(load_glossary, paths.glossary_json)
+        estimator = await asyncio.to_thread(get_token_estimator, settings.translate_tokenizer)
+        # Every generation that reaches the backend is a cache miss; this budget turns them all away.
+        tracker = None if allow_llm else JobBudgetTracker(JobBudget(max_llm_calls=0), created_at=meta.created_at)
+        client = build_translation_client(
+            settings,
+            wrap_backend=(
+                partial(BudgetedTranslationClient, tracker=tracker, estimator=estimator)
+                if tracker is not None
+                else None
+            ),
+        )
+        stitches = StitchIndex(plan_stitches(pages) if settings.translate_stitch_enabled else [])
+        chunk_tokens = chunk_token_budget(settings, estimator, glossary) if settings.translate_chunk_tokens > 0 else 0
+
+        page_markdowns: list[str] = []
+        # In page order: stitched paragraphs are translated by the page holding their first block.
+        for page in pages:
+            page = await translate_page_blocks(
+                page,
+                client=client,
+                max_chars=settings.translate_max_chars,
+                glossary=glossary,
+                concurrency=settings.translate_concurrency,
+                stitches=stitches,
+                max_tokens=chunk_tokens,
+                estimator=estimator if chunk_tokens else None,
+            )
+            texts = [block for block in page.blocks if block.text.strip()]
+            result.blocks += len(texts)
+            result.untranslated += sum(1 for block in texts if not (block.translated_text or "").strip())
+            if "markdown" in stages:
+                page_markdowns.append(
+                    await asyncio.to_thread(write_page_markdown, page, staged.md_dir / f"{page.page:03d}.md")
+                )
+            if "pdf" in stages:
+                pdf_tasks.append(
+                    asyncio.create_task(
+                        run_cpu_bound(
+                            settings.render_executor,
+                            settings.render_processes,
+                            render_translated_page,
+                            pdf_path=paths.input_pdf,
+                            page_number=page.page,
+                            img_w=page.img_w,
+                            img_h=page.img_h,
+                            dpi=page.dpi,
+                            blocks=overlay_blocks(page),
+                            output_path=staged.pdf_dir / f"{page.page:03d}.pdf",
+                            font=settings.pdf_output_font,
+                        )
+                    )
+                )
+        result.pages = len(pages)
+        result.cache_misses = tracker.refused_calls if tracker is not None else 0
+
+        if "markdown" in stages:
+            await asyncio.to_thread(write_result_markdown, page_markdowns, staged.result_md)
+            await asyncio.to_thread(compress_job_artifacts, staged, settings)
+        has_pdf = bool(pdf_tasks) and await finish_translated_pdf(staged, job_log, pdf_tasks, settings)
+
+        # Swapping in output with cache misses would replace stored translations with source text.
+        result.applied = result.cache_misses == 0 or force
+        if result.applied:
+            if "markdown" in stages:
+                await asyncio.to_thread(_swap_in, staged.md_dir, paths.md_dir)
+            if has_pdf:
+                await asyncio.to_thread(_swap_in, staged.pdf_dir, paths.pdf_dir)
+
+        result.elapsed_sec = round(time.monotonic() - started, 3)
+        if result.applied:
+            job_log.info(
+                f"Replay ({', '.join(result.stages)}): {result.pages} pages, "
+                f"{result.untranslated}/{result.blocks} blocks untranslated, {result.cache_misses} cache misses",
+                stage="replay",
+                untranslated=result.untranslated,
+                blocks=result.blocks,
+                cache_misses=result.cache_misses,
+            )
+        else:
+            job_log.warning(
+                f"Replay ({', '.join(result.stages)}): {result.cache_misses} translations missing from the cache; "
+                "existing output kept",
+                stage="replay",
+                cache_misses=result.cache_misses,
+            )
+        extra: dict[str, object] = {
+            **meta.extra,
+            "replay": {
+                "stages": result.stages,
+                "untranslated": result.untranslated,
+                "blocks": result.blocks,
+                "cache_misses": result.cache_misses,
+                "applied": result.applied,
+                "allow_llm": allow_llm,
+            },
+        }
+        if has_pdf and result.applied:
+            extra["result_pdf"] = True
+        await asyncio.to_thread(
+            save_meta, paths.meta_json, update_meta(meta, extra=extra), settings.artifact_pretty_json
+        )
+    finally:
+        for task in pdf_tasks:
+            if not task.done():
+                task.cancel()
+        await job_log.close()
+        await asyncio.to_thread(shutil.rmtree, staged.md_dir.parent, ignore_errors=True)
+    return result
+
+
+async def replay_jobs(
+    job_ids: list[str],
+    settings: Settings,
+    stages: tuple[str, ...] = ("markdown",),
+    allow_llm: bool = False,
+    concurrency: int = 8,
+    force: bool = False,
+) -> list[ReplayResult]:
+    """Replay many jobs at once; a failing job is reported in its result, not raised."""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def one(job_id: str) -> ReplayResult:
+        async with semaphore:
+            try:
+                return await replay_job(job_id, settings, stages=stages, allow_llm=allow_llm, force=force)
+            except (ReplayError, OSError, ValueError) as exc:
+                return ReplayResult(job_id=job_id, error=str(exc))
+
+    return list(await asyncio.gather(*(one(job_id) for job_id in job_ids)))
@@ -1,60 +1,155 @@
 from __future__ import annotations
 
-import traceback
-from datetime import UTC, datetime
+import asyncio
+import time
+from functools import partial
+from pathlib import Path
 
 from app.clients.ocr_client import OCRClient
-from app.clients.ollama_client import OllamaClient
+from app.clients.translation_client import (
+    NUM_PREDICT_HEADROOM_TOKENS,
+    TranslationClient,
+    TranslationClientError,
+    build_translation_client,
+)
 from app.core.config import Settings, get_settings
+from app.core.metrics import GenerationStats, job_generation_stats
+from app.core.profiling import JobProfiler, top_frames, write_folded
+from app.models.records import PageRecord
 from app.models.schemas import JobMeta, JobStatus
-from app.pipeline.ocr_page import run_ocr_for_page
+from app.pipeline.budget import BudgetedTranslationClient, JobBudgetTracker, is_low_priority
+from app.pipeline.glossary import extract_glossary_terms, resolve_glossary, save_glossary
+from app.pipeline.ocr_page import run_ocr_for_pages, run_text_layer_for_pages
+from app.pipeline.ocr_tiles import TileOptions
 from app.pipeline.order_blocks import order_page_blocks
-from app.pipeline.render_pdf import render_pdf_to_images
+from app.pipeline.render_pdf import AdaptiveDpi, render_pdf_pages
+from app.pipeline.scheduling import get_stage_gates
+from app.pipeline.stitch import StitchIndex, plan_stitches
 from app.pipeline.to_markdown import write_page_markdown, write_result_markdown
-from app.pipeline.translate import translate_page_blocks
+from app.pipeline.translate import (
+    SpeculativeTranslations,
+    build_translation_prompt,
+    translate_page_blocks,
+    translate_text,
+)
+from app.pipeline.translated_pdf import assemble_translated_pdf, overlay_blocks, render_translated_page
+from app.store.artifacts import compress_job_artifacts, prune_page_images
+from app.store.cache import get_result_caches
+from app.store.joblog import JobLog
 from app.store.paths import JobPaths, build_job_paths
 from app.store.state import load_meta, save_meta, update_meta
+from app.utils.executors import run_cpu_bound
+from app.utils.tokens import TokenEstimator, get_token_estimator
 
+# Per-block progress is written to meta.json at most this often (the last block always is).
+BLOCK_PROGRESS_SAVE_INTERVAL_SEC = 1.0
+MIN_CHUNK_TOKENS = 64
 
-def _utc_now_iso() -> str:
-    return datetime.now(UTC).isoformat()
 
-
-def _append_job_log(paths: JobPaths, message: str) -> None:
-    line = f"{_utc_now_iso()} {message.rstrip()}\n"
-    paths.job_log.parent.mkdir(parents=True, exist_ok=True)
-    with paths.job_log.open("a", encoding="utf-8") as fp:
-        fp.write(line)
-
-
-def _save(paths: JobPaths, meta: JobMeta) -> JobMeta:
-    save_meta(paths.meta_json, meta)
+async def _save(paths: JobPaths, meta: JobMeta, settings: Settings) -> JobMeta:
+    await asyncio.to_thread(save_meta, paths.meta_json, meta, settings.artifact_pretty_json)
     return meta
 
 
-def _progress_for_page(page_index: int, total_pages: int) -> float:
+def _progress_for_ocr(page_index: int, total_pages: int) -> float:
     if total_pages <= 0:
-        return 0.2
-    return min(0.95, 0.2 + (0.75 * page_index / total_pages))
+        return 0.1
+    return min(0.4, 0.1 + (0.3 * page_index / total_pages))
 
 
 def _progress_for_page_phase(page_index: int, total_pages: int, phase: float) -> float:
     if total_pages <= 0:
-        return 0.2
+        return 0.45
     clamped_phase = max(0.0, min(1.0, phase))
-    page_base = 0.2 + (0.75 * (page_index - 1) / total_pages)
-    page_span = 0.75 / total_pages
+    page_base = 0.45 + (0.5 * (page_index - 1) / total_pages)
+    page_span = 0.5 / total_pages
     return min(0.95, page_base + (page_span * clamped_phase))
 
 
+async def _warm_up_translation(job_log: JobLog, client: TranslationClient) -> None:
+    try:
+        await client.warm_up()
+    except TranslationClientError as exc:
+        job_log.warning(f"Translation model warm-up failed: {exc}", stage="warmup")
+
+
+async def _build_glossary(
+    paths: JobPaths,
+    job_log: JobLog,
+    pages: list[PageRecord],
+    client: TranslationClient,
+    settings: Settings,
+) -> dict[str, str]:
+    if not settings.translate_glossary_enabled:
+        return {}
+    terms = extract_glossary_terms(pages, max_terms=settings.translate_glossary_max_terms)
+    if not terms:
+        job_log.info("Glossary: no recurring terms", stage="glossary")
+        return {}
+    try:
+        glossary = await resolve_glossary(terms, client=client)
+    except TranslationClientError as exc:
+        job_log.warning(f"Glossary skipped: {exc}", stage="glossary")
+        return {}
+    await asyncio.to_thread(save_glossary, paths.glossary_json, glossary, settings.artifact_pretty_json)
+    job_log.info(
+        f"Glossary: {len(glossary)}/{len(terms)} terms resolved",
+        stage="glossary",
+        terms=len(terms),
+        resolved=len(glossary),
+    )
+    return glossary
+
+
+def chunk_token_budget(settings: Settings, estimator: TokenEstimator, glossary: dict[str, str]) -> int:
+    """TRANSLATE_CHUNK_TOKENS, shrunk when prompt + chunk + output would overflow OLLAMA_NUM_CTX."""
+    budget = settings.translate_chunk_tokens
+    if settings.ollama_num_ctx:
+        overhead = estimator.count(build_translation_prompt("", glossary)) + NUM_PREDICT_HEADROOM_TOKENS
+        fits = int((settings.ollama_num_ctx - overhead) / (1.0 + max(0.0, settings.translate_output_token_ratio)))
+        budget = min(budget, max(MIN_CHUNK_TOKENS, fits))
+    return budget
+
+
+async def finish_translated_pdf(
+    paths: JobPaths,
+    job_log: JobLog,
+    page_tasks: list[asyncio.Task[Path]],
+    settings: Settings,
+) -> bool:
+    """Wait for the page renders and assemble `pdf/result.pdf`; the markdown result does not depend on it."""
+    results = await asyncio.gather(*page_tasks, return_exceptions=True)
+    failed = [result for result in results if isinstance(result, BaseException)]
+    if failed:
+        job_log.warning(f"Translated PDF skipped: {len(failed)} pages failed ({failed[0]})", stage="pdf")
+        return False
+    page_paths = [paths.pdf_dir / f"{idx:03d}.pdf" for idx in range(1, len(page_tasks) + 1)]
+    pdf_bytes = await run_cpu_bound(
+        settings.render_executor, settings.render_processes, assemble_translated_pdf, page_paths
+    )
+    await asyncio.to_thread(paths.result_pdf.write_bytes, pdf_bytes)
+    job_log.info(f"Translated PDF: {len(page_paths)} pages, {len(pdf_bytes)} bytes", stage="pdf")
+    return True
+
+
 async def run_job(job_id: str, settings: Settings | None = None) -> None:
     settings = settings or get_settings()
     paths = build_job_paths(job_id=job_id, settings=settings)
-    meta = load_meta(paths.meta_json)
-    _append_job_log(paths, f"Job started: {job_id}")
+    meta = await asyncio.to_thread(load_meta, paths.meta_json)
+    job_log = JobLog(paths.job_log, job_id=job_id)
+    job_log.info(f"Job started: {job_id}", stage="started")
+    speculative: SpeculativeTranslations | None = None
+    pdf_tasks: list[asyncio.Task[Path]] = []
+    generation_stats = GenerationStats()
+    stats_token = job_generation_stats.set(generation_stats)
+    profiler = (
+        JobProfiler(settings.profile_interval_sec) if settings.profile_jobs or meta.extra.get("profile") else None
+    )
 
     try:
-        meta = _save(
+        if profiler is not None:
+            profiler.start()
+        meta = await _save(
             paths,
             update_meta(
                 meta,
@@ -63,17 +158,66 @@ async def run_job(job_id: str, settings: Settings | None = None) -> None:
                 progress=0.05,
                 error=None,
             ),
+            settings,
+        )
+        budget = (
+            JobBudgetTracker(meta.budget, created_at=meta.created_at, ocr_share=settings.job_budget_ocr_share)
+            if meta.budget is not None and not meta.budget.is_empty()
+            else None
+        )
+        # Budgets count tokens even when chunking by characters.
+        estimator = (
+            await asyncio.to_thread(get_token_estimator, settings.translate_tokenizer)
+            if settings.translate_chunk_tokens > 0 or budget is not None
+            else None
         )
-        _append_job_log(paths, "Rendering PDF pages")
-        page_images = render_pdf_to_images(
+        translation_client = build_translation_client(
+            settings,
+            wrap_backend=(
+                partial(BudgetedTranslationClient, tracker=budget, estimator=estimator)
+                if budget is not None and estimator is not None
+                else None
+            ),
+        )
+        warm_up_task = (
+            asyncio.create_task(_warm_up_translation(job_log, translation_client))
+            if settings.ollama_warmup_enabled
+            else None
+        )
+
+        job_log.info("Rendering PDF pages", stage="rendering")
+        adaptive_dpi = (
+            AdaptiveDpi(
+                target_pixels=settings.render_target_pixels,
+                min_dpi=settings.render_min_dpi,
+                max_dpi=settings.render_max_dpi,
+                min_font_px=settings.render_min_font_px,
+            )
+            if settings.render_dpi_mode == "adaptive"
+            else None
+        )
+        # PyMuPDF holds the GIL while rasterizing, so it runs in a worker process.
+        rendered_pages = await run_cpu_bound(
+            settings.render_executor,
+            settings.render_processes,
+            render_pdf_pages,
             pdf_path=paths.input_pdf,
             output_dir=paths.pages_dir,
             dpi=settings.render_dpi,
+            adaptive=adaptive_dpi,
         )
-        if not page_images:
+        if not rendered_pages:
             raise RuntimeError("No pages were rendered from PDF.")
-        _append_job_log(paths, f"Rendered pages: {len(page_images)}")
+        page_images = [page.path for page in rendered_pages]
+        page_dpis = [page.dpi for page in rendered_pages]
+        job_log.info(
+            f"Rendered pages: {len(rendered_pages)} (dpi {min(page_dpis)}-{max(page_dpis)})",
+            stage="rendering",
+            pages=len(rendered_pages),
+        )
+        await job_log.flush()
 
+        caches = get_result_caches(settings)
         ocr_client = OCRClient(
             base_url=settings.ocr_base_url,
             timeout_sec=settings.ocr_timeout_sec,
@@ -82,83 +226,283 @@ async def run_job(job_id: str, settings: Settings | None = None) -> None:
             prompt=settings.ocr_prompt,
             sdk_entrypoint=settings.ocr_sdk_entrypoint,
             max_tokens=settings.ocr_max_tokens,
+            batch_size=settings.ocr_batch_size,
+            concurrency=settings.ocr_concurrency,
+            cache=caches.ocr if caches else None,
+            stream=settings.ocr_stream,
         )
-        ollama_client = OllamaClient(
-            base_url=settings.ollama_base_url,
-            model=settings.ollama_model,
-            timeout_sec=settings.ollama_timeout_sec,
+
+        tile_options = TileOptions(
+            mode=settings.ocr_tile_mode,
+            layout=settings.ocr_tile_layout,
+            count=settings.ocr_tile_count,
+            max_tokens=settings.ocr_tile_max_tokens,
+            concurrency=settings.ocr_tile_concurrency,
         )
 
-        page_markdowns: list[str] = []
         total = len(page_images)
-        for idx, image_path in enumerate(page_images, start=1):
-            _append_job_log(paths, f"Page {idx}/{total}: OCR")
-            meta = _save(
+        # Backend slots are taken per page group / page and given back in
+        # between, so other jobs in this process interleave with this one.
+        gates = get_stage_gates(settings.pipeline_ocr_slots, settings.pipeline_translate_slots)
+        priority = int(meta.extra.get("priority", 0))
+        if settings.translate_speculative:
+            # Paragraphs are translated as OCR produces them, while later pages
+            # (or the rest of this page, when streaming) are still being read.
+            speculative = SpeculativeTranslations(
+                partial(
+                    translate_text,
+                    client=translation_client,
+                    max_chars=settings.translate_max_chars,
+                    max_tokens=(
+                        chunk_token_budget(settings, estimator, {})
+                        if estimator is not None and settings.translate_chunk_tokens > 0
+                        else 0
+                    ),
+                    estimator=estimator,
+                ),
+                concurrency=settings.translate_concurrency,
+                slot=lambda: gates.translate.slot(priority, remaining_pages=total),
+            )
+
+        ocr_pages: list[PageRecord] = []
+        text_layer_pages = 0
+        # One group per OCR round-trip set: batch_size pages per request,
+        # `concurrency` requests in flight.
+        group_size = max(1, settings.ocr_batch_size) * max(1, settings.ocr_concurrency)
+        for start in range(0, total, group_size):
+            group = page_images[start : start + group_size]
+            page_numbers = list(range(start + 1, start + len(group) + 1))
+            label = f"{page_numbers[0]}-{page_numbers[-1]}" if len(group) > 1 else f"{page_numbers[0]}"
+            job_log.info(f"Page {label}/{total}: OCR", page=page_numbers[0], stage="ocr")
+            meta = await _save(
                 paths,
                 update_meta(
                     meta,
-                    stage=f"ocr:{idx}/{total}",
-                    progress=_progress_for_page_phase(idx, total, 0.0),
+                    stage=f"ocr:{page_numbers[0]}/{total}",
+                    progress=_progress_for_ocr(start, total),
                 ),
+                settings,
             )
 
-            ocr_json_path = paths.ocr_dir / f"{idx:03d}.json"
-            page_result = await run_ocr_for_page(
-                image_path=image_path,
-                page=idx,
-                ocr_client=ocr_client,
-                ocr_output_path=ocr_json_path,
+            ocr_output_paths = [paths.ocr_dir / f"{idx:03d}.json" for idx in page_numbers]
+            # Pages past the OCR budget (page count or deadline share) use the PDF text layer.
+            ocr_count = budget.take_ocr_pages(len(group)) if budget is not None else len(group)
+            page_results: list[PageRecord] = []
+            if ocr_count:
+                async with gates.ocr.slot(priority, remaining_pages=total - start):
+                    page_results = await run_ocr_for_pages(
+                        image_paths=group[:ocr_count],
+                        pages=page_numbers[:ocr_count],
+                        ocr_client=ocr_client,
+                        ocr_output_paths=ocr_output_paths[:ocr_count],
+                        tiling=tile_options,
+                        tiles_dir=paths.tiles_dir,
+                        pretty_json=settings.artifact_pretty_json,
+                        on_paragraph=(lambda _page, text: speculative.submit(text)) if speculative else None,
+                    )
+            if ocr_count < len(group):
+                job_log.warning(
+                    f"Page {page_numbers[ocr_count]}-{page_numbers[-1]}/{total}: OCR budget spent, using text layer",
+                    page=page_numbers[ocr_count],
+                    stage="ocr",
+                )
+                page_results += await run_text_layer_for_pages(
+                    paths.input_pdf,
+                    image_paths=group[ocr_count:],
+                    pages=page_numbers[ocr_count:],
+                    dpis=[page_dpis[idx - 1] for idx in page_numbers[ocr_count:]],
+                    ocr_output_paths=ocr_output_paths[ocr_count:],
+                    pretty_json=settings.artifact_pretty_json,
+                )
+                text_layer_pages += len(group) - ocr_count
+            for idx, page_result in zip(page_numbers, page_results, strict=True):
+                page_result.dpi = page_dpis[idx - 1]
+                page_result = order_page_blocks(page_result, engine=settings.reading_order_engine)
+                ocr_pages.append(page_result)
+                job_log.info(
+                    f"Page {idx}/{total}: OCR done ({len(page_result.blocks)} blocks)",
+                    page=idx,
+                    stage="ocr",
+                    blocks=len(page_result.blocks),
+                )
+            await job_log.flush()
+
+        await asyncio.to_thread(prune_page_images, paths, settings)
+
+        if warm_up_task is not None:
+            # Loads the translation model while OCR runs; only waited on here.
+            await warm_up_task
+
+        meta = await _save(
+            paths,
+            update_meta(meta, stage="glossary", progress=_progress_for_ocr(total, total)),
+            settings,
+        )
+        # Not enough LLM budget for every block: spend it on the body text, and
+        # not on a glossary call.
+        budget_short = (
+            budget is not None
+            and estimator is not None
+            and budget.short_of(ocr_pages, estimator, settings.translate_output_token_ratio)
+        )
+        if budget_short:
+            job_log.warning("LLM budget is short: skipping glossary and low-priority blocks", stage="translate")
+            glossary: dict[str, str] = {}
+        else:
+            async with gates.translate.slot(priority, remaining_pages=total):
+                glossary = await _build_glossary(
+                    paths, job_log, ocr_pages, client=translation_client, settings=settings
+                )
+        chunk_tokens = (
+            chunk_token_budget(settings, estimator, glossary)
+            if estimator is not None and settings.translate_chunk_tokens > 0
+            else 0
+        )
+        if chunk_tokens:
+            job_log.info(
+                f"Chunking: {chunk_tokens} tokens per request ({estimator.name})",
+                stage="translate",
+                chunk_tokens=chunk_tokens,
             )
-            page_result = order_page_blocks(page_result)
+        stitches = StitchIndex(plan_stitches(ocr_pages) if settings.translate_stitch_enabled else [])
+        if stitches.groups:
+            job_log.info(
+                f"Stitched {stitches.stitched_blocks} blocks into {len(stitches.groups)} paragraphs",
+                stage="stitch",
+            )
+        meta = await _save(
+            paths,
+            update_meta(
+                meta,
+                extra={
+                    **meta.extra,
+                    "glossary_terms": len(glossary),
+                    "stitched_blocks": stitches.stitched_blocks,
+                },
+            ),
+            settings,
+        )
+
+        page_markdowns: list[str] = []
+        last_block_save = 0.0
+        for idx, page_result in enumerate(ocr_pages, start=1):
             block_total = len(page_result.blocks)
-            _append_job_log(paths, f"Page {idx}/{total}: OCR done ({block_total} blocks)")
-            meta = _save(
+            meta = await _save(
                 paths,
                 update_meta(
                     meta,
                     stage=f"translate:{idx}/{total}:0/{block_total}",
-                    progress=_progress_for_page_phase(idx, total, 0.4),
+                    progress=_progress_for_page_phase(idx, total, 0.0),
                 ),
+                settings,
             )
 
-            _append_job_log(paths, f"Page {idx}/{total}: translation")
+            job_log.info(f"Page {idx}/{total}: translation", page=idx, stage="translate")
 
             async def on_block_done(done: int, total_blocks: int) -> None:
-                nonlocal meta
+                nonlocal meta, last_block_save
+                now = time.monotonic()
+                if done < total_blocks and now - last_block_save < BLOCK_PROGRESS_SAVE_INTERVAL_SEC:
+                    return
+                last_block_save = now
                 ratio = done / max(1, total_blocks)
-                meta = _save(
+                meta = await _save(
                     paths,
                     update_meta(
                         meta,
                         stage=f"translate:{idx}/{total}:{done}/{total_blocks}",
-                        progress=_progress_for_page_phase(idx, total, 0.4 + (0.6 * ratio)),
+                        progress=_progress_for_page_phase(idx, total, ratio),
                     ),
+                    settings,
                 )
 
-            page_result = await translate_page_blocks(
-                page_result,
-                client=ollama_client,
-                max_chars=settings.translate_max_chars,
-                on_block_done=on_block_done,
-            )
+            async with gates.translate.slot(priority, remaining_pages=total - idx + 1):
+                page_result = await translate_page_blocks(
+                    page_result,
+                    client=translation_client,
+                    max_chars=settings.translate_max_chars,
+                    on_block_done=on_block_done,
+                    glossary=glossary,
+                    concurrency=settings.translate_concurrency,
+                    stitches=stitches,
+                    max_tokens=chunk_tokens,
+                    estimator=estimator,
+                    speculative=speculative,
+                    skip=is_low_priority if budget_short else None,
+                )
 
             page_md_path = paths.md_dir / f"{idx:03d}.md"
-            page_md = write_page_markdown(page_result, page_md_path)
+            page_md = await asyncio.to_thread(write_page_markdown, page_result, page_md_path)
             page_markdowns.append(page_md)
+            if settings.pdf_output_enabled:
+                # Rendered in the process pool while the next pages are translated.
+                pdf_tasks.append(
+                    asyncio.create_task(
+                        run_cpu_bound(
+                            settings.render_executor,
+                            settings.render_processes,
+                            render_translated_page,
+                            pdf_path=paths.input_pdf,
+                            page_number=idx,
+                            img_w=page_result.img_w,
+                            img_h=page_result.img_h,
+                            dpi=page_result.dpi,
+                            blocks=overlay_blocks(page_result),
+                            output_path=paths.pdf_dir / f"{idx:03d}.pdf",
+                            font=settings.pdf_output_font,
+                        )
+                    )
+                )
 
-            meta = _save(
+            meta = await _save(
                 paths,
                 update_meta(
                     meta,
                     stage=f"done:{idx}/{total}",
-                    progress=_progress_for_page(idx, total),
+                    progress=_progress_for_page_phase(idx, total, 1.0),
                 ),
+                settings,
             )
-            _append_job_log(paths, f"Page {idx}/{total}: done")
+            job_log.info(f"Page {idx}/{total}: done", page=idx, stage="translate")
+            await job_log.flush()
 
-        write_result_markdown(page_markdowns=page_markdowns, output_path=paths.result_md)
-        result_path = str(paths.result_md.relative_to(settings.repo_root))
-        meta = _save(
+        if speculative is not None:
+            job_log.info(
+                f"Speculative translation: {speculative.used} reused, {speculative.discarded} redone with glossary, "
+                f"{speculative.submitted} paragraphs submitted",
+                stage="translate",
+                speculative_used=speculative.used,
+                speculative_discarded=speculative.discarded,
+                speculative_submitted=speculative.submitted,
+            )
+        if generation_stats.degenerate:
+            job_log.warning(
+                f"Degenerate generations: {generation_stats.degenerate} "
+                f"({generation_stats.wasted_sec:.1f}s wasted; {dict(generation_stats.reasons)})",
+                stage="translate",
+                degenerate=generation_stats.degenerate,
+                wasted_sec=round(generation_stats.wasted_sec, 2),
+            )
+        budget_extra: dict[str, object] = {}
+        if budget is not None:
+            budget_extra = {"budget_usage": budget.usage(), "text_layer_pages": text_layer_pages}
+            if budget.exhausted:
+                job_log.warning(
+                    f"Budget exhausted ({', '.join(budget.exhausted)}): finished with partial results, "
+                    f"{text_layer_pages} pages from the text layer",
+                    stage="translate",
+                    exhausted=budget.exhausted,
+                    text_layer_pages=text_layer_pages,
+                )
+        await asyncio.to_thread(write_result_markdown, page_markdowns, paths.result_md)
+        has_pdf = bool(pdf_tasks) and await finish_translated_pdf(paths, job_log, pdf_tasks, settings)
+        await asyncio.to_thread(compress_job_artifacts, paths, settings)
+        result_path = str(
+            paths.result_md.relative_to(settings.repo_root)
+            if paths.result_md.is_relative_to(settings.repo_root)
+            else paths.result_md
+        )
+        meta = await _save(
             paths,
             update_meta(
                 meta,
@@ -167,16 +511,47 @@ async def run_job(job_id: str, settings: Settings | None = None) -> None:
                 progress=1.0,
                 result_path=result_path,
                 error=None,
+                partial=bool(budget and budget.exhausted),
+                budget_exhausted=list(budget.exhausted) if budget is not None else [],
+                extra={
+                    **meta.extra,
+                    **budget_extra,
+                    "result_pdf": has_pdf,
+                    "degenerate_generations": generation_stats.degenerate,
+                    "degenerate_wasted_sec": round(generation_stats.wasted_sec, 2),
+                },
             ),
+            settings,
         )
-        _append_job_log(paths, f"Job completed: {job_id}")
+        job_log.info(f"Job completed: {job_id}", stage="completed")
     except Exception as exc:  # noqa: BLE001
-        _append_job_log(paths, f"Job failed: {exc}")
-        _append_job_log(paths, traceback.format_exc())
+        job_log.exception(f"Job failed: {exc}", stage="failed")
         failed_meta = update_meta(
             meta,
             status=JobStatus.FAILED,
             stage="failed",
             error=str(exc),
         )
-        save_meta(paths.meta_json, failed_meta)
+        await asyncio.to_thread(save_meta, paths.meta_json, failed_meta, settings.artifact_pretty_json)
+    finally:
+        if profiler is not None:
+            try:
+                stacks = profiler.stop()
+                await asyncio.to_thread(write_folded, paths.profile, stacks)
+            except Exception as exc:  # noqa: BLE001 - a broken profile must not skip the cleanup below
+                job_log.warning(f"Profile not saved: {exc}", stage="profile")
+            else:
+                hottest = ", ".join(f"{frame} {sec:.2f}s" for frame, sec in top_frames(stacks, limit=3))
+                job_log.info(
+                    f"Profile saved ({profiler.engine}, {sum(stacks.values()) / 1_000_000:.1f}s sampled): {hottest}",
+                    stage="profile",
+                )
+        job_generation_stats.reset(stats_token)
+        if speculative is not None:
+            speculative.cancel_pending()
+        for task in pdf_tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()
+        await job_log.close()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+
+
+class StageGate:
+    """Limits how many jobs use a backend stage at once, one page at a time.
+
+    Jobs re-acquire the gate at every page boundary, so when several jobs run
+    in the same process a long job yields between pages. Waiters are served by
+    priority (higher first), then fewest remaining pages, then arrival.
+    """
+
+    def __init__(self, slots: int) -> None:
+        self._free = max(1, slots)
+        self._waiters: list[tuple[int, int, int, asyncio.Future[None]]] = []
+        self._seq = itertools.count()
+
+    @asynccontextmanager
+    async def slot(self, priority: int = 0, remaining_pages: int = 0) -> AsyncIterator[None]:
+        if self._free > 0 and not self._waiters:
+            self._free -= 1
+        else:
+            future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (-priority, remaining_pages, next(self._seq), future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # The slot was handed over just as we were cancelled; pass it on.
+                    self._release()
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        while self._waiters:
+            *_, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._free += 1
+
+
+@dataclass(frozen=True)
+class StageGates:
+    ocr: StageGate
+    translate: StageGate
+
+
+@lru_cache(maxsize=4)
+def get_stage_gates(ocr_slots: int, translate_slots: int) -> StageGates:
+    """Process-wide gates shared by every job running in this process."""
+    return StageGates(ocr=StageGate(ocr_slots), translate=StageGate(translate_slots))
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from app.models.records import BlockRecord, PageRecord
+
+STITCHABLE_TYPES = frozenset({"paragraph", "text", "plain_text", "plain text", "abstract", "content"})
+TERMINAL_PUNCTUATION = tuple(".!?。！？:：」”\"")
+TRANSLATED_SENTENCE_RE = re.compile(r"(?<=[。！？!?])")
+TRANSLATED_CLAUSE_RE = re.compile(r"(?<=[、，,])")
+MAX_GROUP_SIZE = 3
+
+BlockKey = tuple[int, str]
+
+
+def block_key(block: BlockRecord) -> BlockKey:
+    return (block.page, block.id)
+
+
+def _continues(prev: BlockRecord, block: BlockRecord) -> bool:
+    if prev.type.lower() != block.type.lower() or prev.type.lower() not in STITCHABLE_TYPES:
+        return False
+    head = prev.text.rstrip()
+    tail = block.text.lstrip()
+    if not head or not tail or head.endswith(TERMINAL_PUNCTUATION):
+        return False
+    return tail[0].islower() or head.endswith(("-", ","))
+
+
+def _join_sources(texts: list[str]) -> str:
+    merged = texts[0].rstrip()
+    for text in texts[1:]:
+        text = text.lstrip()
+        if merged.endswith("-") and text[:1].islower():
+            # Undo end-of-line hyphenation: "transla-" + "tion".
+            merged = merged[:-1] + text
+        else:
+            merged = f"{merged} {text}"
+    return merged
+
+
+@dataclass
+class StitchGroup:
+    keys: list[BlockKey]
+    sources: list[str]
+    _result: asyncio.Future[list[str]] | None = field(default=None, repr=False)
+
+    @property
+    def merged_source(self) -> str:
+        return _join_sources(self.sources)
+
+    def result(self) -> asyncio.Future[list[str]]:
+        if self._result is None:
+            self._result = asyncio.get_running_loop().create_future()
+        return self._result
+
+
+def plan_stitches(pages: Iterable[PageRecord]) -> list[StitchGroup]:
+    """Group consecutive blocks (in reading order, across columns and pages)
+    that continue the same paragraph."""
+    groups: list[StitchGroup] = []
+    current: StitchGroup | None = None
+    prev: BlockRecord | None = None
+    for page in pages:
+        for block in page.blocks:
+            if prev is not None and _continues(prev, block):
+                if current is None:
+                    current = StitchGroup(keys=[block_key(prev)], sources=[prev.text])
+                    groups.append(current)
+                current.keys.append(block_key(block))
+                current.sources.append(block.text)
+                if len(current.keys) >= MAX_GROUP_SIZE:
+                    current = None
+                    prev = None
+                    continue
+            else:
+                current = None
+            prev = block
+    return groups
+
+
+def split_translation(translated: str, sources: list[str]) -> list[str]:
+    """Split one translation back into parts sized like the source blocks.
+
+    Cuts land on sentence ends when possible, then on clause breaks, and only
+    fall back to a raw character position when the text has neither.
+    """
+    if len(sources) <= 1:
+        return [translated]
+    total = sum(len(source) for source in sources) or 1
+    parts: list[str] = []
+    rest = translated
+    remaining = total
+    for source in sources[:-1]:
+        target = len(rest) * len(source) / max(1, remaining)
+        cut = _nearest_cut(rest, target)
+        parts.append(rest[:cut].strip())
+        rest = rest[cut:]
+        remaining -= len(source)
+    parts.append(rest.strip())
+    return parts
+
+
+def _nearest_cut(text: str, target: float) -> int:
+    for pattern in (TRANSLATED_SENTENCE_RE, TRANSLATED_CLAUSE_RE):
+        cuts = [m.start() for m in pattern.finditer(text) if 0 < m.start() < len(text)]
+        if cuts:
+            return min(cuts, key=lambda cut: abs(cut - target))
+    return max(1, min(len(text) - 1, round(target)))
+
+
+class StitchIndex:
+    def __init__(self, groups: list[StitchGroup]) -> None:
+        self.groups = groups
+        self._by_key: dict[BlockKey, tuple[StitchGroup, int]] = {}
+        for group in groups:
+            for position, key in enumerate(group.keys):
+                self._by_key[key] = (group, position)
+
+    def lookup(self, block: BlockRecord) -> tuple[StitchGroup, int] | None:
+        return self._by_key.get(block_key(block))
+
+    @property
+    def stitched_blocks(self) -> int:
+        return len(self._by_key)
@@ -2,10 +2,10 @@ from __future__ import annotations
 
 from pathlib import Path
 
-from app.models.schemas import Block, PageResult
+from app.models.records import BlockRecord, PageRecord
 
 
-def _render_block(block: Block) -> str:
+def _render_block(block: BlockRecord) -> str:
     text = (block.translated_text or block.text).strip()
     if not text:
         return ""
@@ -18,7 +18,7 @@ def _render_block(block: Block) -> str:
     return text
 
 
-def page_to_markdown(page: PageResult) -> str:
+def page_to_markdown(page: PageRecord) -> str:
     lines = [line for block in page.blocks if (line := _render_block(block))]
     body = "\n\n".join(lines).strip()
     if not body:
@@ -26,7 +26,7 @@ def page_to_markdown(page: PageResult) -> str:
     return f"## Page {page.page}\n\n{body}\n"
 
 
-def write_page_markdown(page: PageResult, output_path: Path) -> str:
+def write_page_markdown(page: PageRecord, output_path: Path) -> str:
     markdown = page_to_markdown(page)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     output_path.write_text(markdown, encoding="utf-8")
@@ -1,47 +1,91 @@
 from __future__ import annotations
 
+import asyncio
 import re
 from collections.abc import Awaitable, Callable
+from contextlib import AbstractAsyncContextManager, nullcontext
+from dataclasses import replace
 
-from app.clients.ollama_client import OllamaClient
-from app.models.schemas import Block, PageResult
+from app.clients.translation_client import TranslationClient, TranslationClientError
+from app.models.records import BlockRecord, PageRecord
+from app.pipeline.budget import BudgetExceeded
+from app.pipeline.glossary import format_glossary
+from app.pipeline.stitch import StitchIndex, split_translation
+from app.utils.tokens import TokenEstimator
 
 SENTENCE_SPLIT_RE = re.compile(r"(?<=[。．.!?])\s+")
 
 
-def build_translation_prompt(source_text: str) -> str:
+def build_translation_prompt(source_text: str, glossary: dict[str, str] | None = None) -> str:
+    # Everything before "Text:" is identical for every call in a job so the
+    # backend can reuse the cached prompt prefix.
     return (
         "Task: Translate the following text into natural Japanese.\n"
         "Rules:\n"
         "- Keep numbers, units, URLs, references (e.g., Fig. 1) unchanged where possible.\n"
         "- Output translation only. Do not add explanations.\n"
         "- Avoid unnecessary newlines.\n\n"
+        f"{format_glossary(glossary or {})}"
         f"Text:\n{source_text}"
     )
 
 
-def _split_long_text(text: str, max_chars: int) -> list[str]:
+def _hard_split(text: str, limit: int, size: Callable[[str], int]) -> list[str]:
+    """Cut a single over-long sentence into pieces of at most `limit` units."""
+    pieces: list[str] = []
+    rest = text
+    while rest:
+        if size(rest) <= limit:
+            pieces.append(rest)
+            break
+        # Characters per unit of this text, so the cut lands near the limit.
+        cut = max(1, min(len(rest) - 1, len(rest) * limit // max(1, size(rest))))
+        while cut > 1 and size(rest[:cut]) > limit:
+            cut = max(1, cut * 9 // 10)
+        space = rest.rfind(" ", cut // 2, cut)
+        if space > 0:
+            cut = space
+        pieces.append(rest[:cut].strip())
+        rest = rest[cut:].strip()
+    return [piece for piece in pieces if piece]
+
+
+def _split_long_text(
+    text: str,
+    max_chars: int,
+    max_tokens: int = 0,
+    estimator: TokenEstimator | None = None,
+) -> list[str]:
+    """Split at sentence boundaries into chunks within the budget.
+
+    With `max_tokens` and an estimator the budget is in tokens of the
+    translation model; otherwise it is `max_chars` characters.
+    """
     trimmed = text.strip()
-    if len(trimmed) <= max_chars:
+    if max_tokens > 0 and estimator is not None:
+        size, limit = estimator.count, max_tokens
+    else:
+        size, limit = len, max_chars
+    if size(trimmed) <= limit:
         return [trimmed]
 
     sentences = [s.strip() for s in SENTENCE_SPLIT_RE.split(trimmed) if s.strip()]
     if len(sentences) <= 1:
-        return [trimmed[i : i + max_chars] for i in range(0, len(trimmed), max_chars)]
+        return _hard_split(trimmed, limit, size)
 
     chunks: list[str] = []
     buf = ""
     for sentence in sentences:
         candidate = sentence if not buf else f"{buf} {sentence}"
-        if len(candidate) <= max_chars:
+        if size(candidate) <= limit:
             buf = candidate
             continue
         if buf:
             chunks.append(buf)
-        if len(sentence) <= max_chars:
+        if size(sentence) <= limit:
             buf = sentence
         else:
-            chunks.extend(sentence[i : i + max_chars] for i in range(0, len(sentence), max_chars))
+            chunks.extend(_hard_split(sentence, limit, size))
             buf = ""
     if buf:
         chunks.append(buf)
@@ -55,37 +99,197 @@ def _clean_translation(text: str) -> str:
     return cleaned
 
 
-async def translate_text(text: str, client: OllamaClient, max_chars: int) -> str:
+class SpeculativeTranslations:
+    """Translations started from OCR paragraphs before the page is final.
+
+    Paragraphs are translated without a glossary (it only exists once every
+    page is OCR'd). When the final blocks are translated, a block whose text
+    matches a submitted paragraph reuses that result unless it contains a
+    glossary term whose glossary translation the result does not use; then it
+    is translated again with the glossary.
+
+    `slot` is the translate stage gate; each paragraph holds it while it runs.
+    """
+
+    def __init__(
+        self,
+        translate: Callable[[str], Awaitable[str]],
+        concurrency: int = 1,
+        slot: Callable[[], AbstractAsyncContextManager[None]] | None = None,
+    ) -> None:
+        self._translate = translate
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._slot = slot
+        self._tasks: dict[str, asyncio.Task[str]] = {}
+        self._started: set[str] = set()
+        self.used = 0
+        self.discarded = 0
+
+    def submit(self, text: str) -> None:
+        key = text.strip()
+        if key and key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    async def _run(self, text: str) -> str:
+        async with self._semaphore, self._slot() if self._slot is not None else nullcontext():
+            self._started.add(text)
+            return await self._translate(text)
+
+    async def take(self, text: str, glossary: dict[str, str] | None = None) -> str | None:
+        task = self._tasks.get(text)
+        if task is None or task.cancelled():
+            return None
+        if not task.done() and text not in self._started:
+            # Still waiting for a slot. The caller holds a translate slot itself,
+            # so waiting could deadlock; it translates the block directly instead.
+            task.cancel()
+            return None
+        try:
+            result = await asyncio.shield(task)
+        except TranslationClientError:
+            return None
+        if glossary and any(term in text and target not in result for term, target in glossary.items()):
+            self.discarded += 1
+            return None
+        self.used += 1
+        return result
+
+    @property
+    def submitted(self) -> int:
+        return len(self._tasks)
+
+    def cancel_pending(self) -> None:
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Mark failures as retrieved; the final pass already handled them.
+                task.exception()
+
+
+async def translate_text(
+    text: str,
+    client: TranslationClient,
+    max_chars: int,
+    glossary: dict[str, str] | None = None,
+    max_tokens: int = 0,
+    estimator: TokenEstimator | None = None,
+    speculative: SpeculativeTranslations | None = None,
+) -> str:
     source = text.strip()
     if not source:
         return ""
+    if speculative is not None and (early := await speculative.take(source, glossary)) is not None:
+        return early
 
-    chunks = _split_long_text(source, max_chars=max_chars)
+    chunks = _split_long_text(source, max_chars=max_chars, max_tokens=max_tokens, estimator=estimator)
     translated: list[str] = []
     for chunk in chunks:
-        prompt = build_translation_prompt(chunk)
-        out = await client.generate(prompt)
+        prompt = build_translation_prompt(chunk, glossary=glossary)
+        source_tokens = estimator.count(chunk) if estimator is not None else None
+        out = await client.generate(
+            prompt,
+            num_predict=client.num_predict_for(chunk, source_tokens),
+            source_text=chunk,
+        )
         translated.append(_clean_translation(out))
     return "\n".join(part for part in translated if part).strip()
 
 
-async def translate_block(block: Block, client: OllamaClient, max_chars: int) -> Block:
-    translated = await translate_text(block.text, client=client, max_chars=max_chars)
-    return block.model_copy(update={"translated_text": translated})
+async def translate_block(
+    block: BlockRecord,
+    client: TranslationClient,
+    max_chars: int,
+    glossary: dict[str, str] | None = None,
+    max_tokens: int = 0,
+    estimator: TokenEstimator | None = None,
+    speculative: SpeculativeTranslations | None = None,
+) -> BlockRecord:
+    try:
+        translated = await translate_text(
+            block.text,
+            client=client,
+            max_chars=max_chars,
+            glossary=glossary,
+            max_tokens=max_tokens,
+            estimator=estimator,
+            speculative=speculative,
+        )
+    except BudgetExceeded:
+        # Out of budget: the block keeps its source text.
+        return block
+    return replace(block, translated_text=translated)
 
 
 async def translate_page_blocks(
-    page: PageResult,
-    client: OllamaClient,
+    page: PageRecord,
+    client: TranslationClient,
     max_chars: int,
     on_block_done: Callable[[int, int], Awaitable[None] | None] | None = None,
-) -> PageResult:
-    translated_blocks: list[Block] = []
+    glossary: dict[str, str] | None = None,
+    concurrency: int = 1,
+    stitches: StitchIndex | None = None,
+    max_tokens: int = 0,
+    estimator: TokenEstimator | None = None,
+    speculative: SpeculativeTranslations | None = None,
+    skip: Callable[[BlockRecord], bool] | None = None,
+) -> PageRecord:
     total = len(page.blocks)
-    for idx, block in enumerate(page.blocks, start=1):
-        translated_blocks.append(await translate_block(block, client=client, max_chars=max_chars))
+    translated_blocks: list[BlockRecord | None] = [None] * total
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    done = 0
+
+    async def translate_stitched(block: BlockRecord) -> BlockRecord | None:
+        match = stitches.lookup(block) if stitches is not None else None
+        if match is None:
+            return None
+        group, position = match
+        result = group.result()
+        if position == 0:
+            try:
+                async with semaphore:
+                    merged = await translate_text(
+                        group.merged_source,
+                        client=client,
+                        max_chars=max_chars,
+                        glossary=glossary,
+                        max_tokens=max_tokens,
+                        estimator=estimator,
+                    )
+            except BudgetExceeded:
+                # Empty parts render as the source text.
+                result.set_result([""] * len(group.sources))
+            except BaseException as exc:
+                result.set_exception(exc)
+                raise
+            else:
+                result.set_result(split_translation(merged, group.sources))
+        # Continuations (later in this page or on a later page) reuse the head's translation.
+        parts = await result
+        return replace(block, translated_text=parts[position])
+
+    async def run(idx: int, block: BlockRecord) -> None:
+        nonlocal done
+        translated = await translate_stitched(block)
+        if translated is None and skip is not None and skip(block):
+            translated = block
+        if translated is None:
+            async with semaphore:
+                translated = await translate_block(
+                    block,
+                    client=client,
+                    max_chars=max_chars,
+                    glossary=glossary,
+                    max_tokens=max_tokens,
+                    estimator=estimator,
+                    speculative=speculative,
+                )
+        translated_blocks[idx] = translated
+        done += 1
         if on_block_done is not None:
-            callback_result = on_block_done(idx, total)
+            callback_result = on_block_done(done, total)
             if callback_result is not None:
                 await callback_result
-    return page.model_copy(update={"blocks": translated_blocks})
+
+    await asyncio.gather(*(run(idx, block) for idx, block in enumerate(page.blocks)))
+    return replace(page, blocks=[block for block in translated_blocks if block is not None])
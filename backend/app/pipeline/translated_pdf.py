@@ -0,0 +1,127 @@
+"""Translated PDF: the original pages with each translated block reflowed into its box.
+
+Each page is rendered on its own (`pdf/NNN.pdf`, in the render process pool)
+as soon as its translation is done; `pdf/result.pdf` and the partial PDF the
+API serves while a job runs are assembled from those page files.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import fitz
+
+from app.models.records import BBox, PageRecord
+from app.pipeline.render_pdf import POINTS_PER_INCH
+
+PDF_MAX_FONT_SIZE = 16.0
+PDF_MIN_FONT_SIZE = 4.0
+FONT_SHRINK = 0.85
+CUSTOM_FONT_NAME = "trfont"
+WHITE = (1.0, 1.0, 1.0)
+# Removes the original text layer under the boxes; images and vector art are only painted over.
+REDACT_OPTIONS: dict[str, int] = {"images": fitz.PDF_REDACT_IMAGE_NONE}
+if hasattr(fitz, "PDF_REDACT_LINE_ART_NONE"):  # PyMuPDF >= 1.24.2
+    REDACT_OPTIONS["graphics"] = fitz.PDF_REDACT_LINE_ART_NONE
+
+
+@dataclass(frozen=True)
+class OverlayBlock:
+    bbox: BBox
+    text: str
+
+
+def overlay_blocks(page: PageRecord) -> list[OverlayBlock]:
+    """Blocks that have a translation and a box; everything else stays as in the original."""
+    blocks: list[OverlayBlock] = []
+    for block in page.blocks:
+        text = (block.translated_text or "").strip()
+        x1, y1, x2, y2 = block.bbox
+        if text and x2 > x1 and y2 > y1:
+            blocks.append(OverlayBlock(bbox=block.bbox, text=text))
+    return blocks
+
+
+def _to_points(bbox: BBox, page: fitz.Page, img_w: int, img_h: int, dpi: int | None) -> fitz.Rect | None:
+    """OCR pixel box (on the rendered, rotated page) to unrotated PDF points."""
+    if img_w > 0 and img_h > 0:
+        scale_x, scale_y = page.rect.width / img_w, page.rect.height / img_h
+    elif dpi:
+        scale_x = scale_y = POINTS_PER_INCH / dpi
+    else:
+        return None
+    x1, y1, x2, y2 = bbox
+    rect = fitz.Rect(x1 * scale_x, y1 * scale_y, x2 * scale_x, y2 * scale_y) * page.derotation_matrix
+    rect.normalize()
+    return rect if not rect.is_empty else None
+
+
+def _fit_text(page: fitz.Page, rect: fitz.Rect, text: str, fontname: str, fontfile: str | None) -> None:
+    size = min(PDF_MAX_FONT_SIZE, rect.height * 0.8)
+    while size >= PDF_MIN_FONT_SIZE:
+        # Nothing is written when the text does not fit.
+        spare = page.insert_textbox(
+            rect, text, fontname=fontname, fontfile=fontfile, fontsize=size, rotate=page.rotation
+        )
+        if spare >= 0:
+            return
+        size *= FONT_SHRINK
+    # Still too long at the minimum size: scale the whole box down instead of dropping text.
+    page.insert_htmlbox(rect, text, scale_low=0, rotate=page.rotation)
+
+
+def render_translated_page(
+    pdf_path: Path,
+    page_number: int,
+    img_w: int,
+    img_h: int,
+    dpi: int | None,
+    blocks: list[OverlayBlock],
+    output_path: Path,
+    font: str = "japan",
+) -> Path:
+    """Copy one page of `pdf_path`, white out the translated blocks and write the translations in their place."""
+    fontfile = font if Path(font).is_file() else None
+    fontname = CUSTOM_FONT_NAME if fontfile else font
+    with fitz.open(pdf_path) as source, fitz.open() as out:
+        out.insert_pdf(source, from_page=page_number - 1, to_page=page_number - 1)
+        page = out[0]
+        placed = [
+            (rect, block.text)
+            for block in blocks
+            if (rect := _to_points(block.bbox, page, img_w, img_h, dpi)) is not None
+        ]
+        for rect, _text in placed:
+            page.add_redact_annot(rect, fill=WHITE)
+        if placed:
+            page.apply_redactions(**REDACT_OPTIONS)
+        for rect, text in placed:
+            _fit_text(page, rect, text, fontname, fontfile)
+        try:
+            out.subset_fonts()
+        except Exception:  # noqa: BLE001 - older PyMuPDF needs fontTools; subsetting only saves space
+            pass
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_suffix(".tmp")
+        out.save(tmp_path, garbage=3, deflate=True)
+    # Readers assemble whatever page files exist, so they only ever see complete ones.
+    tmp_path.replace(output_path)
+    return output_path
+
+
+def assemble_translated_pdf(page_paths: list[Path]) -> bytes:
+    with fitz.open() as out:
+        for path in page_paths:
+            with fitz.open(path) as page_doc:
+                out.insert_pdf(page_doc)
+        # garbage=4 merges the font and image objects repeated in every page file.
+        return out.tobytes(garbage=4, deflate=True)
+
+
+def completed_page_pdfs(pdf_dir: Path) -> list[Path]:
+    """Page PDFs written so far, in page order up to the first missing page."""
+    pages: list[Path] = []
+    while (path := pdf_dir / f"{len(pages) + 1:03d}.pdf").exists():
+        pages.append(path)
+    return pages
@@ -0,0 +1,300 @@
+"""Job artifact compression, page-image pruning and retention (GC)."""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from PIL import Image
+
+from app.core.config import Settings, get_settings
+from app.models.schemas import JobStatus
+from app.store.cache import ResultCache, get_result_caches
+from app.store.paths import JobPaths, build_job_paths
+from app.store.queue import get_job_queue
+from app.store.state import load_meta
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED_SUFFIXES = {"zstd": ".zst", "gzip": ".gz"}
+ACTIVE_STATUSES = {JobStatus.QUEUED, JobStatus.RUNNING}
+DOWNSAMPLE_MAX_SIDE = 1024
+USAGE_CACHE_TTL_SEC = 60.0
+
+
+def _compression_method(settings: Settings) -> str | None:
+    method = settings.artifact_compression.strip().lower()
+    if method in {"", "none", "off"}:
+        return None
+    if method == "zstd" and zstandard is None:
+        logger.warning("ARTIFACT_COMPRESSION=zstd but 'zstandard' is not installed; using gzip")
+        return "gzip"
+    if method not in COMPRESSED_SUFFIXES:
+        logger.warning("Unknown ARTIFACT_COMPRESSION=%r; artifacts stay uncompressed", method)
+        return None
+    return method
+
+
+def compress_file(path: Path, method: str) -> Path:
+    data = path.read_bytes()
+    target = path.with_name(path.name + COMPRESSED_SUFFIXES[method])
+    if method == "zstd":
+        target.write_bytes(zstandard.ZstdCompressor(level=10).compress(data))
+    else:
+        target.write_bytes(gzip.compress(data, compresslevel=6))
+    path.unlink()
+    return target
+
+
+def resolve_artifact(path: Path) -> Path | None:
+    """Return `path` or its compressed sibling, whichever exists."""
+    if path.exists():
+        return path
+    for suffix in COMPRESSED_SUFFIXES.values():
+        candidate = path.with_name(path.name + suffix)
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def read_artifact_bytes(path: Path) -> bytes:
+    resolved = resolve_artifact(path)
+    if resolved is None:
+        raise FileNotFoundError(path)
+    data = resolved.read_bytes()
+    if resolved.name.endswith(COMPRESSED_SUFFIXES["zstd"]):
+        if zstandard is None:
+            raise RuntimeError(f"'zstandard' is required to read {resolved}")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if resolved.name.endswith(COMPRESSED_SUFFIXES["gzip"]):
+        return gzip.decompress(data)
+    return data
+
+
+def prune_page_images(paths: JobPaths, settings: Settings) -> None:
+    """Drop or shrink rendered page PNGs once OCR no longer needs them."""
+    mode = settings.artifact_page_images.strip().lower()
+    if mode == "keep":
+        return
+    shutil.rmtree(paths.tiles_dir, ignore_errors=True)
+    for image_path in sorted(paths.pages_dir.glob("*.png")):
+        if mode == "delete":
+            image_path.unlink(missing_ok=True)
+            continue
+        with Image.open(image_path) as image:
+            if max(image.size) <= DOWNSAMPLE_MAX_SIDE:
+                continue
+            image.thumbnail((DOWNSAMPLE_MAX_SIDE, DOWNSAMPLE_MAX_SIDE))
+            image.save(image_path, optimize=True)
+
+
+def compress_job_artifacts(paths: JobPaths, settings: Settings) -> None:
+    """Compress OCR JSON and per-page markdown. `md/result.md` stays plain for direct download."""
+    method = _compression_method(settings)
+    if method is None:
+        return
+    targets = [*paths.ocr_dir.glob("*.json"), *paths.md_dir.glob("[0-9]*.md")]
+    for path in sorted(targets):
+        compress_file(path, method)
+
+
+def directory_size(path: Path) -> int:
+    total = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+            elif entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
+@dataclass
+class _JobUsage:
+    job_id: str
+    bytes: int
+    last_used: float
+    status: JobStatus | None
+
+    @property
+    def active(self) -> bool:
+        return self.status in ACTIVE_STATUSES
+
+
+@dataclass
+class GcReport:
+    deleted: list[str] = field(default_factory=list)
+    freed_bytes: int = 0
+    # OCR / translation cache entries, counted in freed_bytes and remaining_bytes as well.
+    cache_evicted: int = 0
+    cache_freed_bytes: int = 0
+    remaining_bytes: int = 0
+
+
+def _scan_jobs(settings: Settings) -> list[_JobUsage]:
+    jobs_root = build_job_paths(job_id="_", settings=settings).jobs_root
+    if not jobs_root.exists():
+        return []
+    usages: list[_JobUsage] = []
+    for job_dir in jobs_root.iterdir():
+        if not job_dir.is_dir():
+            continue
+        paths = build_job_paths(job_id=job_dir.name, settings=settings)
+        try:
+            meta = load_meta(paths.meta_json)
+            last_used = meta.updated_at.timestamp()
+            status: JobStatus | None = meta.status
+        except (OSError, ValueError):
+            last_used = job_dir.stat().st_mtime
+            status = None
+        usages.append(
+            _JobUsage(job_id=job_dir.name, bytes=directory_size(job_dir), last_used=last_used, status=status)
+        )
+    return usages
+
+
+def _abandoned_job_ids(jobs: list[_JobUsage], settings: Settings, now: float) -> set[str]:
+    """Queued/running jobs no worker will finish: running without a live lease
+    (its worker crashed, possibly after its last attempt), or queued without a
+    queue row. Only jobs untouched for the retention age count, so a job that
+    is merely waiting or between heartbeats is never picked."""
+    max_age = settings.artifact_retention_max_age_hours
+    stale = [job for job in jobs if job.active and max_age is not None and now - job.last_used > max_age * 3600]
+    if not stale:
+        return set()
+    # The inline runner has no queue; its jobs die with the API process.
+    leases = get_job_queue(settings).lease_states(now) if settings.job_runner == "queue" else {}
+    return {
+        job.job_id
+        for job in stale
+        if job.job_id not in leases or (job.status == JobStatus.RUNNING and not leases[job.job_id])
+    }
+
+
+def _result_caches(settings: Settings) -> list[ResultCache]:
+    caches = get_result_caches(settings)
+    return [caches.ocr, caches.translation] if caches is not None else []
+
+
+def collect_garbage(settings: Settings | None = None, now: float | None = None) -> GcReport:
+    """Delete finished jobs and OCR / translation cache entries unused for longer
+    than the TTL, then the least recently used of both over the byte budget."""
+    settings = settings or get_settings()
+    now = now or time.time()
+    report = GcReport()
+    jobs = _scan_jobs(settings)
+    caches = _result_caches(settings)
+    total = sum(job.bytes for job in jobs) + sum(cache.disk_bytes() for cache in caches)
+
+    max_age = settings.artifact_retention_max_age_hours
+    max_bytes = settings.artifact_retention_max_bytes
+    # (last used, bytes, job id or cache key, cache or None for a job), oldest first.
+    abandoned = _abandoned_job_ids(jobs, settings, now)
+    candidates: list[tuple[float, int, str, ResultCache | None]] = [
+        (job.last_used, job.bytes, job.job_id, None) for job in jobs if not job.active or job.job_id in abandoned
+    ]
+    over_budget_now = max_bytes is not None and total > max_bytes
+    if over_budget_now or max_age is not None:
+        # Only entries past the TTL can go unless the budget is exceeded.
+        used_before = None if over_budget_now or max_age is None else now - max_age * 3600
+        for cache in caches:
+            candidates.extend(
+                (last_used, size, key, cache) for last_used, key, size in cache.entries_by_last_use(used_before)
+            )
+    candidates.sort(key=lambda candidate: candidate[0])
+
+    evicted: dict[Path, tuple[ResultCache, list[str]]] = {}
+    for last_used, size, name, cache in candidates:
+        expired = max_age is not None and now - last_used > max_age * 3600
+        over_budget = max_bytes is not None and total > max_bytes
+        if not (expired or over_budget):
+            continue
+        if cache is None:
+            shutil.rmtree(build_job_paths(job_id=name, settings=settings).job_dir, ignore_errors=True)
+            if name in abandoned and settings.job_runner == "queue":
+                get_job_queue(settings).discard(name)
+            report.deleted.append(name)
+        else:
+            evicted.setdefault(cache.path, (cache, []))[1].append(name)
+            report.cache_evicted += 1
+            report.cache_freed_bytes += size
+        report.freed_bytes += size
+        total -= size
+    for cache, keys in evicted.values():
+        cache.delete(keys)
+
+    report.remaining_bytes = total
+    _usage_cache.clear()
+    return report
+
+
+async def run_gc_periodically(settings: Settings | None = None) -> None:
+    settings = settings or get_settings()
+    while True:
+        try:
+            report = await asyncio.to_thread(collect_garbage, settings)
+            if report.deleted or report.cache_evicted:
+                logger.info(
+                    "Artifact GC removed %d jobs and %d cache entries (%d bytes, %d from the cache); %d bytes remain",
+                    len(report.deleted),
+                    report.cache_evicted,
+                    report.freed_bytes,
+                    report.cache_freed_bytes,
+                    report.remaining_bytes,
+                )
+        except Exception:  # noqa: BLE001
+            logger.exception("Artifact GC failed")
+        await asyncio.sleep(settings.artifact_gc_interval_sec)
+
+
+_usage_cache: dict[str, tuple[float, dict[str, int]]] = {}
+
+
+def storage_usage(settings: Settings | None = None) -> dict[str, int]:
+    settings = settings or get_settings()
+    output_root = build_job_paths(job_id="_", settings=settings).output_root
+    cached = _usage_cache.get(str(output_root))
+    if cached is not None and time.monotonic() - cached[0] < USAGE_CACHE_TTL_SEC:
+        return cached[1]
+
+    jobs = _scan_jobs(settings)
+    disk = shutil.disk_usage(output_root if output_root.exists() else settings.repo_root)
+    usage = {
+        "jobs": len(jobs),
+        "jobs_bytes": sum(job.bytes for job in jobs),
+        "cache_bytes": sum(cache.disk_bytes() for cache in _result_caches(settings)),
+        "disk_free_bytes": disk.free,
+        "disk_total_bytes": disk.total,
+    }
+    _usage_cache[str(output_root)] = (time.monotonic(), usage)
+    return usage
+
+
+def main() -> None:
+    report = collect_garbage()
+    print(
+        f"[gc] deleted {len(report.deleted)} jobs and {report.cache_evicted} cache entries, "
+        f"freed {report.freed_bytes} bytes ({report.cache_freed_bytes} from the cache), "
+        f"{report.remaining_bytes} bytes remain"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Content-addressed OCR / translation result caches shared by API workers and the CLI."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+
+from app.core.config import Settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL DEFAULT 0
+)
+"""
+# Hits refresh `last_used` at most this often per entry, so reads rarely write.
+LAST_USED_RESOLUTION_SEC = 600.0
+DELETE_BATCH = 500
+
+
+def cache_key(*parts: str | bytes | int | None) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        # Length prefix so ("ab", "c") and ("a", "bc") hash differently.
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    @property
+    def hit_rate(self) -> float | None:
+        total = self.hits + self.misses
+        return self.hits / total if total else None
+
+
+class ResultCache:
+    """Key/value store in SQLite (WAL) so several processes can share one cache file."""
+
+    def __init__(self, path: Path, timeout_sec: float = 30.0) -> None:
+        self.path = path
+        self.timeout_sec = timeout_sec
+        self.stats = CacheStats()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            if "last_used" not in columns:
+                # Caches created before LRU eviction: start from the insert time.
+                try:
+                    conn.execute("ALTER TABLE entries ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+                    conn.execute("UPDATE entries SET last_used = created_at")
+                except sqlite3.OperationalError:
+                    pass  # another process added it first
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=self.timeout_sec, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> bytes | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value, last_used FROM entries WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row is not None and now - row[1] > LAST_USED_RESOLUTION_SEC:
+                conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+        self.stats.record(row is not None)
+        return row[0] if row else None
+
+    def put(self, key: str, value: bytes) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+
+    def disk_bytes(self) -> int:
+        total = 0
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                total += os.path.getsize(f"{self.path}{suffix}")
+            except OSError:
+                continue
+        return total
+
+    def entries_by_last_use(self, used_before: float | None = None) -> list[tuple[float, str, int]]:
+        """(last_used, key, bytes) of the entries, least recently used first."""
+        query = "SELECT last_used, key, LENGTH(value) FROM entries"
+        params: tuple[float, ...] = ()
+        if used_before is not None:
+            query += " WHERE last_used < ?"
+            params = (used_before,)
+        with self._connect() as conn:
+            return conn.execute(f"{query} ORDER BY last_used", params).fetchall()
+
+    def delete(self, keys: list[str]) -> None:
+        if not keys:
+            return
+        with self._connect() as conn:
+            for start in range(0, len(keys), DELETE_BATCH):
+                batch = keys[start : start + DELETE_BATCH]
+                conn.execute(f"DELETE FROM entries WHERE key IN ({','.join('?' * len(batch))})", batch)
+            # Give the freed pages back to the filesystem.
+            conn.execute("VACUUM")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+@dataclass(frozen=True)
+class ResultCaches:
+    ocr: ResultCache
+    translation: ResultCache
+
+
+def cache_dir(settings: Settings) -> Path:
+    if settings.pipeline_cache_dir:
+        return settings.repo_root / settings.pipeline_cache_dir
+    return settings.repo_root / settings.output_dir / "cache"
+
+
+@lru_cache(maxsize=4)
+def _open_caches(directory: Path) -> ResultCaches:
+    return ResultCaches(
+        ocr=ResultCache(directory / "ocr.sqlite3"),
+        translation=ResultCache(directory / "translation.sqlite3"),
+    )
+
+
+def get_result_caches(settings: Settings) -> ResultCaches | None:
+    if not settings.pipeline_cache_enabled:
+        return None
+    return _open_caches(cache_dir(settings))
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any
+
+from app.core.logging import JsonLinesFormatter
+from app.utils.jsonio import loads
+
+TAIL_READ_CHUNK = 8192
+
+
+logger = logging.getLogger("app.job")
+# job.log always records INFO, whatever level the process log is configured with.
+logger.setLevel(logging.INFO)
+
+
+class _BufferedJsonLinesHandler(logging.Handler):
+    def __init__(self, job_id: str) -> None:
+        super().__init__()
+        self.setFormatter(JsonLinesFormatter())
+        # All jobs in a process share the "app.job" logger; each handler keeps its own job's records.
+        self.addFilter(lambda record: getattr(record, "job_id", None) == job_id)
+        self._lines: list[str] = []
+        self._buffer_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = self.format(record)
+        except Exception:  # noqa: BLE001
+            self.handleError(record)
+            return
+        with self._buffer_lock:
+            self._lines.append(line)
+
+    def drain(self) -> list[str]:
+        with self._buffer_lock:
+            lines, self._lines = self._lines, []
+        return lines
+
+
+class JobLog:
+    """Per-job structured logger writing JSON lines to `job.log`.
+
+    Records are buffered in memory and appended to the file by `flush`
+    (called at page boundaries) and `close` (job end), off the event loop.
+    They also propagate to the process log configured by `setup_logging`.
+    """
+
+    def __init__(self, path: Path, job_id: str) -> None:
+        self.path = path
+        self.job_id = job_id
+        self._handler = _BufferedJsonLinesHandler(job_id)
+        logger.addHandler(self._handler)
+        self._write_lock = asyncio.Lock()
+
+    def _log(self, level: int, message: str, page: int | None, stage: str | None, **fields: Any) -> None:
+        exc_info = fields.pop("exc_info", None)
+        extra = {"job_id": self.job_id, "page": page, "stage": stage, **fields}
+        logger.log(level, message, extra=extra, exc_info=exc_info)
+
+    def info(self, message: str, page: int | None = None, stage: str | None = None, **fields: Any) -> None:
+        self._log(logging.INFO, message, page, stage, **fields)
+
+    def warning(self, message: str, page: int | None = None, stage: str | None = None, **fields: Any) -> None:
+        self._log(logging.WARNING, message, page, stage, **fields)
+
+    def exception(self, message: str, page: int | None = None, stage: str | None = None, **fields: Any) -> None:
+        self._log(logging.ERROR, message, page, stage, exc_info=True, **fields)
+
+    def _append(self, lines: list[str]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as fp:
+            fp.write("\n".join(lines) + "\n")
+
+    async def flush(self) -> None:
+        async with self._write_lock:
+            lines = self._handler.drain()
+            if lines:
+                await asyncio.to_thread(self._append, lines)
+
+    async def close(self) -> None:
+        await self.flush()
+        logger.removeHandler(self._handler)
+
+
+def _parse_line(line: bytes) -> dict[str, Any]:
+    text = line.decode("utf-8", errors="replace").rstrip("\n")
+    try:
+        entry = loads(text)
+    except ValueError:
+        # Plain-text lines written before job.log became JSON lines.
+        return {"msg": text}
+    return entry if isinstance(entry, dict) else {"msg": text}
+
+
+def read_log_range(path: Path, since: int, max_bytes: int) -> tuple[list[dict[str, Any]], int]:
+    """Entries starting at byte offset `since`, up to roughly `max_bytes`.
+
+    Returns the entries and the offset to pass as `since` next time; a
+    partially written last line is left for the next call.
+    """
+    with path.open("rb") as fp:
+        fp.seek(max(0, since))
+        data = fp.read(max_bytes)
+    end = data.rfind(b"\n") + 1
+    if end == 0 and len(data) == max_bytes:
+        # A single line longer than max_bytes: return it whole instead of stalling.
+        with path.open("rb") as fp:
+            fp.seek(max(0, since))
+            data = fp.readline()
+        end = len(data)
+    lines = data[:end].splitlines(keepends=True)
+    return [_parse_line(line) for line in lines if line.strip()], max(0, since) + end
+
+
+def read_log_tail(path: Path, lines: int) -> tuple[list[dict[str, Any]], int]:
+    """The last `lines` entries, reading the file backwards in chunks."""
+    with path.open("rb") as fp:
+        size = fp.seek(0, os.SEEK_END)
+        position = size
+        data = b""
+        while position > 0 and data.count(b"\n") <= lines:
+            step = min(TAIL_READ_CHUNK, position)
+            position -= step
+            fp.seek(position)
+            data = fp.read(step) + data
+    end = data.rfind(b"\n") + 1
+    complete = data[:end].splitlines(keepends=True)
+    if position > 0:
+        complete = complete[1:]  # first line may be cut at the chunk boundary
+    return [_parse_line(line) for line in complete[-lines:] if line.strip()], position + end
@@ -14,10 +14,15 @@ class JobPaths:
     input_pdf: Path
     meta_json: Path
     job_log: Path
+    glossary_json: Path
     pages_dir: Path
+    tiles_dir: Path
     ocr_dir: Path
     md_dir: Path
     result_md: Path
+    pdf_dir: Path
+    result_pdf: Path
+    profile: Path
 
 
 def build_job_paths(job_id: str, settings: Settings) -> JobPaths:
@@ -27,6 +32,7 @@ def build_job_paths(job_id: str, settings: Settings) -> JobPaths:
     pages_dir = job_dir / "pages"
     ocr_dir = job_dir / "ocr"
     md_dir = job_dir / "md"
+    pdf_dir = job_dir / "pdf"
     return JobPaths(
         output_root=output_root,
         jobs_root=jobs_root,
@@ -34,13 +40,31 @@ def build_job_paths(job_id: str, settings: Settings) -> JobPaths:
         input_pdf=job_dir / "input.pdf",
         meta_json=job_dir / "meta.json",
         job_log=job_dir / "job.log",
+        glossary_json=job_dir / "glossary.json",
         pages_dir=pages_dir,
+        tiles_dir=pages_dir / "tiles",
         ocr_dir=ocr_dir,
         md_dir=md_dir,
         result_md=md_dir / "result.md",
+        pdf_dir=pdf_dir,
+        result_pdf=pdf_dir / "result.pdf",
+        profile=job_dir / "profile.folded",
     )
 
 
+@dataclass(frozen=True)
+class BatchPaths:
+    batches_root: Path
+    batch_dir: Path
+    batch_json: Path
+
+
+def build_batch_paths(batch_id: str, settings: Settings) -> BatchPaths:
+    batches_root = settings.repo_root / settings.output_dir / "batches"
+    batch_dir = batches_root / batch_id
+    return BatchPaths(batches_root=batches_root, batch_dir=batch_dir, batch_json=batch_dir / "batch.json")
+
+
 def ensure_job_dirs(paths: JobPaths) -> None:
     paths.job_dir.mkdir(parents=True, exist_ok=True)
     paths.pages_dir.mkdir(parents=True, exist_ok=True)
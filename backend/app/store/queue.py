@@ -0,0 +1,281 @@
+"""SQLite-backed job queue shared by the API (enqueue) and workers (lease)."""
+
+from __future__ import annotations
+
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+from app.core.config import Settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    enqueued_at REAL NOT NULL,
+    worker_id TEXT,
+    lease_expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    pages INTEGER NOT NULL DEFAULT 1,
+    priority INTEGER NOT NULL DEFAULT 0,
+    client TEXT NOT NULL DEFAULT '',
+    leased_at REAL
+);
+CREATE TABLE IF NOT EXISTS throughput (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+# Columns added after the first release of the queue; older databases are migrated in place.
+ADDED_COLUMNS = {
+    "pages": "INTEGER NOT NULL DEFAULT 1",
+    "priority": "INTEGER NOT NULL DEFAULT 0",
+    "client": "TEXT NOT NULL DEFAULT ''",
+    "leased_at": "REAL",
+}
+SEC_PER_PAGE_KEY = "sec_per_page"
+SEC_PER_PAGE_SMOOTHING = 0.3
+
+
+@dataclass(frozen=True)
+class Lease:
+    job_id: str
+    worker_id: str
+    attempt: int
+    pages: int = 1
+    priority: int = 0
+
+
+@dataclass(frozen=True)
+class SchedulingPolicy:
+    """How `lease` picks the next job.
+
+    Higher priority always wins. Within a priority, clients with fewer running
+    jobs go first (fair share), then the smallest job ("sjf") or the oldest one
+    ("fifo"). Under "sjf" every `aging_sec_per_page` seconds of waiting counts
+    as one page less, so large jobs are not starved.
+    """
+
+    mode: str = "sjf"
+    aging_sec_per_page: float = 30.0
+    default_sec_per_page: float = 20.0
+
+
+@dataclass(frozen=True)
+class WaitEstimate:
+    position: int
+    expected_wait_sec: float
+
+
+@dataclass(frozen=True)
+class _Row:
+    job_id: str
+    enqueued_at: float
+    worker_id: str | None
+    lease_expires_at: float | None
+    attempts: int
+    pages: int
+    priority: int
+    client: str
+    leased_at: float | None
+
+    def is_leased(self, now: float) -> bool:
+        return self.worker_id is not None and (self.lease_expires_at or 0.0) >= now
+
+
+def queue_path(settings: Settings) -> Path:
+    if settings.job_queue_path:
+        return settings.repo_root / settings.job_queue_path
+    return settings.repo_root / settings.output_dir / "queue.sqlite3"
+
+
+class JobQueue:
+    """Leases expire unless renewed by `heartbeat`; an expired lease (crashed or
+    stalled worker) makes the job available to the next `lease` call.
+
+    Single host only: the database runs in WAL mode, whose shared-memory index
+    does not work across machines, so API and workers must share a local disk
+    (not NFS/SMB)."""
+
+    def __init__(self, path: Path, policy: SchedulingPolicy | None = None, timeout_sec: float = 30.0) -> None:
+        self.path = path
+        self.policy = policy or SchedulingPolicy()
+        self.timeout_sec = timeout_sec
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, ddl in ADDED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {ddl}")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # isolation_level=None: transactions are opened explicitly with BEGIN IMMEDIATE
+        # so the select-then-update in `lease` holds the write lock across processes.
+        conn = sqlite3.connect(self.path, timeout=self.timeout_sec, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, job_id: str, pages: int = 1, priority: int = 0, client: str = "") -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, enqueued_at, attempts, pages, priority, client) "
+                "VALUES (?, ?, 0, ?, ?, ?)",
+                (job_id, time.time(), max(1, pages), priority, client),
+            )
+
+    @staticmethod
+    def _rows(conn: sqlite3.Connection) -> list[_Row]:
+        return [
+            _Row(*row)
+            for row in conn.execute(
+                "SELECT job_id, enqueued_at, worker_id, lease_expires_at, attempts, "
+                "pages, priority, client, leased_at FROM jobs"
+            )
+        ]
+
+    def _schedule(self, rows: list[_Row], now: float) -> list[_Row]:
+        """Waiting rows in the order `lease` would hand them out right now."""
+        running: dict[str, int] = {}
+        for row in rows:
+            if row.is_leased(now):
+                running[row.client] = running.get(row.client, 0) + 1
+        waiting = [row for row in rows if not row.is_leased(now)]
+
+        def key(row: _Row) -> tuple[float, ...]:
+            size = 0.0
+            if self.policy.mode == "sjf":
+                aging = (now - row.enqueued_at) / max(1.0, self.policy.aging_sec_per_page)
+                size = row.pages - aging
+            return (-row.priority, running.get(row.client, 0), size, row.enqueued_at)
+
+        return sorted(waiting, key=key)
+
+    def lease(self, worker_id: str, lease_sec: float, now: float | None = None) -> Lease | None:
+        now = now or time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                order = self._schedule(self._rows(conn), now)
+                if not order:
+                    conn.execute("COMMIT")
+                    return None
+                row = order[0]
+                conn.execute(
+                    "UPDATE jobs SET worker_id = ?, lease_expires_at = ?, attempts = ?, leased_at = ? "
+                    "WHERE job_id = ?",
+                    (worker_id, now + lease_sec, row.attempts + 1, now, row.job_id),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return Lease(
+            job_id=row.job_id,
+            worker_id=worker_id,
+            attempt=row.attempts + 1,
+            pages=row.pages,
+            priority=row.priority,
+        )
+
+    def heartbeat(self, lease: Lease, lease_sec: float) -> bool:
+        """Extend the lease. False means it was lost to another worker."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ? WHERE job_id = ? AND worker_id = ?",
+                (time.time() + lease_sec, lease.job_id, lease.worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, lease: Lease, elapsed_sec: float | None = None) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE job_id = ? AND worker_id = ?", (lease.job_id, lease.worker_id))
+            if elapsed_sec is not None and elapsed_sec > 0:
+                # Exponentially smoothed seconds per page, shared by all workers.
+                sample = elapsed_sec / max(1, lease.pages)
+                conn.execute(
+                    "INSERT INTO throughput (key, value) VALUES (?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = value * ? + excluded.value * ?",
+                    (SEC_PER_PAGE_KEY, sample, 1 - SEC_PER_PAGE_SMOOTHING, SEC_PER_PAGE_SMOOTHING),
+                )
+
+    def sec_per_page(self) -> float:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM throughput WHERE key = ?", (SEC_PER_PAGE_KEY,)).fetchone()
+        return row[0] if row else self.policy.default_sec_per_page
+
+    def estimate_wait(self, job_id: str, now: float | None = None) -> WaitEstimate | None:
+        """Position and expected wait of a job that has not started yet.
+
+        Work ahead of the job (remaining time of running jobs plus every job
+        scheduled before it) is divided by the number of running jobs, which
+        stands in for the number of free worker slots.
+        """
+        now = now or time.time()
+        sec_per_page = self.sec_per_page()
+        with self._connect() as conn:
+            rows = self._rows(conn)
+        running = [row for row in rows if row.is_leased(now)]
+        order = self._schedule(rows, now)
+        ids = [row.job_id for row in order]
+        if job_id not in ids:
+            return None
+        position = ids.index(job_id)
+        busy = sum(max(0.0, row.pages * sec_per_page - (now - (row.leased_at or now))) for row in running)
+        ahead = sum(row.pages * sec_per_page for row in order[:position])
+        slots = max(1, len(running))
+        wait = (busy + ahead) / slots if running or position else 0.0
+        return WaitEstimate(position=position, expected_wait_sec=round(wait, 1))
+
+    def release(self, lease: Lease) -> None:
+        """Hand a job back without counting the attempt (worker shutting down)."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET worker_id = NULL, lease_expires_at = NULL, attempts = MAX(0, attempts - 1) "
+                "WHERE job_id = ? AND worker_id = ?",
+                (lease.job_id, lease.worker_id),
+            )
+
+    def lease_states(self, now: float | None = None) -> dict[str, bool]:
+        """Every queued job id -> whether a worker holds an unexpired lease on it."""
+        now = now or time.time()
+        with self._connect() as conn:
+            return {row.job_id: row.is_leased(now) for row in self._rows(conn)}
+
+    def discard(self, job_id: str) -> None:
+        """Drop a job whatever its lease state (its directory was deleted)."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+
+    def stats(self, now: float | None = None) -> dict[str, int]:
+        now = now or time.time()
+        with self._connect() as conn:
+            queued, leased = conn.execute(
+                "SELECT "
+                "COALESCE(SUM(worker_id IS NULL OR lease_expires_at < ?), 0), "
+                "COALESCE(SUM(worker_id IS NOT NULL AND lease_expires_at >= ?), 0) "
+                "FROM jobs",
+                (now, now),
+            ).fetchone()
+        return {"queued": queued, "leased": leased}
+
+
+@lru_cache(maxsize=4)
+def _open_queue(path: Path, policy: SchedulingPolicy) -> JobQueue:
+    return JobQueue(path, policy=policy)
+
+
+def get_job_queue(settings: Settings) -> JobQueue:
+    policy = SchedulingPolicy(
+        mode=settings.queue_policy,
+        aging_sec_per_page=settings.queue_aging_sec_per_page,
+        default_sec_per_page=settings.queue_sec_per_page_estimate,
+    )
+    return _open_queue(queue_path(settings), policy)
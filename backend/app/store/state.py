@@ -1,23 +1,49 @@
 from __future__ import annotations
 
-import json
+import os
+import tempfile
 from datetime import UTC, datetime
 from pathlib import Path
 
-from app.models.schemas import JobMeta, JobStatus
+from app.models.schemas import BatchMeta, JobMeta, JobStatus
+
+# os.umask can only be read by setting it; do it once at import, before worker threads start.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
 
 def utc_now() -> datetime:
     return datetime.now(UTC)
 
 
-def save_meta(meta_path: Path, meta: JobMeta) -> None:
-    meta_path.write_text(meta.model_dump_json(indent=2), encoding="utf-8")
+def _write_atomic(path: Path, text: str) -> None:
+    # Workers, to_thread helpers and the API read these files concurrently: readers
+    # must see the old or the new file, never a truncated one. The temporary file
+    # name is unique so concurrent writers do not share it.
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        # mkstemp creates 0600; keep the mode a plain open() would give (or the
+        # existing file's) so other users/containers can still read the file.
+        try:
+            mode = path.stat().st_mode & 0o7777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.fchmod(fd, mode)
+        with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+            tmp.write(text)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def save_meta(meta_path: Path, meta: JobMeta, pretty: bool = False) -> None:
+    _write_atomic(meta_path, meta.model_dump_json(indent=2 if pretty else None))
 
 
 def load_meta(meta_path: Path) -> JobMeta:
-    raw = json.loads(meta_path.read_text(encoding="utf-8"))
-    return JobMeta.model_validate(raw)
+    # pydantic's native JSON parser; avoids building an intermediate dict.
+    return JobMeta.model_validate_json(meta_path.read_bytes())
 
 
 def init_meta(job_id: str, filename: str, extra: dict[str, object] | None = None) -> JobMeta:
@@ -35,7 +61,18 @@ def init_meta(job_id: str, filename: str, extra: dict[str, object] | None = None
 
 
 def update_meta(meta: JobMeta, **changes: object) -> JobMeta:
-    payload = meta.model_dump()
+    # Shallow field dict instead of model_dump(): validation still runs on the
+    # result, but nested values are not serialized and rebuilt on every update.
+    payload = dict(meta)
     payload.update(changes)
     payload["updated_at"] = utc_now()
     return JobMeta.model_validate(payload)
+
+
+def save_batch(batch_path: Path, batch: BatchMeta) -> None:
+    batch_path.parent.mkdir(parents=True, exist_ok=True)
+    _write_atomic(batch_path, batch.model_dump_json())
+
+
+def load_batch(batch_path: Path) -> BatchMeta:
+    return BatchMeta.model_validate_json(batch_path.read_bytes())
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import ParamSpec, TypeVar
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+_process_pool: ProcessPoolExecutor | None = None
+# Workers and the API already run threads (heartbeats, to_thread, profiler) when
+# the pool starts; a forked child could inherit a lock one of them holds.
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _get_process_pool(max_workers: int) -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=max(1, max_workers), mp_context=multiprocessing.get_context(_START_METHOD)
+        )
+    return _process_pool
+
+
+async def run_cpu_bound(
+    mode: str,
+    max_workers: int,
+    func: Callable[P, T],
+    *args: P.args,
+    **kwargs: P.kwargs,
+) -> T:
+    """Run CPU-heavy work off the event loop.
+
+    "process" uses a shared process pool (for work that holds the GIL, such as
+    PyMuPDF rasterization); anything else runs in the default thread pool.
+    `func` and its arguments must be picklable in process mode.
+    """
+    call = functools.partial(func, *args, **kwargs)
+    if mode == "process":
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_process_pool(max_workers), call)
+    return await asyncio.to_thread(call)
+
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
@@ -0,0 +1,102 @@
+"""Token counts for chunking and output sizing.
+
+`TRANSLATE_TOKENIZER` selects the estimator:
+
+- `heuristic` (default): script-aware approximation, no dependencies.
+- a `tokenizer.json` path or Hugging Face repo id: exact counts via the
+  `tokenizers` package (`uv sync --extra tokenizers`).
+- `module:function`: any callable `(text) -> int`.
+
+Estimators are loaded once per process and memoize counts, since the same
+sentences are measured again while chunks are assembled.
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import math
+import re
+from collections.abc import Callable
+from functools import lru_cache
+from pathlib import Path
+from typing import Protocol
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:  # pragma: no cover - optional dependency
+    Tokenizer = None  # type: ignore[assignment,misc]
+
+logger = logging.getLogger(__name__)
+
+# CJK / kana / hangul / fullwidth forms: roughly one token per character in
+# common multilingual vocabularies.
+_CJK = r"぀-ヿ㐀-䶿一-鿿가-힯豈-﫿＀-￯"
+TOKEN_PIECE_RE = re.compile(rf"([{_CJK}])|([^\W\d_]+)|(\d+)|(\S)")
+
+
+class TokenEstimator(Protocol):
+    name: str
+
+    def count(self, text: str) -> int: ...
+
+
+class HeuristicTokenEstimator:
+    """Upper-leaning estimate: words cost one token plus one per ~4 letters
+    beyond the sixth, digits one per three, CJK and symbols one each."""
+
+    name = "heuristic"
+
+    def count(self, text: str) -> int:
+        tokens = 0
+        for cjk, word, digits, _symbol in TOKEN_PIECE_RE.findall(text):
+            if cjk:
+                tokens += 1
+            elif word:
+                tokens += 1 + max(0, math.ceil((len(word) - 6) / 4))
+            elif digits:
+                tokens += math.ceil(len(digits) / 3)
+            else:
+                tokens += 1
+        return tokens
+
+
+class CallableTokenEstimator:
+    def __init__(self, name: str, func: Callable[[str], int]) -> None:
+        self.name = name
+        self._func = func
+
+    def count(self, text: str) -> int:
+        return int(self._func(text))
+
+
+class CachedTokenEstimator:
+    def __init__(self, inner: TokenEstimator, maxsize: int = 8192) -> None:
+        self.inner = inner
+        self.name = inner.name
+        self.count = lru_cache(maxsize=maxsize)(inner.count)  # type: ignore[method-assign]
+
+
+def _load(spec: str) -> TokenEstimator:
+    if spec in {"", "heuristic"}:
+        return HeuristicTokenEstimator()
+    if ":" in spec and not Path(spec).exists() and not spec.startswith(("/", ".")):
+        module_name, func_name = spec.split(":", maxsplit=1)
+        func = getattr(importlib.import_module(module_name), func_name, None)
+        if func is None or not callable(func):
+            raise ValueError(f"TRANSLATE_TOKENIZER entrypoint not callable: {spec}")
+        return CallableTokenEstimator(spec, func)
+    if Tokenizer is None:
+        logger.warning("TRANSLATE_TOKENIZER=%s needs the 'tokenizers' extra; using the heuristic", spec)
+        return HeuristicTokenEstimator()
+    try:
+        tokenizer = Tokenizer.from_file(spec) if Path(spec).is_file() else Tokenizer.from_pretrained(spec)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Could not load tokenizer %s (%s); using the heuristic", spec, exc)
+        return HeuristicTokenEstimator()
+    return CallableTokenEstimator(spec, lambda text: len(tokenizer.encode(text, add_special_tokens=False).ids))
+
+
+@lru_cache(maxsize=8)
+def get_token_estimator(spec: str) -> TokenEstimator:
+    return CachedTokenEstimator(_load(spec.strip()))
@@ -0,0 +1,196 @@
+"""Job worker: `python -m app.worker [--concurrency N]`.
+
+Pulls job ids from the shared queue (see `app.store.queue`) and runs the
+pipeline. Any number of worker processes on the same host as the API can run
+side by side; the API process only enqueues.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from collections.abc import Callable
+
+from app.clients.translation_client import TranslationClientError, build_translation_client
+from app.core.config import Settings, get_settings
+from app.core.logging import setup_logging
+from app.core.loop_monitor import monitor_event_loop
+from app.models.schemas import JobStatus
+from app.pipeline.run_job import run_job
+from app.store.paths import build_job_paths
+from app.store.queue import JobQueue, Lease, get_job_queue
+from app.store.state import load_meta, save_meta, update_meta
+from app.utils.executors import shutdown_process_pool
+
+logger = logging.getLogger(__name__)
+
+
+def _fail_abandoned_job(lease: Lease, settings: Settings) -> None:
+    paths = build_job_paths(job_id=lease.job_id, settings=settings)
+    meta = load_meta(paths.meta_json)
+    meta = update_meta(
+        meta,
+        status=JobStatus.FAILED,
+        stage="failed",
+        error=f"Job abandoned after {lease.attempt - 1} attempts (worker lease expired).",
+    )
+    save_meta(paths.meta_json, meta, pretty=settings.artifact_pretty_json)
+
+
+def _requeue_meta(lease: Lease, settings: Settings) -> None:
+    paths = build_job_paths(job_id=lease.job_id, settings=settings)
+    meta = load_meta(paths.meta_json)
+    save_meta(
+        paths.meta_json,
+        update_meta(meta, status=JobStatus.QUEUED, stage="queued", progress=0.0),
+        pretty=settings.artifact_pretty_json,
+    )
+
+
+def _record_lease(lease: Lease, settings: Settings) -> bool:
+    paths = build_job_paths(job_id=lease.job_id, settings=settings)
+    if not paths.meta_json.exists():
+        return False
+    meta = load_meta(paths.meta_json)
+    meta = update_meta(meta, extra={**meta.extra, "worker_id": lease.worker_id, "attempt": lease.attempt})
+    save_meta(paths.meta_json, meta, pretty=settings.artifact_pretty_json)
+    return True
+
+
+def _keep_lease(
+    queue: JobQueue,
+    lease: Lease,
+    on_lost: Callable[[], None],
+    stop: threading.Event,
+    settings: Settings,
+) -> None:
+    # Runs in its own thread so heartbeats keep going while a pipeline stage
+    # holds the event loop (PDF rendering, image cropping, file writes).
+    while not stop.wait(settings.worker_heartbeat_sec):
+        if not queue.heartbeat(lease, settings.worker_lease_sec):
+            logger.warning("Lease on job %s lost; stopping local run", lease.job_id)
+            on_lost()
+            return
+
+
+async def _process(queue: JobQueue, lease: Lease, settings: Settings) -> None:
+    if lease.attempt > settings.worker_max_attempts:
+        logger.error("Job %s exceeded %d attempts; marking failed", lease.job_id, settings.worker_max_attempts)
+        await asyncio.to_thread(_fail_abandoned_job, lease, settings)
+        await asyncio.to_thread(queue.complete, lease)
+        return
+    if not await asyncio.to_thread(_record_lease, lease, settings):
+        logger.warning("Job %s has no meta.json (deleted?); dropping it", lease.job_id)
+        await asyncio.to_thread(queue.complete, lease)
+        return
+
+    logger.info("Running job %s (attempt %d, %d pages)", lease.job_id, lease.attempt, lease.pages)
+    started = time.monotonic()
+    loop = asyncio.get_running_loop()
+    job = asyncio.create_task(run_job(lease.job_id, settings))
+    lost = threading.Event()
+
+    def on_lost() -> None:
+        lost.set()
+        loop.call_soon_threadsafe(job.cancel)
+
+    stop = threading.Event()
+    keeper = threading.Thread(
+        target=_keep_lease,
+        args=(queue, lease, on_lost, stop, settings),
+        name=f"lease-{lease.job_id}",
+        daemon=True,
+    )
+    keeper.start()
+    try:
+        await job
+    except asyncio.CancelledError:
+        if lost.is_set():
+            # Lease was lost; the job belongs to whoever re-leased it now.
+            return
+        await asyncio.to_thread(_requeue_meta, lease, settings)
+        await asyncio.to_thread(queue.release, lease)
+        raise
+    finally:
+        stop.set()
+    await asyncio.to_thread(queue.complete, lease, time.monotonic() - started)
+    logger.info("Finished job %s", lease.job_id)
+
+
+async def _worker_loop(queue: JobQueue, worker_id: str, settings: Settings) -> None:
+    while True:
+        try:
+            lease = await asyncio.to_thread(queue.lease, worker_id, settings.worker_lease_sec)
+            if lease is None:
+                await asyncio.sleep(settings.worker_poll_interval_sec)
+                continue
+            await _process(queue, lease, settings)
+        except Exception:
+            # A locked queue or an unreadable meta.json must not take the slot down;
+            # the lease (if any) expires and the job is retried.
+            logger.exception("Worker slot %s failed; retrying", worker_id)
+            await asyncio.sleep(settings.worker_poll_interval_sec)
+
+
+async def _warm_up(settings: Settings) -> None:
+    try:
+        await build_translation_client(settings).warm_up()
+    except TranslationClientError as exc:
+        logger.warning("Translation model warm-up failed: %s", exc)
+
+
+async def run_worker(concurrency: int, settings: Settings | None = None) -> None:
+    settings = settings or get_settings()
+    queue = get_job_queue(settings)
+    base_id = f"{socket.gethostname()}-{os.getpid()}"
+    warm_up_task = asyncio.create_task(_warm_up(settings)) if settings.ollama_warmup_enabled else None
+    # Stalls here delay heartbeats and progress writes; they are logged as warnings.
+    monitor_task = (
+        asyncio.create_task(monitor_event_loop(settings.loop_monitor_interval_sec, settings.loop_lag_threshold_ms))
+        if settings.loop_monitor_enabled
+        else None
+    )
+
+    loops = [
+        asyncio.create_task(_worker_loop(queue, f"{base_id}-{slot}", settings))
+        for slot in range(max(1, concurrency))
+    ]
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    logger.info("Worker %s started (%d slots, queue %s)", base_id, len(loops), queue.path)
+
+    await stop.wait()
+    logger.info("Worker %s stopping; releasing leased jobs", base_id)
+    for task in loops:
+        task.cancel()
+    for task in (warm_up_task, monitor_task):
+        if task is not None:
+            task.cancel()
+    await asyncio.gather(*loops, return_exceptions=True)
+    shutdown_process_pool()
+
+
+def main() -> None:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="python -m app.worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.worker_concurrency,
+        help="jobs run at the same time by this process (default: WORKER_CONCURRENCY)",
+    )
+    args = parser.parse_args()
+    setup_logging()
+    asyncio.run(run_worker(args.concurrency, settings))
+
+
+if __name__ == "__main__":
+    main()
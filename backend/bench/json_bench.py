@@ -0,0 +1,59 @@
+"""Compare stdlib JSON with app.utils.jsonio on a large synthetic OCR response.
+
+Usage: python -m bench.json_bench [--blocks 5000] [--repeat 20]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+
+from app.pipeline.ocr_page import normalize_ocr_result
+from app.utils import jsonio
+
+
+def _synthetic_ocr(block_count: int) -> dict[str, object]:
+    return {
+        "img_w": 2480,
+        "img_h": 3508,
+        "blocks": [
+            {
+                "id": f"p001-b{idx:04d}",
+                "type": "paragraph",
+                "bbox": [100.0 + idx % 7, 120.0 + idx * 3.5, 1200.0, 160.0 + idx * 3.5],
+                "text": "深層学習 based OCR output with some English words " * 4,
+            }
+            for idx in range(block_count)
+        ],
+    }
+
+
+def _report(label: str, seconds: float, repeat: int) -> None:
+    print(f"  {label:<34} {seconds / repeat * 1000:9.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    raw = _synthetic_ocr(args.blocks)
+    pretty_std = json.dumps(raw, ensure_ascii=False, indent=2).encode("utf-8")
+    compact = jsonio.dumps(raw)
+    backend = "orjson" if jsonio.orjson is not None else "stdlib fallback"
+    print(f"{args.blocks} blocks, jsonio backend: {backend}")
+    print(f"  size: indented stdlib {len(pretty_std):,} B, compact jsonio {len(compact):,} B")
+
+    n = args.repeat
+    _report("dump  stdlib indent=2", timeit.timeit(
+        lambda: json.dumps(raw, ensure_ascii=False, indent=2).encode("utf-8"), number=n), n)
+    _report("dump  jsonio compact", timeit.timeit(lambda: jsonio.dumps(raw), number=n), n)
+    _report("load  stdlib", timeit.timeit(lambda: json.loads(pretty_std), number=n), n)
+    _report("load  jsonio", timeit.timeit(lambda: jsonio.loads(compact), number=n), n)
+    _report("normalize_ocr_result", timeit.timeit(lambda: normalize_ocr_result(raw, page=1), number=n), n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare reading-order engines on synthetic multi-column pages.
+
+Usage: python -m bench.order_blocks_bench [--blocks 200 400 800] [--repeat 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import timeit
+
+from app.models.records import BlockRecord, PageRecord
+from app.pipeline.order_blocks import READING_ORDER_ENGINES, order_page_blocks
+
+PAGE_W = 2480
+PAGE_H = 3508
+
+
+def _synthetic_page(block_count: int, columns: int, seed: int = 0) -> PageRecord:
+    rng = random.Random(seed)
+    margin = 150
+    gutter = 60
+    col_w = (PAGE_W - 2 * margin - gutter * (columns - 1)) / columns
+    per_column = max(1, block_count // columns)
+    line_h = (PAGE_H - 2 * margin) / per_column
+    blocks: list[BlockRecord] = []
+    for col in range(columns):
+        x1 = margin + col * (col_w + gutter)
+        for row in range(per_column):
+            y1 = margin + row * line_h
+            blocks.append(
+                BlockRecord(
+                    id=f"c{col}r{row}",
+                    type="paragraph",
+                    bbox=(x1, y1, x1 + col_w * rng.uniform(0.7, 1.0), y1 + line_h * 0.8),
+                    text="lorem ipsum",
+                    page=1,
+                )
+            )
+    rng.shuffle(blocks)
+    return PageRecord(page=1, img_w=PAGE_W, img_h=PAGE_H, blocks=blocks)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--columns", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'blocks':>7} {'cols':>4} " + " ".join(f"{engine:>14}" for engine in READING_ORDER_ENGINES))
+    for block_count in args.blocks:
+        for columns in args.columns:
+            page = _synthetic_page(block_count, columns)
+            timings = []
+            for engine in READING_ORDER_ENGINES:
+                seconds = timeit.timeit(
+                    lambda page=page, engine=engine: order_page_blocks(page, engine=engine), number=args.repeat
+                )
+                timings.append(f"{seconds / args.repeat * 1000:11.3f} ms")
+            print(f"{block_count:>7} {columns:>4} " + " ".join(timings))
+
+
+if __name__ == "__main__":
+    main()
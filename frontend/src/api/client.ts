@@ -51,7 +51,22 @@ export async function getResultMarkdown(jobId: string): Promise<string> {
   return res.text();
 }
 
+// Pages finished so far, in order. The browser revalidates with the ETag, so
+// polling an unchanged job costs a 304.
+export async function getPartialMarkdown(jobId: string): Promise<string> {
+  const res = await fetch(`${API_BASE_URL}/jobs/${jobId}/result/partial`);
+  if (!res.ok) {
+    const text = await res.text();
+    throw new Error(`API ${res.status}: ${text}`);
+  }
+  return res.text();
+}
+
 export function getResultDownloadUrl(jobId: string): string {
   return `${API_BASE_URL}/jobs/${jobId}/result`;
 }
 
+export function getResultPdfUrl(jobId: string): string {
+  return `${API_BASE_URL}/jobs/${jobId}/result.pdf`;
+}
+
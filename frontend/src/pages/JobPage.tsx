@@ -1,5 +1,12 @@
 import { useEffect, useMemo, useState } from "react";
-import { getJob, getResultDownloadUrl, getResultMarkdown, type JobMeta } from "../api/client";
+import {
+  getJob,
+  getPartialMarkdown,
+  getResultDownloadUrl,
+  getResultMarkdown,
+  getResultPdfUrl,
+  type JobMeta
+} from "../api/client";
 import { MarkdownViewer } from "../components/MarkdownViewer";
 import { Progress } from "../components/Progress";
 
@@ -37,6 +44,13 @@ export function JobPage({ jobId, onReset }: JobPageProps) {
         if (latest.status === "failed") {
           return;
         }
+        if (latest.status === "running") {
+          const partial = await getPartialMarkdown(jobId);
+          if (!active) {
+            return;
+          }
+          setMarkdown(partial);
+        }
       } catch (err) {
         if (!active) {
           return;
@@ -91,8 +105,13 @@ export function JobPage({ jobId, onReset }: JobPageProps) {
           <a href={getResultDownloadUrl(jobId)} download={!terminal ? undefined : `${jobId}.md`}>
             Download
           </a>
+          {job?.extra.result_pdf ? (
+            <a href={getResultPdfUrl(jobId)} target="_blank" rel="noreferrer">
+              PDF
+            </a>
+          ) : null}
         </div>
-        {job?.status === "succeeded" ? (
+        {job?.status === "succeeded" || markdown ? (
           <MarkdownViewer markdown={markdown} />
         ) : (
           <p className="muted">Result will appear after job completion.</p>